@@ -110,10 +110,8 @@ export default function DriverRequestsScreen() {
       const request = requests.find(r => r.id === requestId);
       if (!request) return;
 
+      // The backend reserves the seat when the request is accepted
       await ridesAPI.updateRideRequest(requestId, 'accepted');
-      await ridesAPI.updateRide(request.ride.id, {
-              seats_available: request.ride.seats_available - 1
-            });
             await ridesAPI.createRideHistory(
              request.rider_id, // Assuming userId is passed in params
             request.ride_id,
@@ -25,16 +25,34 @@ interface Message {
   content: string;
   sent_at: string;
   ride_id?: number;
+  pending?: boolean; // shown optimistically, not confirmed by the server yet
 }
 
+// Server messages by id, oldest first, then the ones still being sent
+const mergeMessages = (current: Message[], incoming: Message[]) => {
+  const byId = new Map<number, Message>();
+  [...current.filter(msg => !msg.pending), ...incoming].forEach(msg => byId.set(msg.id, msg));
+  const confirmed = Array.from(byId.values()).sort((a, b) => a.id - b.id);
+  return [...confirmed, ...current.filter(msg => msg.pending)];
+};
+
+const newestConfirmedId = (messages: Message[]) => {
+  const confirmed = messages.filter(msg => !msg.pending);
+  return confirmed.length ? confirmed[confirmed.length - 1].id : undefined;
+};
+
 export default function MessagesChatScreen() {
   const { name, image, userId, rideId, rideRoute } = useLocalSearchParams();
   const [input, setInput] = useState('');
   const [messages, setMessages] = useState<Message[]>([]);
   const [loading, setLoading] = useState(true);
+  const [hasEarlier, setHasEarlier] = useState(false);
+  const [loadingEarlier, setLoadingEarlier] = useState(false);
   const [sending, setSending] = useState(false);
   const [currentUserId, setCurrentUserId] = useState<number | null>(null);
   const scrollViewRef = useRef<ScrollView>(null);
+  const messagesRef = useRef<Message[]>([]);
+  const lastScrolledId = useRef<number | undefined>(undefined);
 
   useEffect(() => {
     initializeUser();
@@ -52,7 +70,7 @@ export default function MessagesChatScreen() {
       console.log('New message received:', data);
       // Check if the message is for this conversation
       if (data.sender_id === Number(userId) || data.receiver_id === Number(userId)) {
-        loadMessages(); // Refresh messages
+        loadNewerMessages(); // Fetch only what came after the newest message shown
       }
     };
 
@@ -65,8 +83,11 @@ export default function MessagesChatScreen() {
   }, [userId]);
 
   useEffect(() => {
-    // Auto-scroll to bottom when new messages arrive
-    if (messages.length > 0) {
+    messagesRef.current = messages;
+    // Auto-scroll to bottom when new messages arrive, not when earlier ones are loaded
+    const newest = messages.length > 0 ? messages[messages.length - 1].id : undefined;
+    if (newest !== undefined && newest !== lastScrolledId.current) {
+      lastScrolledId.current = newest;
       setTimeout(() => {
         scrollViewRef.current?.scrollToEnd({ animated: true });
       }, 100);
@@ -88,7 +109,8 @@ export default function MessagesChatScreen() {
     try {
       setLoading(true);
       const data = await messagesAPI.getConversationWithUser(Number(userId));
-      setMessages(data);
+      setMessages(data.messages);
+      setHasEarlier(data.has_more);
     } catch (error) {
       console.error('Error loading messages:', error);
       Alert.alert('Error', 'Failed to load messages. Please try again.');
@@ -97,9 +119,49 @@ export default function MessagesChatScreen() {
     }
   };
 
+  const loadEarlierMessages = async () => {
+    const oldest = messagesRef.current.find(msg => !msg.pending);
+    if (!oldest || loadingEarlier) return;
+    try {
+      setLoadingEarlier(true);
+      const data = await messagesAPI.getConversationWithUser(Number(userId), { beforeId: oldest.id });
+      setMessages(prev => mergeMessages(prev, data.messages));
+      setHasEarlier(data.has_more);
+    } catch (error) {
+      console.error('Error loading earlier messages:', error);
+      Alert.alert('Error', 'Failed to load earlier messages. Please try again.');
+    } finally {
+      setLoadingEarlier(false);
+    }
+  };
+
+  const loadNewerMessages = async () => {
+    try {
+      let afterId = newestConfirmedId(messagesRef.current);
+      if (afterId === undefined) {
+        // Nothing shown yet: the latest page is all there is to catch up on
+        const data = await messagesAPI.getConversationWithUser(Number(userId));
+        setMessages(prev => mergeMessages(prev, data.messages));
+        setHasEarlier(data.has_more);
+        return;
+      }
+      let hasMore = true;
+      while (hasMore) {
+        const data = await messagesAPI.getConversationWithUser(Number(userId), { afterId });
+        if (data.messages.length === 0) break;
+        setMessages(prev => mergeMessages(prev, data.messages));
+        afterId = data.messages[data.messages.length - 1].id;
+        hasMore = data.has_more;
+      }
+    } catch (error) {
+      console.error('Error loading new messages:', error);
+    }
+  };
+
   const handleSend = async () => {
     const trimmedInput = input.trim();
     if (!trimmedInput || !currentUserId) return;
+    const tempId = Date.now();
 
     try {
       setSending(true);
@@ -114,31 +176,32 @@ export default function MessagesChatScreen() {
       
       // Optimistically add message to UI
       const tempMessage: Message = {
-        id: Date.now(),
+        id: tempId,
         sender_id: currentUserId,
         receiver_id: Number(userId),
         content: trimmedInput,
         sent_at: new Date().toISOString(),
         ride_id: rideIdNum,
+        pending: true,
       };
       
       setMessages(prev => [...prev, tempMessage]);
       setInput('');
 
       // Send to backend
-      await messagesAPI.sendMessage(
+      const sent = await messagesAPI.sendMessage(
       receiverId, 
       trimmedInput, 
       rideIdNum
     );
 
-      // Reload messages to get the actual message from server
-      loadMessages();
+      // Swap the optimistic message for the one the server stored
+      setMessages(prev => mergeMessages(prev.filter(msg => msg.id !== tempId), [sent]));
     } catch (error) {
       console.error('Error sending message:', error);
       Alert.alert('Error', 'Failed to send message. Please try again.');
       // Remove the optimistic message on error
-      setMessages(prev => prev.filter(msg => msg.id !== Date.now()));
+      setMessages(prev => prev.filter(msg => msg.id !== tempId));
     } finally {
       setSending(false);
     }
@@ -203,7 +266,21 @@ export default function MessagesChatScreen() {
                 </Text>
               </View>
             ) : (
-              messages.map((message, index) => {
+              <>
+              {hasEarlier && (
+                <TouchableOpacity
+                  style={styles.loadEarlierButton}
+                  onPress={loadEarlierMessages}
+                  disabled={loadingEarlier}
+                >
+                  {loadingEarlier ? (
+                    <ActivityIndicator size="small" color="#14B8A6" />
+                  ) : (
+                    <Text style={styles.loadEarlierText}>Load earlier messages</Text>
+                  )}
+                </TouchableOpacity>
+              )}
+              {messages.map((message, index) => {
                 const isMe = isMyMessage(message);
 
                 return (
@@ -253,7 +330,8 @@ export default function MessagesChatScreen() {
                     )}
                   </View>
                 );
-              })
+              })}
+              </>
             )}
           </ScrollView>
         )}
@@ -340,6 +418,17 @@ const styles = StyleSheet.create({
     textAlign: 'center',
   },
   messagesContainer: { flex: 1, paddingHorizontal: 16 },
+  loadEarlierButton: {
+    alignSelf: 'center',
+    paddingHorizontal: 16,
+    paddingVertical: 8,
+    marginBottom: 8,
+  },
+  loadEarlierText: {
+    fontSize: 14,
+    fontFamily: 'Inter-SemiBold',
+    color: '#14B8A6',
+  },
   messageContainer: { flexDirection: 'row', alignItems: 'flex-end', marginVertical: 4 },
   messageLeft: { justifyContent: 'flex-start' },
   messageRight: { justifyContent: 'flex-end', alignSelf: 'flex-end' },
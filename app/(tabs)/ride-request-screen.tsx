@@ -23,13 +23,8 @@ export default function RideRequestScreen() {
       setIsProcessing(true);
       setSelectedAction('accept');
       
-      // Update the request status to 'accepted'
+      // Update the request status to 'accepted' (the backend reserves the seat)
       await ridesAPI.updateRideRequest(parseInt(params.requestId as string), 'accepted');
-      
-      // Decrement available seats by 1
-      await ridesAPI.updateRide(parseInt(params.rideId as string), {
-        seats_available: parseInt(params.seats_available as string) - 1
-      });
       await ridesAPI.createRideHistory(
         parseInt(params.rider_id as string), // Assuming userId is passed in params
       parseInt(params.rideId as string),
@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.database import SessionLocal
+from app.db.crud.messages import record_conversation_message
 from app.db.models.message import Message
 from app.db.models.user import User
 
@@ -66,6 +67,8 @@ def add_sample_messages():
         for msg_data in sample_messages:
             message = Message(**msg_data)
             db.add(message)
+            db.flush()
+            record_conversation_message(db, message)
         
         db.commit()
         print(f"Added {len(sample_messages)} sample messages successfully!")
@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 
 from app.core.database import Base
 from app.core.config import settings
+import app.db.models  # noqa: F401 - register all models for autogenerate
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -32,6 +33,11 @@ target_metadata = Base.metadata
 def get_url():
     return settings.DATABASE_URL
 
+def include_name(name, type_, parent_names):
+    # The SQLite full-text index of messages (migration 0010) lives outside
+    # the models
+    return not (type_ == "table" and name.startswith("messages_fts"))
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = get_url()
@@ -40,6 +46,8 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=url.startswith("sqlite"),
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -58,7 +66,11 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite can only alter tables by copying them
+            render_as_batch=connection.dialect.name == "sqlite",
+            include_name=include_name,
         )
 
         with context.begin_transaction():
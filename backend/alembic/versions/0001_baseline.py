@@ -0,0 +1,167 @@
+"""Baseline schema
+
+Matches the tables previously created by Base.metadata.create_all. Databases
+that were already built that way should be marked as being at this revision
+with `alembic stamp 0001` before running `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('phone', sa.String(), nullable=True),
+        sa.Column('gender', sa.String(), nullable=True),
+        sa.Column('photo_url', sa.Text(), nullable=True),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('is_driver', sa.Boolean(), nullable=False),
+        sa.Column('is_rider', sa.Boolean(), nullable=False),
+        sa.Column('trust_score', sa.Float(), nullable=True),
+        sa.Column('preferences', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_phone', 'users', ['phone'], unique=True)
+
+    op.create_table(
+        'cars',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('make', sa.String(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=True),
+        sa.Column('color', sa.String(), nullable=True),
+        sa.Column('license_plate', sa.String(), nullable=False),
+        sa.Column('seats', sa.Integer(), nullable=False),
+        sa.Column('ac_available', sa.Boolean(), nullable=False),
+        sa.Column('photo_url', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_cars_id', 'cars', ['id'])
+
+    op.create_table(
+        'rides',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('driver_id', sa.Integer(), nullable=False),
+        sa.Column('car_id', sa.Integer(), nullable=False),
+        sa.Column('start_location', sa.String(), nullable=False),
+        sa.Column('end_location', sa.String(), nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('seats_available', sa.Integer(), nullable=False),
+        sa.Column('total_fare', sa.Float(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['car_id'], ['cars.id']),
+        sa.ForeignKeyConstraint(['driver_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_rides_id', 'rides', ['id'])
+
+    op.create_table(
+        'ride_requests',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('rider_id', sa.Integer(), nullable=False),
+        sa.Column('ride_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('requested_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['ride_id'], ['rides.id']),
+        sa.ForeignKeyConstraint(['rider_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ride_requests_id', 'ride_requests', ['id'])
+
+    op.create_table(
+        'messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sender_id', sa.Integer(), nullable=False),
+        sa.Column('receiver_id', sa.Integer(), nullable=False),
+        sa.Column('ride_id', sa.Integer(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['receiver_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['ride_id'], ['rides.id']),
+        sa.ForeignKeyConstraint(['sender_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_messages_id', 'messages', ['id'])
+
+    op.create_table(
+        'preferred_locations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('address', sa.Text(), nullable=False),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_preferred_locations_id', 'preferred_locations', ['id'])
+
+    op.create_table(
+        'schedules',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day_of_week', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.Time(), nullable=True),
+        sa.Column('end_time', sa.Time(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_schedules_id', 'schedules', ['id'])
+
+    op.create_table(
+        'ride_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('ride_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('joined_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('rating_given', sa.Integer(), nullable=True),
+        sa.Column('rating_received', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['ride_id'], ['rides.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ride_history_id', 'ride_history', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ride_history_id', table_name='ride_history')
+    op.drop_table('ride_history')
+    op.drop_index('ix_schedules_id', table_name='schedules')
+    op.drop_table('schedules')
+    op.drop_index('ix_preferred_locations_id', table_name='preferred_locations')
+    op.drop_table('preferred_locations')
+    op.drop_index('ix_messages_id', table_name='messages')
+    op.drop_table('messages')
+    op.drop_index('ix_ride_requests_id', table_name='ride_requests')
+    op.drop_table('ride_requests')
+    op.drop_index('ix_rides_id', table_name='rides')
+    op.drop_table('rides')
+    op.drop_index('ix_cars_id', table_name='cars')
+    op.drop_table('cars')
+    op.drop_index('ix_users_phone', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_table('users')
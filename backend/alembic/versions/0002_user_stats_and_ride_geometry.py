@@ -0,0 +1,64 @@
+"""user_stats rollup and ride coordinates/route
+
+Adds the user_stats table backfilled from rides and ride_history, and the
+origin/destination coordinates and simplified route polyline on rides.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('rides_taken', sa.Integer(), nullable=False),
+        sa.Column('rides_offered', sa.Integer(), nullable=False),
+        sa.Column('rider_rating_sum', sa.Integer(), nullable=False),
+        sa.Column('driver_rating_sum', sa.Integer(), nullable=False),
+        sa.Column('driver_rating_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute("""
+        INSERT INTO user_stats (user_id, rides_taken, rides_offered, rider_rating_sum,
+                                driver_rating_sum, driver_rating_count)
+        SELECT u.id,
+               (SELECT count(*) FROM ride_history h WHERE h.user_id = u.id),
+               (SELECT count(*) FROM rides r WHERE r.driver_id = u.id),
+               (SELECT coalesce(sum(coalesce(h.rating_received, 5)), 0)
+                  FROM ride_history h WHERE h.user_id = u.id),
+               (SELECT coalesce(sum(coalesce(h.rating_given, 5)), 0)
+                  FROM ride_history h JOIN rides r ON r.id = h.ride_id WHERE r.driver_id = u.id),
+               (SELECT count(*)
+                  FROM ride_history h JOIN rides r ON r.id = h.ride_id WHERE r.driver_id = u.id)
+        FROM users u
+    """)
+
+    with op.batch_alter_table('rides') as batch_op:
+        batch_op.add_column(sa.Column('start_latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('start_longitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('end_latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('end_longitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('route_polyline', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('rides') as batch_op:
+        batch_op.drop_column('route_polyline')
+        batch_op.drop_column('end_longitude')
+        batch_op.drop_column('end_latitude')
+        batch_op.drop_column('start_longitude')
+        batch_op.drop_column('start_latitude')
+    op.drop_table('user_stats')
@@ -0,0 +1,47 @@
+"""Composite indexes for the hot query paths
+
+- rides(status, start_time, id): ride feed and its keyset pagination
+- rides(driver_id, status): my-rides, completed rides, driver requests
+- ride_requests(ride_id, rider_id) unique: duplicate-request check
+- ride_requests(ride_id, status): pending/accepted requests of a ride
+- messages(sender_id, receiver_id, sent_at): conversation history
+- ride_history(user_id, completed_at): history screen
+- ride_history(ride_id): history of a ride, rating updates
+
+The unique index fails if ride_requests already holds duplicate
+(ride_id, rider_id) pairs; remove those before upgrading.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_rides_status_start_time_id', 'rides', ['status', 'start_time', 'id'])
+    op.create_index('ix_rides_driver_id_status', 'rides', ['driver_id', 'status'])
+    op.create_index('ux_ride_requests_ride_id_rider_id', 'ride_requests', ['ride_id', 'rider_id'], unique=True)
+    op.create_index('ix_ride_requests_ride_id_status', 'ride_requests', ['ride_id', 'status'])
+    op.create_index('ix_messages_sender_id_receiver_id_sent_at', 'messages', ['sender_id', 'receiver_id', 'sent_at'])
+    op.create_index('ix_ride_history_user_id_completed_at', 'ride_history', ['user_id', 'completed_at'])
+    op.create_index('ix_ride_history_ride_id', 'ride_history', ['ride_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ride_history_ride_id', table_name='ride_history')
+    op.drop_index('ix_ride_history_user_id_completed_at', table_name='ride_history')
+    op.drop_index('ix_messages_sender_id_receiver_id_sent_at', table_name='messages')
+    op.drop_index('ix_ride_requests_ride_id_status', table_name='ride_requests')
+    op.drop_index('ux_ride_requests_ride_id_rider_id', table_name='ride_requests')
+    op.drop_index('ix_rides_driver_id_status', table_name='rides')
+    op.drop_index('ix_rides_status_start_time_id', table_name='rides')
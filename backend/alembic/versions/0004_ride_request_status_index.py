@@ -0,0 +1,27 @@
+"""Index ride_requests(status, requested_at) for the lifecycle sweeper
+
+Lets the sweeper find pending requests without scanning every request
+ever made.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_ride_requests_status_requested_at', 'ride_requests', ['status', 'requested_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ride_requests_status_requested_at', table_name='ride_requests')
@@ -0,0 +1,89 @@
+"""Archive tables for finished rides, their requests and history
+
+rides_archive, ride_requests_archive and ride_history_archive mirror the
+hot tables plus an archived_at column. Rows are moved in batches by
+app.db.crud.archive.archive_finished_rides and keep their original ids.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 12:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rides_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('driver_id', sa.Integer(), nullable=False),
+        sa.Column('car_id', sa.Integer(), nullable=False),
+        sa.Column('start_location', sa.String(), nullable=False),
+        sa.Column('end_location', sa.String(), nullable=False),
+        sa.Column('start_latitude', sa.Float(), nullable=True),
+        sa.Column('start_longitude', sa.Float(), nullable=True),
+        sa.Column('end_latitude', sa.Float(), nullable=True),
+        sa.Column('end_longitude', sa.Float(), nullable=True),
+        sa.Column('route_polyline', sa.JSON(), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('seats_available', sa.Integer(), nullable=False),
+        sa.Column('total_fare', sa.Float(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['car_id'], ['cars.id']),
+        sa.ForeignKeyConstraint(['driver_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_rides_archive_driver_id_status_start_time', 'rides_archive', ['driver_id', 'status', 'start_time'])
+
+    op.create_table(
+        'ride_requests_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('rider_id', sa.Integer(), nullable=False),
+        sa.Column('ride_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('requested_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['ride_id'], ['rides_archive.id']),
+        sa.ForeignKeyConstraint(['rider_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ride_requests_archive_ride_id', 'ride_requests_archive', ['ride_id'])
+
+    op.create_table(
+        'ride_history_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('ride_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('joined_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('rating_given', sa.Integer(), nullable=True),
+        sa.Column('rating_received', sa.Integer(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['ride_id'], ['rides_archive.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ride_history_archive_user_id_completed_at', 'ride_history_archive', ['user_id', 'completed_at'])
+    op.create_index('ix_ride_history_archive_ride_id', 'ride_history_archive', ['ride_id'])
+
+
+def downgrade() -> None:
+    # Archived rows are dropped with their tables, not moved back
+    op.drop_index('ix_ride_history_archive_ride_id', table_name='ride_history_archive')
+    op.drop_index('ix_ride_history_archive_user_id_completed_at', table_name='ride_history_archive')
+    op.drop_table('ride_history_archive')
+    op.drop_index('ix_ride_requests_archive_ride_id', table_name='ride_requests_archive')
+    op.drop_table('ride_requests_archive')
+    op.drop_index('ix_rides_archive_driver_id_status_start_time', table_name='rides_archive')
+    op.drop_table('rides_archive')
@@ -0,0 +1,56 @@
+"""Precomputed commute suggestions
+
+Adds commute_suggestions, read by GET /api/rides/suggestions, and the
+indexes the matcher uses to find users with a nearby saved home and to
+load schedules and locations per user. Fill the table once with
+`python build_commute_suggestions.py`; the write paths keep it current
+afterwards.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 14:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'commute_suggestions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('rider_id', sa.Integer(), nullable=False),
+        sa.Column('driver_id', sa.Integer(), nullable=False),
+        sa.Column('shared_days', sa.JSON(), nullable=False),
+        sa.Column('home_distance_km', sa.Float(), nullable=False),
+        sa.Column('work_distance_km', sa.Float(), nullable=False),
+        sa.Column('time_difference_minutes', sa.Float(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['driver_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['rider_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_commute_suggestions_id', 'commute_suggestions', ['id'])
+    op.create_index('ix_commute_suggestions_rider_id_score', 'commute_suggestions', ['rider_id', 'score'])
+    op.create_index('ix_commute_suggestions_driver_id', 'commute_suggestions', ['driver_id'])
+    op.create_index('ix_preferred_locations_latitude_longitude', 'preferred_locations', ['latitude', 'longitude'])
+    op.create_index('ix_preferred_locations_user_id', 'preferred_locations', ['user_id'])
+    op.create_index('ix_schedules_user_id', 'schedules', ['user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_schedules_user_id', table_name='schedules')
+    op.drop_index('ix_preferred_locations_user_id', table_name='preferred_locations')
+    op.drop_index('ix_preferred_locations_latitude_longitude', table_name='preferred_locations')
+    op.drop_index('ix_commute_suggestions_driver_id', table_name='commute_suggestions')
+    op.drop_index('ix_commute_suggestions_rider_id_score', table_name='commute_suggestions')
+    op.drop_index('ix_commute_suggestions_id', table_name='commute_suggestions')
+    op.drop_table('commute_suggestions')
@@ -0,0 +1,33 @@
+"""Row version columns for conditional GETs
+
+Adds a version counter to rides, users, cars and user_stats. Every write
+path bumps it, and the ETags of the ride, profile and car reads are derived
+from it. rides_archive gets the column too so archived rides keep theirs.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 16:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('rides', 'rides_archive', 'users', 'cars', 'user_stats')
+
+
+def upgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    for table in reversed(VERSIONED_TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version')
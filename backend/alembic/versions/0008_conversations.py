@@ -0,0 +1,70 @@
+"""Conversation summary table
+
+Adds conversations, one row per pair of users with the last message and
+the unread count of each side, so the inbox reads one row per partner
+instead of every message. Rows are backfilled from messages; unread counts
+start at zero because messages had no read state before.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 18:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'conversations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_low_id', sa.Integer(), nullable=False),
+        sa.Column('user_high_id', sa.Integer(), nullable=False),
+        sa.Column('last_message_id', sa.Integer(), nullable=False),
+        sa.Column('last_message_preview', sa.String(length=200), nullable=False),
+        sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_ride_id', sa.Integer(), nullable=True),
+        sa.Column('low_unread_count', sa.Integer(), nullable=False),
+        sa.Column('high_unread_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['last_message_id'], ['messages.id']),
+        sa.ForeignKeyConstraint(['last_ride_id'], ['rides.id']),
+        sa.ForeignKeyConstraint(['user_high_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['user_low_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_conversations_id', 'conversations', ['id'])
+    op.create_index('ux_conversations_user_low_id_user_high_id', 'conversations',
+                    ['user_low_id', 'user_high_id'], unique=True)
+    op.create_index('ix_conversations_user_low_id_last_message_at', 'conversations',
+                    ['user_low_id', 'last_message_at'])
+    op.create_index('ix_conversations_user_high_id_last_message_at', 'conversations',
+                    ['user_high_id', 'last_message_at'])
+    op.execute("""
+        INSERT INTO conversations (user_low_id, user_high_id, last_message_id, last_message_preview,
+                                   last_message_at, last_ride_id, low_unread_count, high_unread_count)
+        SELECT p.user_low_id, p.user_high_id, m.id, substr(m.content, 1, 200),
+               coalesce(m.sent_at, CURRENT_TIMESTAMP), m.ride_id, 0, 0
+        FROM (
+            SELECT CASE WHEN sender_id < receiver_id THEN sender_id ELSE receiver_id END AS user_low_id,
+                   CASE WHEN sender_id < receiver_id THEN receiver_id ELSE sender_id END AS user_high_id,
+                   max(id) AS last_message_id
+            FROM messages
+            GROUP BY 1, 2
+        ) p
+        JOIN messages m ON m.id = p.last_message_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversations_user_high_id_last_message_at', table_name='conversations')
+    op.drop_index('ix_conversations_user_low_id_last_message_at', table_name='conversations')
+    op.drop_index('ux_conversations_user_low_id_user_high_id', table_name='conversations')
+    op.drop_index('ix_conversations_id', table_name='conversations')
+    op.drop_table('conversations')
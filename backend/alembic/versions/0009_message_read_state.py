@@ -0,0 +1,45 @@
+"""Message read state and unread counters
+
+Adds messages.read_at, with a partial index over the unread messages, and
+unread_counts, the per-user total behind the messages badge. Messages sent
+before this revision had no read state and are marked read, and the
+conversation unread counts are reset to match.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 20:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('messages', sa.Column('read_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE messages SET read_at = coalesce(sent_at, CURRENT_TIMESTAMP)")
+    op.execute("UPDATE conversations SET low_unread_count = 0, high_unread_count = 0")
+    op.create_index(
+        'ix_messages_receiver_id_sender_id_unread', 'messages', ['receiver_id', 'sender_id'],
+        sqlite_where=sa.text('read_at IS NULL'), postgresql_where=sa.text('read_at IS NULL')
+    )
+    op.create_table(
+        'unread_counts',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('messages', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('unread_counts')
+    op.drop_index('ix_messages_receiver_id_sender_id_unread', table_name='messages')
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.drop_column('read_at')
@@ -0,0 +1,86 @@
+"""Full-text index over messages
+
+Indexes every message's content together with "u<id>" tokens for its
+sender and receiver, so GET /api/messages/search can intersect the search
+terms with the user's own messages inside the index.
+
+- SQLite: an FTS5 table over a view of messages (external content, so the
+  text is not stored twice), kept in sync by triggers on messages and
+  filled from the existing rows.
+- PostgreSQL: a GIN expression index over the same document as a
+  tsvector. It is built inside the migration's transaction, which blocks
+  writes to messages while it builds.
+
+Neither object is part of the SQLAlchemy models; alembic/env.py skips the
+FTS5 tables when comparing, and expression indexes are not compared.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 23:10:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+SQLITE_PARTICIPANTS = "'u' || {row}.sender_id || ' u' || {row}.receiver_id"
+
+POSTGRESQL_DOCUMENT = (
+    "(to_tsvector('english', content) || "
+    "to_tsvector('simple', 'u' || sender_id::text || ' u' || receiver_id::text))"
+)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(f"CREATE INDEX ix_messages_search ON messages USING gin ({POSTGRESQL_DOCUMENT})")
+        return
+
+    op.execute(f"""
+        CREATE VIEW messages_fts_source AS
+        SELECT id, content, {SQLITE_PARTICIPANTS.format(row='messages')} AS participants FROM messages
+    """)
+    op.execute("""
+        CREATE VIRTUAL TABLE messages_fts USING fts5(
+            content, participants,
+            content='messages_fts_source', content_rowid='id', tokenize='porter unicode61'
+        )
+    """)
+    op.execute(f"""
+        CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, content, participants)
+            VALUES (new.id, new.content, {SQLITE_PARTICIPANTS.format(row='new')});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content, participants)
+            VALUES ('delete', old.id, old.content, {SQLITE_PARTICIPANTS.format(row='old')});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER messages_fts_update AFTER UPDATE OF content, sender_id, receiver_id ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content, participants)
+            VALUES ('delete', old.id, old.content, {SQLITE_PARTICIPANTS.format(row='old')});
+            INSERT INTO messages_fts (rowid, content, participants)
+            VALUES (new.id, new.content, {SQLITE_PARTICIPANTS.format(row='new')});
+        END
+    """)
+    op.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX ix_messages_search")
+        return
+
+    op.execute("DROP TRIGGER messages_fts_update")
+    op.execute("DROP TRIGGER messages_fts_delete")
+    op.execute("DROP TRIGGER messages_fts_insert")
+    op.execute("DROP TABLE messages_fts")
+    op.execute("DROP VIEW messages_fts_source")
@@ -0,0 +1,29 @@
+"""Page message history by id
+
+Conversation history is now ordered and paged by message id, so the
+(sender_id, receiver_id, sent_at) index gives way to one on
+(sender_id, receiver_id, id).
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_messages_sender_id_receiver_id_id', 'messages', ['sender_id', 'receiver_id', 'id'])
+    op.drop_index('ix_messages_sender_id_receiver_id_sent_at', table_name='messages')
+
+
+def downgrade() -> None:
+    op.create_index('ix_messages_sender_id_receiver_id_sent_at', 'messages', ['sender_id', 'receiver_id', 'sent_at'])
+    op.drop_index('ix_messages_sender_id_receiver_id_id', table_name='messages')
@@ -0,0 +1,36 @@
+"""Ride change times for the in-process indexes
+
+Adds rides.updated_at, set on every insert and update, so the geo and
+route indexes can pick up rides that changed since their last sync rather
+than only those with a higher id. rides_archive gets the column too since
+archived rows are copied column for column.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('rides', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('rides_archive', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute(sa.text("UPDATE rides SET updated_at = CURRENT_TIMESTAMP"))
+    op.create_index('ix_rides_updated_at', 'rides', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rides_updated_at', table_name='rides')
+    with op.batch_alter_table('rides_archive') as batch_op:
+        batch_op.drop_column('updated_at')
+    with op.batch_alter_table('rides') as batch_op:
+        batch_op.drop_column('updated_at')
@@ -2,6 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from datetime import timedelta, datetime
+from typing import Optional
+from app.core.cache import read_cache
 from app.services.email_service import send_otp_email  # Import the service
 from app.services.mobile_service import send_otp_mobile  # Import the mobile service
 from app.core.database import get_db
@@ -16,36 +18,92 @@ from app.core.security import (
     store_mobile_otp,
     verify_mobile_otp
 )
-from app.db.crud.user import get_user_by_email, create_user, get_user, get_user_by_phone
-from app.schema.user import AuthMethod, UserRegister, UserLogin, UserCreateEmail, UserCreatePhone, Token, OTPRequest, OTPMobileRequest, OTPVerify, OTPMobileVerify, UserResponse, UserMobileRegister
+from app.db.crud.user import get_user_by_email, create_user, get_user, get_user_by_phone, get_user_snapshot
+from app.db.models.user import User
+from app.schema.user import AuthMethod, CurrentUser, UserRegister, UserLogin, UserCreateEmail, UserCreatePhone, Token, OTPRequest, OTPMobileRequest, OTPVerify, OTPMobileVerify, UserResponse, UserMobileRegister
 from app.core.config import settings
 
 router = APIRouter()
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    token_data = verify_token(credentials.credentials)
+def _find_user(db: Session, identifier: str, auth_method: Optional[str]) -> Optional[User]:
+    if auth_method == AuthMethod.EMAIL:
+        return get_user_by_email(db, email=identifier)
+    if auth_method == AuthMethod.PHONE:
+        return get_user_by_phone(db, phone=identifier)
+    # Fallback for backward compatibility
+    return get_user_by_email(db, email=identifier) or \
+           get_user_by_phone(db, phone=identifier)
+
+def _is_subject(user: CurrentUser, identifier: str, auth_method: Optional[str]) -> bool:
+    if auth_method == AuthMethod.EMAIL:
+        return user.email == identifier
+    if auth_method == AuthMethod.PHONE:
+        return user.phone == identifier
+    return identifier in (user.email, user.phone)
+
+def get_user_from_token(db: Session, token: str) -> Optional[CurrentUser]:
+    """
+    Snapshot of the user the access token was issued to, or None; raises 401
+    for an invalid token.
+
+    The token's subject is mapped to a user id once, then the snapshot is
+    served from the read cache until update_user changes the user, so on a
+    warm cache this runs no query. A user whose email or phone changed no
+    longer matches the cached mapping of the old subject and is looked up
+    again.
+    """
+    token_data = verify_token(token)
     if isinstance(token_data, str):
         # Old format - just email as string
-        user = get_user_by_email(db, email=token_data)
+        identifier, auth_method = token_data, AuthMethod.EMAIL.value
     else:
         # New format - payload dictionary
         identifier = token_data.get("sub")
         auth_method = token_data.get("auth_method")
-        
-        if auth_method == AuthMethod.EMAIL:
-            user = get_user_by_email(db, email=identifier)
-        elif auth_method == AuthMethod.PHONE:
-            user = get_user_by_phone(db, phone=identifier)
-        else:
-            # Fallback for backward compatibility
-            user = get_user_by_email(db, email=identifier) or \
-                   get_user_by_phone(db, phone=identifier)
-    
+    if identifier is None:
+        return None
+
+    found: Optional[User] = None
+
+    def find_user_id() -> Optional[int]:
+        # Holding on to the row lets get_user_snapshot take it from the
+        # session's identity map instead of reading it again
+        nonlocal found
+        found = _find_user(db, identifier, auth_method)
+        return found.id if found else None
+
+    user_id = read_cache.get_or_load(f"token-subject:{auth_method or ''}:{identifier}", [], find_user_id)
+    if user_id is None:
+        return None
+    user = get_user_snapshot(db, user_id)
+    if user is not None and _is_subject(user, identifier, auth_method):
+        return user
+    found = _find_user(db, identifier, auth_method)
+    return CurrentUser.model_validate(found) if found else None
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> CurrentUser:
+    user = get_user_from_token(db, credentials.credentials)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def get_current_user_record(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """The caller's full users row, for endpoints that need more than CurrentUser"""
+    user = get_user(db, current_user.id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -220,5 +278,5 @@ async def verify__mobile_otp_endpoint(request: OTPMobileVerify, db: Session = De
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user = Depends(get_current_user)):
+async def get_current_user_info(current_user = Depends(get_current_user_record)):
     return current_user
\ No newline at end of file
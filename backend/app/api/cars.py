@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.core.database import get_db
+from app.core.etag import etag_matches, not_modified, set_etag
 from app.api.auth import get_current_user
-from app.db.crud.car import get_user_cars, create_car, update_car, delete_car
+from app.db.crud.car import get_user_cars, get_user_cars_etag, get_user_cars_snapshot, create_car, update_car, delete_car
 from app.schema.car import CarCreate, CarUpdate, CarResponse
 
 router = APIRouter()
@@ -12,10 +13,17 @@ router = APIRouter()
 
 @router.get("/", response_model=List[CarResponse])
 async def get_cars(
+    request: Request,
+    response: Response,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return get_user_cars(db, current_user.id)
+    etag = get_user_cars_etag(db, current_user.id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    etag, cars = get_user_cars_snapshot(db, current_user.id)
+    set_etag(response, etag)
+    return cars
 
 
 @router.post("/", response_model=CarResponse)
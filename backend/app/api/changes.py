@@ -0,0 +1,162 @@
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.auth import get_current_user
+from app.core.database import get_db
+from app.db.crud.messages import get_last_message_id, get_received_messages_after
+from app.db.crud.ride_request import get_driver_ride_requests_after, get_last_ride_request_id
+from app.schema.changes import ChangesResponse
+from app.services.event_bus import event_bus
+
+router = APIRouter()
+
+# Events after which the changes may no longer be empty
+WAKE_EVENTS = ("new_message", "new_ride_request")
+
+# Upper bound on a poll's wait, below common proxy idle timeouts
+MAX_WAIT_SECONDS = 55
+
+# Changes of each kind returned by one poll
+CHANGES_LIMIT = 100
+
+# Writes commit within this long of taking their id. On Postgres ids are
+# taken at insert, so a row can commit after one with a higher id; every
+# poll re-reads the ids above the last one written this long ago and skips
+# those the cursor says were already handed out.
+SETTLE_SECONDS = 30
+
+# Upper bound on the handed-out ids a cursor may carry per kind
+MAX_CURSOR_IDS = 10 * CHANGES_LIMIT
+
+# (highest id handed out, ids handed out that are still being re-read)
+Position = Tuple[int, Set[int]]
+
+
+def _encode_cursor(*positions: Position) -> str:
+    raw = ";".join(f"{last_id}:{','.join(map(str, sorted(seen)))}" for last_id, seen in positions)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> List[Position]:
+    """Inverse of _encode_cursor for the two kinds; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        positions = []
+        for part in raw.split(";"):
+            last_id, seen = part.split(":")
+            positions.append((int(last_id), {int(i) for i in seen.split(",") if i}))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if len(positions) != 2 or any(len(seen) > MAX_CURSOR_IDS for _, seen in positions):
+        raise ValueError("Invalid cursor")
+    return positions
+
+
+def _window(position: Position, settled_id: int) -> Tuple[int, Set[int]]:
+    """The id to read above and the handed-out ids above it to skip"""
+    last_id, seen = position
+    floor = min(last_id, settled_id)
+    return floor, {i for i in seen if i > floor}
+
+
+def _advance(position: Position, floor: int, rows) -> Position:
+    last_id, seen = position
+    ids = [row.id for row in rows]
+    return max([last_id, *ids]), {i for i in seen.union(ids) if i > floor}
+
+
+async def _wait_for_change(queue: asyncio.Queue, timeout: float) -> bool:
+    """Wait for one of WAKE_EVENTS on the queue; False when the timeout runs out first"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        try:
+            message = await asyncio.wait_for(queue.get(), remaining)
+        except asyncio.TimeoutError:
+            return False
+        # None: the queue overflowed and events were dropped, so check anyway
+        if message is None or json.loads(message)["type"] in WAKE_EVENTS:
+            return True
+
+
+@router.get("/", response_model=ChangesResponse)
+async def get_changes(
+    cursor: Optional[str] = Query(None),
+    wait: int = Query(25, ge=0, le=MAX_WAIT_SECONDS),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Long-poll alternative to /ws for clients whose network drops WebSockets:
+    messages received and ride requests for the user's rides since the
+    cursor. With nothing new the request is held for up to wait seconds and
+    answered as soon as a new message or request for the user is written; a
+    wait that runs out is answered without touching the database.
+
+    Call first without a cursor to get the current one, then pass back the
+    cursor of every answer.
+    """
+    user_id = current_user.id
+    settled_before = datetime.now(timezone.utc) - timedelta(seconds=SETTLE_SECONDS)
+    settled_message_id = get_last_message_id(db, settled_before)
+    settled_request_id = get_last_ride_request_id(db, settled_before)
+
+    if cursor is None:
+        # Start at the newest rows; the user's rows still being re-read were
+        # written before this answer, so they count as handed out
+        message_position = (get_last_message_id(db), set())
+        request_position = (get_last_ride_request_id(db), set())
+        message_floor, _ = _window(message_position, settled_message_id)
+        request_floor, _ = _window(request_position, settled_request_id)
+        messages = get_received_messages_after(db, user_id, message_floor, (), MAX_CURSOR_IDS)
+        requests = get_driver_ride_requests_after(db, user_id, request_floor, (), MAX_CURSOR_IDS)
+        return ChangesResponse(
+            messages=[],
+            ride_requests=[],
+            cursor=_encode_cursor(
+                (message_position[0], {m.id for m in messages if m.id <= message_position[0]}),
+                (request_position[0], {r.id for r in requests if r.id <= request_position[0]})
+            ),
+            has_more=False
+        )
+
+    try:
+        message_position, request_position = _decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    message_floor, message_seen = _window(message_position, settled_message_id)
+    request_floor, request_seen = _window(request_position, settled_request_id)
+
+    # Subscribed before looking, so a write landing between the look and
+    # the wait still wakes this request
+    queue = event_bus.subscribe(user_id)
+    try:
+        messages = get_received_messages_after(db, user_id, message_floor, message_seen, CHANGES_LIMIT)
+        requests = get_driver_ride_requests_after(db, user_id, request_floor, request_seen, CHANGES_LIMIT)
+        if not messages and not requests and wait > 0:
+            # Hand the pool connection back while parked
+            db.close()
+            if await _wait_for_change(queue, wait):
+                messages = get_received_messages_after(db, user_id, message_floor, message_seen, CHANGES_LIMIT)
+                requests = get_driver_ride_requests_after(db, user_id, request_floor, request_seen, CHANGES_LIMIT)
+    finally:
+        event_bus.unsubscribe(user_id, queue)
+
+    return ChangesResponse(
+        messages=messages,
+        ride_requests=requests,
+        cursor=_encode_cursor(
+            _advance(message_position, message_floor, messages),
+            _advance(request_position, request_floor, requests)
+        ),
+        has_more=len(messages) == CHANGES_LIMIT or len(requests) == CHANGES_LIMIT
+    )
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.core.database import get_db
+from app.core.etag import etag_matches, not_modified, set_etag
 from app.api.auth import get_current_user
-from app.db.crud.location import get_user_locations, create_location
+from app.db.crud.location import get_user_locations_etag, get_user_locations_snapshot, create_location
 from app.schema.location import LocationCreate, LocationResponse
 
 router = APIRouter()
@@ -12,10 +13,17 @@ router = APIRouter()
 
 @router.get("/", response_model=List[LocationResponse])
 async def get_locations(
+    request: Request,
+    response: Response,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return get_user_locations(db, current_user.id)
+    etag = get_user_locations_etag(db, current_user.id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    etag, locations = get_user_locations_snapshot(db, current_user.id)
+    set_etag(response, etag)
+    return locations
 
 
 @router.post("/", response_model=LocationResponse)
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
+from app.core.ndjson import ndjson_response, wants_ndjson
 from app.api.auth import get_current_user
-from app.db.crud.messages import create_message, get_conversation, get_user_conversations
-from app.schema.message import MessageCreate, MessageResponse, ConversationResponse
+from app.db.crud.message_search import SearchIndexMissing, search_messages
+from app.db.crud.messages import create_message, get_conversation, get_unread_count, get_user_conversations, iter_user_conversations, mark_conversation_read
+from app.schema.message import MessageCreate, MessageResponse, ConversationHistoryResponse, ConversationResponse, MarkReadRequest, MarkReadResponse, MessageSearchResult, UnreadCountResponse
+from app.services.message_writer import message_writer
 
 router = APIRouter()
 
@@ -16,21 +19,87 @@ async def send_message(
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    if message_writer.enabled:
+        try:
+            return await message_writer.submit(message, current_user.id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Receiver not found")
     return create_message(db, message, current_user.id)
 
 
 @router.get("/conversations", response_model=List[ConversationResponse])
 async def get_conversations(
+    request: Request,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """Conversations, newest first; streamed as NDJSON with Accept: application/x-ndjson"""
+    if wants_ndjson(request):
+        user_id = current_user.id
+        return ndjson_response(lambda stream_db: iter_user_conversations(stream_db, user_id), ConversationResponse)
     return get_user_conversations(db, current_user.id)
 
 
-@router.get("/{user_id}", response_model=List[MessageResponse])
+@router.get("/search", response_model=List[MessageSearchResult])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Search the user's own messages: every word must match, the last one
+    also as a prefix unless followed by a space. Best matches first, each
+    with a plain text snippet around the matched words and their offsets.
+    """
+    try:
+        return search_messages(db, current_user.id, q, limit)
+    except SearchIndexMissing:
+        raise HTTPException(
+            status_code=503,
+            detail="Message search is unavailable until the database is migrated (alembic upgrade head)"
+        )
+
+
+@router.get("/unread", response_model=UnreadCountResponse)
+async def get_unread_messages(
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Unread messages across all conversations, for the tab badge"""
+    return {"unread_count": get_unread_count(db, current_user.id)}
+
+
+@router.post("/{user_id}/read", response_model=MarkReadResponse)
+async def mark_read(
+    user_id: int,
+    body: MarkReadRequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Mark the messages from a user up to up_to_id as read; the sender gets a
+    messages_read event on /ws
+    """
+    marked = mark_conversation_read(db, current_user.id, user_id, body.up_to_id)
+    return {"marked": marked, "unread_count": get_unread_count(db, current_user.id)}
+
+
+@router.get("/{user_id}", response_model=ConversationHistoryResponse)
 async def get_conversation_with_user(
     user_id: int,
+    limit: int = Query(50, ge=1, le=100),
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return get_conversation(db, current_user.id, user_id)
\ No newline at end of file
+    """
+    Latest page of the conversation with a user, oldest message first. Pass
+    the first message's id as before_id to load earlier messages, or the
+    last one's as after_id to fetch only what arrived since.
+    """
+    try:
+        return get_conversation(db, current_user.id, user_id, limit, before_id, after_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
\ No newline at end of file
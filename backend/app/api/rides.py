@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
+from datetime import datetime
 from app.core.database import get_db
+from app.core.etag import etag_matches, not_modified, set_etag
+from app.core.fast_json import ListSerializer
+from app.core.ndjson import ndjson_response, wants_ndjson
 from app.api.auth import get_current_user
 from app.db.crud.ride import (
     get_available_rides, 
+    get_rides_near,
+    get_rides_along_route,
+    decode_ride_cursor,
     create_ride, 
     get_user_rides, 
     get_ride,
+    get_ride_etag,
+    get_ride_snapshot,
     update_ride,
     get_user_completed_rides
 )
@@ -16,10 +26,15 @@ from app.db.crud.ride_request import (
     get_ride_requests,
     get_user_ride_requests,
     get_driver_ride_requests,
+    iter_driver_ride_requests,
     update_ride_request_status,
+    bulk_update_ride_request_status,
     user_already_requested,
     get_ride_accepted_requests,
-    get_existing_request_time
+    get_existing_request_time,
+    NoSeatsAvailable,
+    ConcurrentUpdate,
+    MAX_BULK_UPDATES
 )
 from app.schema.ride import (
     RideCreate,
@@ -27,34 +42,124 @@ from app.schema.ride import (
     RideUpdate, 
     RideResponse,
     DriverRideResponse,
+    CorridorRideResponse,
+    RideSearchFilters,
     RideRequestCreate,
     RideRequestResponse,
     RideRequestUpdate,
+    RideRequestBulkItem,
+    RideRequestBulkResult,
+    RideAssignmentProposal,
     RideHistoryUpdateRequest,
     RideHistoryCreate,
     RiderHistoryUpdateRequest,
-    CheckRequestResponse
+    CheckRequestResponse,
+    CommuteSuggestionResponse
 )
-from app.db.crud.ride_history import create_ride_history_entry, get_user_ride_history_by_id, get_rider_ride_history, get_ride_history_by_id, complete_ride_history, update_received_rating, get_ride_history_by_ride_id
+from app.db.crud.commute_suggestion import get_commute_suggestions
+from app.db.crud.ride_assignment import propose_ride_assignments
+from app.db.crud.ride_history import create_ride_history_entry, get_user_ride_history_by_id, iter_user_ride_history, get_rider_ride_history, get_ride_history_by_id, complete_ride_history, update_received_rating, update_rating_given, get_ride_history_by_ride_id
 
 router = APIRouter()
 
+ride_list_serializer = ListSerializer(RideResponse)
+ride_request_list_serializer = ListSerializer(RideRequestResponse)
+
 
 @router.get("/", response_model=List[RideResponse])
 async def search_rides(
-    limit: int = Query(50, le=100),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    departs_after: Optional[datetime] = None,
+    departs_before: Optional[datetime] = None,
+    min_seats: Optional[int] = Query(None, ge=1),
+    max_fare: Optional[float] = Query(None, ge=0),
+    ac_available: Optional[bool] = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(5, gt=0, le=100),
+    dest_lat: Optional[float] = Query(None, ge=-90, le=90),
+    dest_lng: Optional[float] = Query(None, ge=-180, le=180),
+    dest_radius_km: float = Query(5, gt=0, le=100),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """
+    Search available rides, ordered by departure time. Pass the X-Next-Cursor
+    response header back as `cursor` to fetch the next page; the header is
+    absent on the last page.
+
+    When lat/lng are given only rides starting within radius_km are returned,
+    nearest first and without paging; dest_lat/dest_lng additionally require
+    the ride to end within dest_radius_km of the destination.
+    """
+    filters = RideSearchFilters(
+        departs_after=departs_after,
+        departs_before=departs_before,
+        min_seats=min_seats,
+        max_fare=max_fare,
+        ac_available=ac_available
+    )
+    after = None
+    if cursor:
+        try:
+            after = decode_ride_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    headers = {}
     try:
-        rides = get_available_rides(db, current_user.id, limit)
-        return rides or []  # Return empty list if no rides found
+        if lat is not None and lng is not None:
+            has_destination = dest_lat is not None and dest_lng is not None
+            rides = get_rides_near(
+                db, current_user.id, lat, lng, radius_km,
+                dest_lat if has_destination else None,
+                dest_lng if has_destination else None,
+                dest_radius_km if has_destination else None,
+                limit, filters
+            )
+        else:
+            rides, next_cursor = get_available_rides(db, current_user.id, limit, filters, after)
+            if next_cursor:
+                headers["X-Next-Cursor"] = next_cursor
+        return ride_list_serializer.response(rides, headers)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching rides: {str(e)}"
         )
 
+@router.get("/along-route", response_model=List[CorridorRideResponse])
+async def search_rides_along_route(
+    pickup_lat: float = Query(..., ge=-90, le=90),
+    pickup_lng: float = Query(..., ge=-180, le=180),
+    drop_lat: float = Query(..., ge=-90, le=90),
+    drop_lng: float = Query(..., ge=-180, le=180),
+    max_distance_m: float = Query(500, gt=0, le=5000),
+    departs_after: Optional[datetime] = None,
+    departs_before: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=100),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Rides whose route passes within max_distance_m of the pickup and later of
+    the drop-off, departing between departs_after and departs_before
+    """
+    matches = get_rides_along_route(
+        db, current_user.id,
+        (pickup_lat, pickup_lng), (drop_lat, drop_lng),
+        max_distance_m, departs_after, departs_before, limit
+    )
+    return [
+        {
+            "pickup_distance_m": round(match.pickup_distance_m, 1),
+            "drop_distance_m": round(match.drop_distance_m, 1),
+            "ride": ride,
+        }
+        for ride, match in matches
+    ]
+
 @router.post("/", response_model=DriverRideResponse)
 async def create_new_ride(
     ride: RideCreate,
@@ -73,10 +178,25 @@ async def get_my_rides(
 
 @router.get("/my-completed-rides", response_model=List[DriverRideResponse])
 async def get_my_rides(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return get_user_completed_rides(db, current_user.id)
+    """
+    Completed rides, newest first. Pass the X-Next-Cursor response header
+    back as `cursor` to fetch the next page; without a limit a page holds
+    every ride not archived yet, and the cursor leads on to the archived
+    ones.
+    """
+    try:
+        rides, next_cursor = get_user_completed_rides(db, current_user.id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rides
 
 @router.get("/my-requests", response_model=List[RideRequestResponse])
 async def get_my_ride_requests(
@@ -87,29 +207,75 @@ async def get_my_ride_requests(
 
 @router.get("/history", response_model=List[RideHistoryResponse])
 async def get_ride_history(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get user's ride history (both as driver and rider)"""
-    return get_user_ride_history_by_id(db, current_user.id)
+    """
+    Get user's ride history (both as driver and rider). Pass the
+    X-Next-Cursor response header back as `cursor` to fetch the next page;
+    without a limit a page holds the whole history not archived yet, and
+    the cursor leads on to the archived history. The NDJSON stream covers
+    the history not archived yet.
+    """
+    if wants_ndjson(request):
+        user_id = current_user.id
+        return ndjson_response(lambda stream_db: iter_user_ride_history(stream_db, user_id), RideHistoryResponse)
+    try:
+        history, next_cursor = get_user_ride_history_by_id(db, current_user.id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return history
 
 @router.get("/driver-requests", response_model=List[RideRequestResponse])
 async def get_driver_ride_requests_endpoint(
+    request: Request,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all ride requests for the driver's rides"""
-    return get_driver_ride_requests(db, current_user.id)
+    if wants_ndjson(request):
+        driver_id = current_user.id
+        return ndjson_response(lambda stream_db: iter_driver_ride_requests(stream_db, driver_id), RideRequestResponse)
+    return ride_request_list_serializer.response(get_driver_ride_requests(db, current_user.id))
+
+@router.get("/suggestions", response_model=List[CommuteSuggestionResponse])
+async def get_commute_suggestions_endpoint(
+    limit: int = Query(20, ge=1, le=100),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Drivers whose weekly schedule and saved Home/Office locations match the
+    user's, best match first. Suggestions are precomputed whenever either
+    side's schedule or locations change.
+    """
+    return get_commute_suggestions(db, current_user.id, limit)
 
 
 @router.get("/{ride_id}", response_model=RideResponse)
 async def get_ride_details(
     ride_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
-    ride = get_ride(db, ride_id)
-    if not ride:
+    etag = get_ride_etag(db, ride_id)
+    if etag is None:
         raise HTTPException(status_code=404, detail="Ride not found")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    snapshot = get_ride_snapshot(db, ride_id)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Ride not found")
+    # The snapshot's own ETag, which may be newer than the one just checked
+    etag, ride = snapshot
+    set_etag(response, etag)
     return ride
 
 
@@ -176,6 +342,17 @@ async def request_ride(
     except HTTPException as http_exc:
         # Re-raise HTTP exceptions we've created
         raise http_exc
+    except IntegrityError:
+        # Lost a race with a concurrent request for the same ride
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "duplicate_request",
+                "message": "You have already requested this ride",
+                "metadata": {"ride_id": request.ride_id}
+            }
+        )
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -238,13 +415,69 @@ async def get_ride_accept_requests(
     return get_ride_accepted_requests(db, ride_id)
 
 
+# A plain def so the solve runs in the threadpool, not on the event loop
+@router.get("/requests/proposals", response_model=List[RideAssignmentProposal])
+def get_ride_request_proposals(
+    departs_after: Optional[datetime] = None,
+    departs_before: Optional[datetime] = None,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Requests on your rides worth accepting, taken from one assignment of all
+    pending requests on rides departing in the window (default: the next two
+    hours). Riders are seated once, seats are not
+    overbooked and cheaper detours and better time fits win. The solution
+    of a window is shared by all its drivers for a minute. Accept them
+    with PUT /requests/bulk.
+    """
+    try:
+        return propose_ride_assignments(db, departs_after, departs_before, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Declared before /requests/{request_id} so "bulk" is not parsed as an id
+@router.put("/requests/bulk", response_model=List[RideRequestBulkResult])
+async def bulk_update_ride_requests(
+    updates: List[RideRequestBulkItem],
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Accept/reject many requests on the current driver's rides in one transaction"""
+    if len(updates) > MAX_BULK_UPDATES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_UPDATES} updates per call")
+    try:
+        return bulk_update_ride_request_status(
+            db, current_user.id, [(item.request_id, item.status) for item in updates]
+        )
+    except ConcurrentUpdate:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "code": "concurrent_update",
+                "message": "The requests changed while updating, please retry"
+            }
+        )
+
+
 @router.put("/requests/{request_id}", response_model=RideRequestResponse)
 async def update_ride_request(
     request_id: int,
     request_update: RideRequestUpdate,
+    current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    updated_request = update_ride_request_status(db, request_id, request_update.status)
+    """Accept, reject or reset a request on one of the current driver's rides"""
+    try:
+        updated_request = update_ride_request_status(db, request_id, request_update.status, current_user.id)
+    except NoSeatsAvailable:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "code": "ride_full",
+                "message": "No seats left on this ride"
+            }
+        )
     if not updated_request:
         raise HTTPException(status_code=404, detail="Request not found")
     return updated_request
@@ -322,8 +555,6 @@ async def update_rider_ride_history(
         raise HTTPException(status_code=403, detail="Not authorized to update this ride history")
 
     if update_data.rating_given is not None:
-        db_history.rating_given = update_data.rating_given
+        db_history = update_rating_given(db, history_id, update_data.rating_given)
 
-    db.commit()
-    db.refresh(db_history)
     return db_history
\ No newline at end of file
@@ -1,17 +1,16 @@
 import json
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
 from typing import List
 
 from app.core.database import get_db
-from app.api.auth import get_current_user
-from app.db.crud.user import update_user
+from app.core.etag import etag_matches, not_modified, set_etag
+from app.api.auth import get_current_user, get_current_user_record
+from app.db.crud.user import update_user, get_user_profile_etag, user_profile_etag
 from app.db.crud.schedule import get_user_schedule, create_schedule
+from app.db.crud.user_stats import get_user_stats
 from app.schema.user import UserUpdate, UserResponse, UserPreferences, PublicUserProfile, ProfileResponse, GenderPreference, MusicPreference, ConversationPreference, SmokingPreference
 from app.schema.schedule import ScheduleCreate, ScheduleResponse
-from app.db.models.ride import Ride
-from app.db.models.ride_history import RideHistory
 from app.db.models.user import User
 
 router = APIRouter()
@@ -31,30 +30,8 @@ async def get_preference_options():
 
 
 @router.get("/profile", response_model=ProfileResponse)
-async def get_profile(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Count rides taken (where user is passenger)
-    rides_taken = db.query(RideHistory).filter(
-        RideHistory.user_id == current_user.id
-    ).count()
-    
-    # Count rides offered (where user is driver)
-    rides_offered = db.query(Ride).filter(
-        Ride.driver_id == current_user.id
-    ).count()
-
-    driver_rating = round(db.query(
-        func.avg(func.coalesce(RideHistory.rating_given, 5))
-    ).join(
-        Ride, RideHistory.ride_id == Ride.id
-    ).filter(
-        Ride.driver_id == current_user.id
-    ).scalar() or 0, 1) if rides_offered > 0 else 0
-
-    rider_rating = round(db.query(
-        func.avg(func.coalesce(RideHistory.rating_received, 5))
-    ).filter(
-        RideHistory.user_id == current_user.id
-    ).scalar() or 0, 1) if rides_taken > 0 else 0
+async def get_profile(current_user: User = Depends(get_current_user_record), db: Session = Depends(get_db)):
+    stats = get_user_stats(db, current_user.id)
     
     profile_data = {
         "id": current_user.id,
@@ -67,11 +44,11 @@ async def get_profile(current_user: User = Depends(get_current_user), db: Sessio
         "is_driver": current_user.is_driver,
         "is_rider": current_user.is_rider,
         # include all other fields you need
-        "rides_taken": rides_taken,
-        "rides_offered": rides_offered,
+        "rides_taken": stats.rides_taken if stats else 0,
+        "rides_offered": stats.rides_offered if stats else 0,
         "preferences": current_user.preferences,
-        "driver_rating": driver_rating,
-        "rider_rating": rider_rating
+        "driver_rating": stats.driver_rating if stats else 0,
+        "rider_rating": stats.rider_rating if stats else 0
     }
     
     return profile_data
@@ -111,41 +88,28 @@ async def create_user_schedule(
     return create_schedule(db, schedule.dict(), current_user.id)
 
 @router.get("/profile/{user_id}", response_model=PublicUserProfile)
-async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
+async def get_user_profile(user_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    etag = get_user_profile_etag(db, user_id)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     user = db.query(User).filter(User.id == user_id).first()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    rides_taken = db.query(RideHistory).filter(
-        RideHistory.user_id == user_id
-    ).count()
-
-    rides_offered = db.query(Ride).filter(
-        Ride.driver_id == user_id
-    ).count()
-
-    rider_rating = round(db.query(
-        func.avg(func.coalesce(RideHistory.rating_received, 5))
-    ).filter(
-        RideHistory.user_id == user_id
-    ).scalar() or 0, 1) if rides_taken > 0 else 0
-
-    driver_rating = round(db.query(
-        func.avg(func.coalesce(RideHistory.rating_given, 5))
-    ).join(
-        Ride, RideHistory.ride_id == Ride.id
-    ).filter(
-        Ride.driver_id == user_id
-    ).scalar() or 0, 1) if rides_offered > 0 else 0
+    stats = get_user_stats(db, user_id)
+    set_etag(response, user_profile_etag(user, stats))
 
     return {
         "id": user.id,
         "name": user.name,
         "bio": user.bio,
         "photo_url": user.photo_url,
-        "rides_taken": rides_taken,
-        "rides_offered": rides_offered,
-        "rider_rating": rider_rating,
-        "driver_rating": driver_rating,
+        "rides_taken": stats.rides_taken if stats else 0,
+        "rides_offered": stats.rides_offered if stats else 0,
+        "rider_rating": stats.rider_rating if stats else 0,
+        "driver_rating": stats.driver_rating if stats else 0,
     }
\ No newline at end of file
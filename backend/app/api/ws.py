@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, WebSocket, status
+
+from app.api.auth import get_user_from_token
+from app.core.database import SessionLocal
+from app.services.event_bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _authenticate(token: Optional[str]) -> Optional[int]:
+    if not token:
+        return None
+    # A short session of its own: holding one for the lifetime of the
+    # connection would tie up a pool connection per idle client
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(db, token)
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+    return user.id if user else None
+
+async def _forward(websocket: WebSocket, queue: asyncio.Queue) -> None:
+    while True:
+        message = await queue.get()
+        if message is None:
+            # Fell too far behind; the client reconnects and refetches
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return
+        await websocket.send_text(message)
+
+
+@router.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Push channel for the app: after connecting with ?token=<access token> the
+    client receives {"type", "payload"} messages for new_message,
+    new_ride_request, ride_request_accepted, ride_request_rejected,
+    ride_status_changed, new_ride_available and messages_read. Messages
+    from the client are only keep-alive pings and are ignored.
+    """
+    user_id = _authenticate(token)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    queue = event_bus.subscribe(user_id)
+    sender = asyncio.create_task(_forward(websocket, queue))
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        event_bus.unsubscribe(user_id, queue)
+        sender.cancel()
+        try:
+            await sender
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.debug("WebSocket send failed for user %s", user_id, exc_info=True)
@@ -0,0 +1,265 @@
+"""
+Read-through cache for CRUD lookups.
+
+Entries are pickled snapshots (pydantic response models, never ORM objects)
+stored together with the versions of the entity tags they were built from,
+e.g. ("cars", 12). CRUD writes record the tags they touch with invalidate();
+the versions are bumped once the session's outermost transaction commits,
+and an entry whose recorded versions no longer match is treated as a miss,
+so a stale snapshot is never served. Versions are read before the loader
+runs, which means a write that commits while an entry is being built makes
+that entry stale rather than wrongly current.
+
+The in-process backend is per worker. Deployments running more than one
+worker must use the Redis backend so every worker sees the same versions;
+check_worker_count refuses to start otherwise.
+"""
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Tag = Tuple[str, Any]
+
+_PENDING_TAGS = "read_cache_tags"
+
+# Tag versions the memory backend keeps per cache entry it may hold; an
+# entry depends on at most a handful of tags
+VERSIONS_PER_ENTRY = 4
+
+
+def _tag_key(tag: Tag) -> str:
+    return f"{tag[0]}:{tag[1]}"
+
+
+class MemoryCacheBackend:
+    """
+    LRU + TTL store bounded by entry count and total payload bytes.
+
+    Tag versions come from one clock, so a version is never handed out
+    twice, and are kept in bump order up to VERSIONS_PER_ENTRY per entry.
+    Past that the least recently bumped half is forgotten, and a tag without
+    a version reads as the newest forgotten one: at least any version those
+    tags had, so an entry built before their last bump stays stale.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_versions = max(max_entries * VERSIONS_PER_ENTRY, 2)
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._clock = 0
+        self._forgotten_version = 0
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, payload = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= len(payload)
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key: str, payload: bytes, ttl_seconds: int) -> None:
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[key] = (time.monotonic() + ttl_seconds, payload)
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def versions(self, tag_keys: List[str]) -> List[int]:
+        with self._lock:
+            return [self._versions.get(tag_key, self._forgotten_version) for tag_key in tag_keys]
+
+    def bump(self, tag_keys: Iterable[str]) -> None:
+        with self._lock:
+            for tag_key in tag_keys:
+                self._clock += 1
+                self._versions[tag_key] = self._clock
+                self._versions.move_to_end(tag_key)
+            if len(self._versions) > self.max_versions:
+                while len(self._versions) > self.max_versions // 2:
+                    _, self._forgotten_version = self._versions.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "versions": len(self._versions)
+        }
+
+
+class RedisCacheBackend:
+    """
+    Shared store on REDIS_URL. Entries expire by TTL and memory is bounded by
+    the server's maxmemory; use a volatile-* eviction policy so the version
+    keys, which carry no TTL, are never evicted.
+    """
+
+    def __init__(self, url: str, prefix: str = "crud-cache"):
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(f"{self._prefix}:e:{key}")
+
+    def set(self, key: str, payload: bytes, ttl_seconds: int) -> None:
+        self._client.set(f"{self._prefix}:e:{key}", payload, ex=ttl_seconds)
+
+    def versions(self, tag_keys: List[str]) -> List[int]:
+        if not tag_keys:
+            return []
+        values = self._client.mget([f"{self._prefix}:v:{tag_key}" for tag_key in tag_keys])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tag_keys: Iterable[str]) -> None:
+        pipe = self._client.pipeline(transaction=False)
+        for tag_key in tag_keys:
+            pipe.incr(f"{self._prefix}:v:{tag_key}")
+        pipe.execute()
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(f"{self._prefix}:e:*"))
+        if keys:
+            self._client.delete(*keys)
+
+    def info(self) -> Dict[str, int]:
+        return {}
+
+
+class ReadCache:
+    def __init__(self, backend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: str, tags: List[Tag], loader: Callable[[], Any]) -> Any:
+        """
+        Cached value for key if it was built from the current versions of
+        tags, otherwise loader() (stored unless it returns None)
+        """
+        if self.backend is None:
+            return loader()
+
+        tag_keys = [_tag_key(tag) for tag in tags]
+        try:
+            payload = self.backend.get(key)
+            current = self.backend.versions(tag_keys)
+        except redis.RedisError:
+            logger.exception("Read cache lookup failed for %s", key)
+            self._count("misses")
+            return loader()
+
+        if payload is not None:
+            versions, value = pickle.loads(payload)
+            if versions == current:
+                self._count("hits")
+                return value
+            self._count("stale")
+        self._count("misses")
+
+        value = loader()
+        if value is not None:
+            try:
+                self.backend.set(key, pickle.dumps((current, value), pickle.HIGHEST_PROTOCOL), self.ttl_seconds)
+            except redis.RedisError:
+                logger.exception("Read cache store failed for %s", key)
+        return value
+
+    def bump(self, tags: Iterable[Tag]) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.bump(sorted({_tag_key(tag) for tag in tags}))
+        except redis.RedisError:
+            # Entries for these tags stay visible until their TTL runs out
+            logger.exception("Read cache invalidation failed")
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        backend = settings.CRUD_CACHE_BACKEND if self.backend is not None else "off"
+        info = self.backend.info() if self.backend is not None else {}
+        return {"backend": backend, "hits": self.hits, "misses": self.misses, "stale": self.stale, **info}
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def invalidate(db: Session, *tags: Tag) -> None:
+    """Bump the versions of tags once db's current transaction commits"""
+    db.info.setdefault(_PENDING_TAGS, set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_tags(session: Session) -> None:
+    # Savepoint releases fire after_commit too; wait for the outermost commit
+    if session.in_nested_transaction():
+        return
+    tags = session.info.pop(_PENDING_TAGS, None)
+    if tags:
+        read_cache.bump(tags)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back_tags(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_TAGS, None)
+
+
+def check_worker_count(workers: int) -> None:
+    """Raise when the per-process memory backend would run under more than one worker"""
+    if workers > 1 and settings.CRUD_CACHE_BACKEND == "memory":
+        raise RuntimeError(
+            f"CRUD_CACHE_BACKEND=memory cannot be invalidated across {workers} workers; "
+            "set CRUD_CACHE_BACKEND=redis (or off)"
+        )
+
+
+def _make_backend():
+    check_worker_count(settings.WEB_CONCURRENCY)
+    if settings.CRUD_CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.REDIS_URL)
+    if settings.CRUD_CACHE_BACKEND == "memory":
+        return MemoryCacheBackend(settings.CRUD_CACHE_MAX_ENTRIES, settings.CRUD_CACHE_MAX_BYTES)
+    return None
+
+
+read_cache = ReadCache(_make_backend(), settings.CRUD_CACHE_TTL_SECONDS)
@@ -12,15 +12,65 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    # Create missing tables on startup instead of running `alembic upgrade head`.
+    # Only meant for throwaway local databases.
+    DB_CREATE_ALL: bool = False
     
     # Security
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 300
+    # Access tokens whose signature was checked, kept until they expire so
+    # repeat requests skip the JWT decode (0 turns it off)
+    TOKEN_CACHE_MAX_ENTRIES: int = 10_000
     
     # Redis
     REDIS_URL: str
-    
+
+    # Worker processes; gunicorn and uvicorn --workers default to this
+    # variable, and gunicorn's own -w is checked by its worker class too
+    WEB_CONCURRENCY: int = 1
+
+    # Read cache for CRUD lookups: "memory" (per process), "redis" (shared
+    # through REDIS_URL, required with more than one worker) or "off".
+    # Startup fails with "memory" and more than one worker.
+    CRUD_CACHE_BACKEND: str = "memory"
+    CRUD_CACHE_TTL_SECONDS: int = 300
+    CRUD_CACHE_MAX_ENTRIES: int = 10_000
+    CRUD_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Background sweeper that expires rides which departed without being
+    # completed and pending requests nobody answered
+    LIFECYCLE_SWEEP_ENABLED: bool = True
+    LIFECYCLE_SWEEP_INTERVAL_SECONDS: int = 300
+    LIFECYCLE_SWEEP_BATCH_SIZE: int = 500
+    RIDE_EXPIRY_GRACE_HOURS: int = 6
+    PENDING_REQUEST_TTL_HOURS: int = 48
+    # The same sweeper moves finished rides that departed more than this many
+    # days ago, with their requests and history, to the archive tables
+    # (0 turns archiving off)
+    ARCHIVE_AFTER_DAYS: int = 180
+    ARCHIVE_BATCH_SIZE: int = 200
+
+    # Events waiting to be sent on one /ws connection; a client that falls
+    # this far behind is disconnected and has to reconnect
+    WEBSOCKET_QUEUE_SIZE: int = 100
+    # How /ws events reach the other workers: "memory" (this worker only) or
+    # "redis" (pub/sub on EVENT_CHANNEL of REDIS_URL, required with more than
+    # one worker)
+    EVENT_BROKER: str = "memory"
+    EVENT_CHANNEL: str = "commute-events"
+    # Collect events for this many milliseconds and publish them together,
+    # keeping only the latest update per ride or request (0 sends each event
+    # right away)
+    EVENT_BATCH_MS: int = 0
+
+    # Group commit for sent messages: wait this many milliseconds for more
+    # messages and write them in one transaction, up to MAX_BATCH at a time
+    # (0 writes every message in its own transaction)
+    MESSAGE_GROUP_COMMIT_MS: int = 0
+    MESSAGE_GROUP_COMMIT_MAX_BATCH: int = 500
+
   # --------------------------
     # Email Configuration
     # --------------------------
@@ -0,0 +1,45 @@
+"""
+Conditional GET support.
+
+ETags are derived from the version columns of the rows a response is built
+from, never from the response body, so an unchanged resource is answered
+with a 304 after a single version lookup and without loading or serializing
+anything. The tags are weak because they identify the data, not the exact
+bytes of the JSON.
+"""
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+# Bump whenever the shape of a versioned response changes, so clients holding
+# an ETag from before the deploy fetch the new shape
+RESPONSE_FORMAT = 1
+
+# Clients may keep the response but must revalidate it before every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(repr((RESPONSE_FORMAT,) + parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match covers etag, compared weakly"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
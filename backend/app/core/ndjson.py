@@ -0,0 +1,46 @@
+from typing import Any, Callable, Iterable, Type
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Serialized lines are sent in chunks of roughly this many bytes
+CHUNK_BYTES = 16 * 1024
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(rows: Callable[[Session], Iterable[Any]], schema: Type[BaseModel]) -> StreamingResponse:
+    """
+    Stream rows(db) as newline-delimited JSON, one schema object per line.
+
+    The generator opens its own session because the request's session may be
+    closed before the body is sent. rows should pull from the database in
+    batches (Query.yield_per) so memory stays flat with the result size.
+    """
+    def lines():
+        db = SessionLocal()
+        try:
+            chunk = []
+            size = 0
+            for row in rows(db):
+                line = schema.model_validate(row).model_dump_json() + "\n"
+                chunk.append(line)
+                size += len(line)
+                if size >= CHUNK_BYTES:
+                    yield "".join(chunk)
+                    chunk = []
+                    size = 0
+            if chunk:
+                yield "".join(chunk)
+        finally:
+            db.close()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
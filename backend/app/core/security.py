@@ -1,11 +1,14 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.core.config import settings
 import random
 import string
+import threading
+import time
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -29,17 +32,48 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+# Payloads of tokens with a verified signature, least recently used first
+_verified_tokens: "OrderedDict[str, Dict]" = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+
+
+def _cached_payload(token: str) -> Optional[Dict]:
+    with _verified_tokens_lock:
+        payload = _verified_tokens.get(token)
+        if payload is None:
+            return None
+        if "exp" in payload and payload["exp"] <= time.time():
+            # Expired: let jwt.decode reject it
+            del _verified_tokens[token]
+            return None
+        _verified_tokens.move_to_end(token)
+        return payload
+
+
+def _cache_payload(token: str, payload: Dict) -> None:
+    if settings.TOKEN_CACHE_MAX_ENTRIES <= 0:
+        return
+    with _verified_tokens_lock:
+        _verified_tokens[token] = payload
+        while len(_verified_tokens) > settings.TOKEN_CACHE_MAX_ENTRIES:
+            _verified_tokens.popitem(last=False)
+
+
 def verify_token(token: str):
+    payload = _cached_payload(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        # Return the entire payload, not just email
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    _cache_payload(token, payload)
+    # Return the entire payload, not just email
+    return payload
 
 
 def generate_otp() -> str:
@@ -0,0 +1,20 @@
+"""
+Gunicorn worker class for production:
+
+    gunicorn app.main:app -w 4 -k app.core.uvicorn_worker.UvicornWorker
+"""
+from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+
+
+class UvicornWorker(BaseUvicornWorker):
+    # permessage-deflate keeps a zlib compressor and decompressor per /ws
+    # connection, most of what an idle connection costs, and the events are
+    # small JSON objects that barely compress
+    CONFIG_KWARGS = {**BaseUvicornWorker.CONFIG_KWARGS, "ws_per_message_deflate": False}
+
+    def init_process(self) -> None:
+        # Checked before the app loads, so gunicorn halts on a boot error
+        # instead of serving stale reads from per-worker caches
+        from app.core.cache import check_worker_count
+        check_worker_count(self.cfg.workers)
+        super().init_process()
@@ -0,0 +1,140 @@
+from sqlalchemy.orm import Session, Query
+from sqlalchemy import and_, delete, exists, insert, or_, select
+from typing import List, Optional, Tuple
+from datetime import datetime
+from app.core.cache import invalidate
+from app.db.models.archive import RideArchive, RideHistoryArchive, RideRequestArchive
+from app.db.models.message import Message
+from app.db.models.ride import Ride
+from app.db.models.ride_history import RideHistory
+from app.db.models.ride_request import RideRequest
+import base64
+
+# Ride statuses that never change again and can be moved to the archive
+ARCHIVABLE_RIDE_STATUSES = ("end", "expired")
+
+
+def _copy_rows(db: Session, hot_model, archive_model, condition) -> None:
+    columns = [column.name for column in hot_model.__table__.columns]
+    db.execute(
+        insert(archive_model).from_select(
+            columns, select(*[hot_model.__table__.c[name] for name in columns]).where(condition)
+        )
+    )
+
+def archive_finished_rides(db: Session, departed_before: datetime, batch_size: int) -> int:
+    """
+    Move up to batch_size finished rides that departed before the cutoff,
+    with their requests and history, to the archive tables and commit.
+    Returns the number of rides archived.
+
+    Every batch is a single transaction and rows are picked by their state,
+    so an interrupted run simply continues with the next call. Rides still
+    referenced by messages stay in the hot tables.
+    """
+    ride_ids = [ride_id for (ride_id,) in db.query(Ride.id).filter(
+        Ride.status.in_(ARCHIVABLE_RIDE_STATUSES),
+        Ride.start_time < departed_before,
+        ~exists().where(Message.ride_id == Ride.id)
+    ).order_by(Ride.start_time, Ride.id).limit(batch_size).with_for_update(skip_locked=True)]
+    if not ride_ids:
+        return 0
+
+    # The locked rides keep new requests, history rows and messages from
+    # being attached to them between the copy and the delete
+    _copy_rows(db, Ride, RideArchive, Ride.id.in_(ride_ids))
+    _copy_rows(db, RideRequest, RideRequestArchive, RideRequest.ride_id.in_(ride_ids))
+    _copy_rows(db, RideHistory, RideHistoryArchive, RideHistory.ride_id.in_(ride_ids))
+    db.execute(delete(RideHistory).where(RideHistory.ride_id.in_(ride_ids)).execution_options(synchronize_session=False))
+    db.execute(delete(RideRequest).where(RideRequest.ride_id.in_(ride_ids)).execution_options(synchronize_session=False))
+    db.execute(delete(Ride).where(Ride.id.in_(ride_ids)).execution_options(synchronize_session=False))
+    invalidate(db, *[("ride", ride_id) for ride_id in ride_ids])
+    db.commit()
+    return len(ride_ids)
+
+
+# Position in a tiered listing: the tier and the (sort value, id) of the
+# last row returned from it, or None at the start of the tier
+TierCursor = Tuple[str, Optional[Tuple[Optional[datetime], int]]]
+
+
+def encode_tier_cursor(tier: str, key: Optional[Tuple[Optional[datetime], int]] = None) -> str:
+    if key is None:
+        raw = f"{tier}||"
+    else:
+        sort_value, row_id = key
+        raw = f"{tier}|{sort_value.isoformat() if sort_value is not None else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_tier_cursor(cursor: str) -> TierCursor:
+    """Inverse of encode_tier_cursor; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        tier, sort_value, row_id = raw.split("|")
+        key = None
+        if row_id:
+            key = (datetime.fromisoformat(sort_value) if sort_value else None, int(row_id))
+        elif sort_value:
+            raise ValueError("Invalid cursor")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if tier not in ("hot", "archive"):
+        raise ValueError("Invalid cursor")
+    return tier, key
+
+def _tier_page(query: Query, sort_key: str, key, limit: Optional[int]) -> Tuple[List, bool]:
+    """
+    Rows of one tier after key in (sort_key desc nulls first, id desc)
+    order, and whether more follow
+    """
+    model = query.column_descriptions[0]["entity"]
+    sort_column, id_column = getattr(model, sort_key), model.id
+    if key is not None:
+        sort_value, row_id = key
+        if sort_value is None:
+            query = query.filter(or_(sort_column.isnot(None), id_column < row_id))
+        else:
+            query = query.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id)
+            ))
+    query = query.order_by(None).order_by(sort_column.desc().nullsfirst(), id_column.desc())
+    if limit is None:
+        return query.all(), False
+    rows = query.limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+def _row_key(row, sort_key: str) -> Tuple[Optional[datetime], int]:
+    return getattr(row, sort_key), row.id
+
+def page_hot_then_archive(
+    hot_query: Query,
+    archive_query: Query,
+    sort_key: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Tuple[List, Optional[str]]:
+    """
+    One page of hot rows, newest sort_key first, and the cursor of the next
+    page. Once the hot rows are exhausted the cursor leads into the archive,
+    which is only read when a caller follows it, and is None after the last
+    archived row. Without a limit the rest of the current tier is returned
+    in one go, so a plain call never touches the archive.
+
+    Each tier is paged by a (sort_key, id) keyset, so a page costs the same
+    however deep it is and rows moved to the archive by the sweeper between
+    pages are never skipped; one already seen in the hot tier can show up
+    again in the archive.
+    """
+    tier, key = decode_tier_cursor(cursor) if cursor else ("hot", None)
+    if tier == "hot":
+        rows, more = _tier_page(hot_query, sort_key, key, limit)
+        if more:
+            return rows, encode_tier_cursor("hot", _row_key(rows[-1], sort_key))
+        if limit is None or len(rows) == limit:
+            return rows, encode_tier_cursor("archive")
+        archived, more = _tier_page(archive_query, sort_key, None, limit - len(rows))
+        rows += archived
+    else:
+        rows, more = _tier_page(archive_query, sort_key, key, limit)
+    return rows, encode_tier_cursor("archive", _row_key(rows[-1], sort_key)) if more else None
@@ -1,14 +1,37 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from app.core.cache import invalidate, read_cache
+from app.core.etag import make_etag
 from app.db.models.car import Car
-from app.schema.car import CarCreate, CarUpdate
+from app.schema.car import CarCreate, CarUpdate, CarResponse
 
-def get_user_cars(db: Session, user_id: int) -> List[Car]:
-    return db.query(Car).filter(Car.user_id == user_id).all()
+def _cars_etag(user_id: int, versions: List[Tuple[int, int]]) -> str:
+    return make_etag("cars", user_id, *sorted(versions))
+
+def _load_user_cars_snapshot(db: Session, user_id: int) -> Tuple[str, List[CarResponse]]:
+    cars = db.query(Car).filter(Car.user_id == user_id).all()
+    etag = _cars_etag(user_id, [(car.id, car.version) for car in cars])
+    return etag, [CarResponse.model_validate(car) for car in cars]
+
+def get_user_cars_snapshot(db: Session, user_id: int) -> Tuple[str, List[CarResponse]]:
+    """Cached list of the user's cars and the ETag of the row versions it was built from"""
+    return read_cache.get_or_load(
+        f"user-cars-snapshot:{user_id}",
+        [("cars", user_id)],
+        lambda: _load_user_cars_snapshot(db, user_id)
+    )
+
+def get_user_cars(db: Session, user_id: int) -> List[CarResponse]:
+    return get_user_cars_snapshot(db, user_id)[1]
+
+def get_user_cars_etag(db: Session, user_id: int) -> str:
+    """Current ETag of get_user_cars_snapshot from the (id, version) pairs alone"""
+    return _cars_etag(user_id, [tuple(row) for row in db.query(Car.id, Car.version).filter(Car.user_id == user_id)])
 
 def create_car(db: Session, car: CarCreate, user_id: int) -> Car:
     db_car = Car(**car.dict(), user_id=user_id)
     db.add(db_car)
+    invalidate(db, ("cars", user_id))
     db.commit()
     db.refresh(db_car)
     return db_car
@@ -19,6 +42,8 @@ def update_car(db: Session, car_id: int, car_update: CarUpdate, user_id: int) ->
         return None
     for field, value in car_update.dict(exclude_unset=True).items():
         setattr(db_car, field, value)
+    db_car.version = Car.version + 1
+    invalidate(db, ("cars", user_id), ("car", car_id))
     db.commit()
     db.refresh(db_car)
     return db_car
@@ -28,5 +53,6 @@ def delete_car(db: Session, car_id: int, user_id: int) -> bool:
     if not db_car:
         return False
     db.delete(db_car)
+    invalidate(db, ("cars", user_id), ("car", car_id))
     db.commit()
-    return True
\ No newline at end of file
+    return True
@@ -0,0 +1,130 @@
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, or_
+from typing import Dict, Iterable, List
+import math
+from app.db.models.commute_suggestion import CommuteSuggestion
+from app.db.models.location import PreferredLocation
+from app.db.models.schedule import Schedule
+from app.db.models.user import User
+from app.services.commute_matcher import (
+    HOME_NAMES,
+    MATCH_RADIUS_KM,
+    WORK_NAMES,
+    CommuteProfile,
+    match_commutes,
+)
+from app.services.geo_index import KM_PER_DEGREE_LAT
+
+
+def load_commute_profiles(db: Session, user_ids: Iterable[int]) -> Dict[int, CommuteProfile]:
+    """Commute profiles of the given users that have both a home and a work location"""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    places: Dict[int, Dict[str, tuple]] = {}
+    locations = db.query(PreferredLocation).filter(
+        PreferredLocation.user_id.in_(user_ids),
+        PreferredLocation.latitude.isnot(None),
+        PreferredLocation.longitude.isnot(None)
+    ).order_by(PreferredLocation.id)
+    for location in locations:
+        name = location.name.strip().lower()
+        kind = "home" if name in HOME_NAMES else "work" if name in WORK_NAMES else None
+        if kind:
+            # The most recently saved one wins
+            places.setdefault(location.user_id, {})[kind] = (location.latitude, location.longitude)
+
+    profiles = {}
+    for user_id, is_driver in db.query(User.id, User.is_driver).filter(User.id.in_(list(places))):
+        home, work = places[user_id].get("home"), places[user_id].get("work")
+        if home and work:
+            profiles[user_id] = CommuteProfile(user_id=user_id, is_driver=bool(is_driver), home=home, work=work)
+    if profiles:
+        for schedule in db.query(Schedule).filter(Schedule.user_id.in_(list(profiles))):
+            profiles[schedule.user_id].schedule.setdefault(schedule.day_of_week, []).append(
+                (schedule.start_time, schedule.end_time)
+            )
+    return profiles
+
+def _users_with_home_near(db: Session, lat: float, lng: float, radius_km: float) -> List[int]:
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    lng_delta = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+    rows = db.query(PreferredLocation.user_id).filter(
+        PreferredLocation.latitude.between(lat - lat_delta, lat + lat_delta),
+        PreferredLocation.longitude.between(lng - lng_delta, lng + lng_delta),
+        func.lower(func.trim(PreferredLocation.name)).in_(HOME_NAMES)
+    ).distinct()
+    return [user_id for (user_id,) in rows]
+
+def _suggestion(rider_id: int, driver_id: int, match) -> CommuteSuggestion:
+    return CommuteSuggestion(
+        rider_id=rider_id,
+        driver_id=driver_id,
+        shared_days=match.shared_days,
+        home_distance_km=match.home_distance_km,
+        work_distance_km=match.work_distance_km,
+        time_difference_minutes=match.time_difference_minutes,
+        score=match.score,
+    )
+
+def refresh_commute_suggestions(db: Session, user_id: int) -> int:
+    """
+    Recompute every suggestion the user takes part in, as rider or as driver,
+    after their schedule, saved locations or driver flag changed. Only users
+    whose home is near the user's are compared. Does not commit, so the
+    refresh lands in the caller's transaction. Returns the number of
+    suggestions written.
+    """
+    db.query(CommuteSuggestion).filter(
+        or_(CommuteSuggestion.rider_id == user_id, CommuteSuggestion.driver_id == user_id)
+    ).delete(synchronize_session=False)
+
+    profile = load_commute_profiles(db, [user_id]).get(user_id)
+    if profile is None or not profile.schedule:
+        return 0
+    candidate_ids = [
+        candidate_id for candidate_id in _users_with_home_near(db, *profile.home, MATCH_RADIUS_KM)
+        if candidate_id != user_id
+    ]
+
+    suggestions = []
+    for candidate in load_commute_profiles(db, candidate_ids).values():
+        if candidate.is_driver:
+            match = match_commutes(profile, candidate)
+            if match:
+                suggestions.append(_suggestion(user_id, candidate.user_id, match))
+        if profile.is_driver:
+            match = match_commutes(candidate, profile)
+            if match:
+                suggestions.append(_suggestion(candidate.user_id, user_id, match))
+    db.add_all(suggestions)
+    db.flush()
+    return len(suggestions)
+
+def rebuild_commute_suggestions(db: Session, batch_size: int = 200) -> int:
+    """
+    Refresh the suggestions of every user with a saved home, committing every
+    batch_size users. Only needed to fill the table the first time; after
+    that the schedule, location and user write paths keep it current.
+    Returns the number of users refreshed.
+    """
+    user_ids = [user_id for (user_id,) in db.query(PreferredLocation.user_id).filter(
+        func.lower(func.trim(PreferredLocation.name)).in_(HOME_NAMES)
+    ).distinct().order_by(PreferredLocation.user_id)]
+    for i, user_id in enumerate(user_ids, 1):
+        refresh_commute_suggestions(db, user_id)
+        if i % batch_size == 0:
+            db.commit()
+    db.commit()
+    return len(user_ids)
+
+def get_commute_suggestions(db: Session, rider_id: int, limit: int = 20) -> List[CommuteSuggestion]:
+    """Best matching drivers for a rider's recurring commute"""
+    return (
+        db.query(CommuteSuggestion)
+        .options(joinedload(CommuteSuggestion.driver))
+        .filter(CommuteSuggestion.rider_id == rider_id)
+        .order_by(CommuteSuggestion.score.desc(), CommuteSuggestion.id)
+        .limit(limit)
+        .all()
+    )
@@ -1,13 +1,46 @@
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Tuple
+from app.core.cache import invalidate, read_cache
+from app.core.etag import make_etag
+from app.db.crud.commute_suggestion import refresh_commute_suggestions
 from app.db.models.location import PreferredLocation
+from app.schema.location import LocationResponse
 
-def get_user_locations(db: Session, user_id: int) -> List[PreferredLocation]:
-    return db.query(PreferredLocation).filter(PreferredLocation.user_id == user_id).all()
+# Saved locations are only ever added, never edited, so the ids of a user's
+# locations identify the list and they need no version column
+
+def _locations_etag(user_id: int, location_ids: List[int]) -> str:
+    return make_etag("locations", user_id, *sorted(location_ids))
+
+def _load_user_locations_snapshot(db: Session, user_id: int) -> Tuple[str, List[LocationResponse]]:
+    locations = db.query(PreferredLocation).filter(PreferredLocation.user_id == user_id).all()
+    etag = _locations_etag(user_id, [location.id for location in locations])
+    return etag, [LocationResponse.model_validate(location) for location in locations]
+
+def get_user_locations_snapshot(db: Session, user_id: int) -> Tuple[str, List[LocationResponse]]:
+    """Cached list of the user's saved locations and its ETag"""
+    return read_cache.get_or_load(
+        f"user-locations-snapshot:{user_id}",
+        [("locations", user_id)],
+        lambda: _load_user_locations_snapshot(db, user_id)
+    )
+
+def get_user_locations(db: Session, user_id: int) -> List[LocationResponse]:
+    return get_user_locations_snapshot(db, user_id)[1]
+
+def get_user_locations_etag(db: Session, user_id: int) -> str:
+    """Current ETag of get_user_locations_snapshot from the location ids alone"""
+    return _locations_etag(user_id, [
+        location_id
+        for (location_id,) in db.query(PreferredLocation.id).filter(PreferredLocation.user_id == user_id)
+    ])
 
 def create_location(db: Session, location_data: dict, user_id: int) -> PreferredLocation:
     db_location = PreferredLocation(**location_data, user_id=user_id)
     db.add(db_location)
+    db.flush()
+    refresh_commute_suggestions(db, user_id)
+    invalidate(db, ("locations", user_id))
     db.commit()
     db.refresh(db_location)
-    return db_location
\ No newline at end of file
+    return db_location
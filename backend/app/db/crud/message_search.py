@@ -0,0 +1,136 @@
+"""
+Full-text search over a user's messages, on the index of migration 0010.
+
+Messages are indexed with their content and a "u<id>" token for sender and
+receiver, so a search asks the index for messages matching the terms and
+the user's token at once: the cost follows the user's matches, not the
+number of messages stored. SQLite uses FTS5 (bm25 ranking, snippet());
+PostgreSQL a GIN index over a tsvector (ts_rank, ts_headline).
+
+Snippets come back as plain text with the [start, end) offsets of the
+matched words. The index marks the matches with a random string per search,
+which no stored message can contain, and the marks are taken out here.
+"""
+import re
+import secrets
+from typing import Dict, List, Tuple
+
+from sqlalchemy import DateTime, inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+# Terms of a query beyond this are ignored
+MAX_TERMS = 10
+
+# Around the matched words in a snippet, with a random part added per search
+HIGHLIGHT_START = "\ue000"
+HIGHLIGHT_END = "\ue001"
+
+# Words of context in a snippet
+SNIPPET_WORDS = 12
+
+_SQLITE_SEARCH = text(f"""
+    SELECT m.id, m.sender_id, m.receiver_id, m.ride_id, m.sent_at,
+           snippet(messages_fts, 0, :highlight_start, :highlight_end, '…', {SNIPPET_WORDS}) AS snippet
+    FROM messages_fts
+    JOIN messages m ON m.id = messages_fts.rowid
+    WHERE messages_fts MATCH :query
+    ORDER BY bm25(messages_fts, 1.0, 0.0), m.id DESC
+    LIMIT :limit
+""").columns(sent_at=DateTime(timezone=True))
+
+_POSTGRESQL_DOCUMENT = (
+    "(to_tsvector('english', m.content) || "
+    "to_tsvector('simple', 'u' || m.sender_id::text || ' u' || m.receiver_id::text))"
+)
+
+_POSTGRESQL_SEARCH = text(f"""
+    WITH q AS (SELECT to_tsquery('english', :terms) AS terms)
+    SELECT m.id, m.sender_id, m.receiver_id, m.ride_id, m.sent_at,
+           ts_headline('english', m.content, q.terms,
+                       'StartSel=' || :highlight_start || ', StopSel=' || :highlight_end
+                       || ', MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}') AS snippet
+    FROM messages m, q
+    WHERE numnode(q.terms) > 0
+      AND {_POSTGRESQL_DOCUMENT} @@ (to_tsquery('simple', :participant) && q.terms)
+    ORDER BY ts_rank({_POSTGRESQL_DOCUMENT}, q.terms) DESC, m.id DESC
+    LIMIT :limit
+""").columns(sent_at=DateTime(timezone=True))
+
+
+class SearchIndexMissing(Exception):
+    """Raised when the SQLite full-text table of migration 0010 does not exist"""
+
+
+def _utf16_length(value: str) -> int:
+    return len(value.encode("utf-16-le")) // 2
+
+
+def _split_highlights(marked: str, start: str, end: str) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    The text of a marked snippet and the [start, end) offsets of its marked
+    parts, in UTF-16 code units as JavaScript indexes strings
+    """
+    parts, highlights, length, opened = [], [], 0, None
+    for part in re.split(f"({re.escape(start)}|{re.escape(end)})", marked):
+        if part == start:
+            opened = length
+        elif part == end:
+            if opened is not None and length > opened:
+                highlights.append((opened, length))
+            opened = None
+        else:
+            parts.append(part)
+            length += _utf16_length(part)
+    return "".join(parts), highlights
+
+
+def search_terms(query: str) -> List[str]:
+    """Words of a search query, lowercased; punctuation and operators are dropped"""
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+def search_messages(db: Session, user_id: int, query: str, limit: int = 20) -> List[Dict]:
+    """
+    Messages the user sent or received matching every word of query, best
+    match first, each with a snippet of its content around the matches.
+    While the last word is being typed (no whitespace after it) it also
+    matches as a prefix.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    prefix = "*" if not query[-1].isspace() else ""
+    marker = secrets.token_hex(8)
+    highlight_start, highlight_end = HIGHLIGHT_START + marker, HIGHLIGHT_END + marker
+    params = {"highlight_start": highlight_start, "highlight_end": highlight_end, "limit": limit}
+    if db.get_bind().dialect.name == "postgresql":
+        statement = _POSTGRESQL_SEARCH
+        params["terms"] = " & ".join(terms) + (":*" if prefix else "")
+        params["participant"] = f"u{user_id}"
+    else:
+        statement = _SQLITE_SEARCH
+        words = " ".join(f'"{term}"' for term in terms) + prefix
+        params["query"] = f"participants:u{user_id} AND content:({words})"
+
+    try:
+        rows = db.execute(statement, params).all()
+    except OperationalError:
+        # DB_CREATE_ALL builds the models only, not the FTS5 table
+        if not inspect(db.get_bind()).has_table("messages_fts"):
+            raise SearchIndexMissing()
+        raise
+
+    results = []
+    for row in rows:
+        snippet, highlights = _split_highlights(row.snippet, highlight_start, highlight_end)
+        results.append({
+            'id': row.id,
+            'user_id': row.receiver_id if row.sender_id == user_id else row.sender_id,
+            'sender_id': row.sender_id,
+            'receiver_id': row.receiver_id,
+            'ride_id': row.ride_id,
+            'sent_at': row.sent_at,
+            'snippet': snippet,
+            'highlights': highlights
+        })
+    return results
@@ -1,60 +1,380 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, distinct
-from typing import List, Dict
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, bindparam, case, func, insert, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from app.db.models.conversation import Conversation, PREVIEW_LENGTH
 from app.db.models.message import Message
+from app.db.models.unread_count import UnreadCount
 from app.db.models.user import User
-from app.schema.message import MessageCreate
+from app.schema.message import MessageCreate, MessageResponse, UserInMessage
+from app.services.event_bus import event_bus
+
+def _message_event(message: Message) -> Dict:
+    return {
+        "id": message.id,
+        "sender_id": message.sender_id,
+        "receiver_id": message.receiver_id,
+        "ride_id": message.ride_id,
+        "content": message.content,
+        "sent_at": message.sent_at,
+    }
+
+# Keyed by the bound parameters below so one statement serves a single row
+# and an executemany over a batch
+_conversation_update = update(Conversation.__table__).where(
+    Conversation.user_low_id == bindparam("key_user_low_id"),
+    Conversation.user_high_id == bindparam("key_user_high_id")
+).values({
+    **{
+        column.name: case(
+            (Conversation.last_message_id < bindparam("new_last_message_id"), bindparam(f"new_{column.name}", type_=column.type)),
+            else_=column
+        )
+        for column in (
+            Conversation.last_message_id,
+            Conversation.last_message_preview,
+            Conversation.last_message_at,
+            Conversation.last_ride_id
+        )
+    },
+    "low_unread_count": Conversation.low_unread_count + bindparam("new_low_unread_count"),
+    "high_unread_count": Conversation.high_unread_count + bindparam("new_high_unread_count"),
+})
+
+_unread_total = UnreadCount.messages + bindparam("delta")
+_unread_update = update(UnreadCount.__table__).where(
+    UnreadCount.user_id == bindparam("key_user_id")
+).values(messages=case((_unread_total > 0, _unread_total), else_=0))
+
+def _update_or_insert(db: Session, model, statement, rows: List[Dict], insert_row) -> None:
+    """
+    Run statement for the rows whose key_* columns exist in model's table and
+    insert insert_row(row) for the others, without committing. A single row
+    takes one UPDATE; a batch takes a lookup of the existing keys, one
+    executemany UPDATE and one multi-row INSERT.
+    """
+    key_names = [name for name in rows[0] if name.startswith("key_")]
+    if len(rows) == 1:
+        if db.execute(statement, rows).rowcount:
+            return
+        missing = rows
+    else:
+        key_columns = [getattr(model, name[len("key_"):]) for name in key_names]
+        keys = [tuple(row[name] for name in key_names) for row in rows]
+        condition = (
+            key_columns[0].in_([key[0] for key in keys]) if len(key_columns) == 1
+            else tuple_(*key_columns).in_(keys)
+        )
+        existing = set(db.query(*key_columns).filter(condition).all())
+        present = [row for row, key in zip(rows, keys) if key in existing]
+        missing = [row for row, key in zip(rows, keys) if key not in existing]
+        if present:
+            db.execute(statement, present)
+        if not missing:
+            return
+    try:
+        with db.begin_nested():
+            db.execute(insert(model.__table__), [insert_row(row) for row in missing])
+    except IntegrityError:
+        # Another transaction created some of the rows first
+        if len(missing) == 1:
+            db.execute(statement, missing)
+        else:
+            for row in missing:
+                _update_or_insert(db, model, statement, [row], insert_row)
+
+def _new_unread_count(row: Dict) -> Dict:
+    return {"user_id": row["key_user_id"], "messages": max(row["delta"], 0)}
+
+def _add_unread(db: Session, user_id: int, delta: int) -> None:
+    """Add delta to a user's unread total without committing; the row is created on first use"""
+    _update_or_insert(db, UnreadCount, _unread_update, [{"key_user_id": user_id, "delta": delta}], _new_unread_count)
+
+def _new_conversation(row: Dict) -> Dict:
+    return {
+        "user_low_id": row["key_user_low_id"],
+        "user_high_id": row["key_user_high_id"],
+        **{name[len("new_"):]: value for name, value in row.items() if name.startswith("new_")},
+    }
+
+def record_conversation_messages(db: Session, messages: List[Message]) -> None:
+    """
+    Make written messages the last ones of their pairs' conversations and
+    count them unread for their receivers, in the conversation and in their
+    total, without committing, so the inbox and the badge change in the
+    caller's transaction. Each conversation and each total is written once
+    however many of the messages it gets, in id order so concurrent batches
+    lock rows in the same order. Rows are created on first use; an older
+    message committed after a newer one only adds to the unread counts.
+    """
+    conversations: Dict[Tuple[int, int], List] = {}
+    unread_totals: Dict[int, int] = {}
+    for message in messages:
+        pair = tuple(sorted((message.sender_id, message.receiver_id)))
+        entry = conversations.setdefault(pair, [message, 0, 0])
+        if message.id > entry[0].id:
+            entry[0] = message
+        if message.sender_id != message.receiver_id:
+            entry[1 if message.receiver_id == pair[0] else 2] += 1
+            unread_totals[message.receiver_id] = unread_totals.get(message.receiver_id, 0) + 1
+
+    conversation_rows = []
+    for pair in sorted(conversations):
+        latest, low_unread, high_unread = conversations[pair]
+        conversation_rows.append({
+            "key_user_low_id": pair[0],
+            "key_user_high_id": pair[1],
+            "new_last_message_id": latest.id,
+            "new_last_message_preview": latest.content[:PREVIEW_LENGTH],
+            "new_last_message_at": latest.sent_at,
+            "new_last_ride_id": latest.ride_id,
+            "new_low_unread_count": low_unread,
+            "new_high_unread_count": high_unread,
+        })
+    _update_or_insert(db, Conversation, _conversation_update, conversation_rows, _new_conversation)
+    if unread_totals:
+        unread_rows = [{"key_user_id": user_id, "delta": unread_totals[user_id]} for user_id in sorted(unread_totals)]
+        _update_or_insert(db, UnreadCount, _unread_update, unread_rows, _new_unread_count)
+
+def record_conversation_message(db: Session, message: Message) -> None:
+    """record_conversation_messages for a single message"""
+    record_conversation_messages(db, [message])
 
 def create_message(db: Session, message: MessageCreate, sender_id: int) -> Message:
     db_message = Message(**message.dict(), sender_id=sender_id)
     db.add(db_message)
+    db.flush()
+    record_conversation_message(db, db_message)
     db.commit()
     db.refresh(db_message)
+    event_bus.publish([db_message.receiver_id], "new_message", _message_event(db_message))
     return db_message
 
-def get_conversation(db: Session, user1_id: int, user2_id: int) -> List[Message]:
-    return db.query(Message).options(
-        joinedload(Message.sender),
-        joinedload(Message.receiver)
-    ).filter(
+def create_messages(db: Session, messages: List[Tuple[MessageCreate, int]]) -> List[MessageResponse]:
+    """
+    Write (message, sender_id) pairs in one transaction: one multi-row
+    INSERT returning the ids and sent_at, the conversation and unread
+    bookkeeping in one statement or so per table, one commit. Returns the
+    written messages, sender and receiver included, in input order. Raises
+    ValueError, writing nothing, when a sender or receiver does not exist.
+    """
+    user_ids = {sender_id for _, sender_id in messages} | {message.receiver_id for message, _ in messages}
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(user_ids)).all()}
+    missing = user_ids - users.keys()
+    if missing:
+        raise ValueError(f"Unknown users {sorted(missing)}")
+
+    rows = [{**message.dict(), "sender_id": sender_id} for message, sender_id in messages]
+    # The order of RETURNING rows is not guaranteed, so each is matched to
+    # an input by its values; identical messages may swap ids harmlessly
+    waiting: Dict[Tuple, List[int]] = {}
+    for index, row in reversed(list(enumerate(rows))):
+        waiting.setdefault((row["sender_id"], row["receiver_id"], row["ride_id"], row["content"]), []).append(index)
+    written: List[Optional[Message]] = [None] * len(rows)
+    returned = db.execute(
+        insert(Message.__table__).returning(
+            Message.id, Message.sent_at, Message.sender_id, Message.receiver_id, Message.ride_id, Message.content
+        ),
+        rows
+    )
+    for message_id, sent_at, sender_id, receiver_id, ride_id, content in returned:
+        index = waiting[(sender_id, receiver_id, ride_id, content)].pop()
+        written[index] = Message(id=message_id, sent_at=sent_at, **rows[index])
+
+    record_conversation_messages(db, written)
+    db.commit()
+    for message in written:
+        event_bus.publish([message.receiver_id], "new_message", _message_event(message))
+    return [
+        MessageResponse(
+            **_message_event(message),
+            sender=UserInMessage.model_validate(users[message.sender_id]),
+            receiver=UserInMessage.model_validate(users[message.receiver_id])
+        )
+        for message in written
+    ]
+
+def mark_conversation_read(db: Session, user_id: int, other_user_id: int, up_to_id: int) -> int:
+    """
+    Mark the messages other_user_id sent to user_id, up to and including
+    up_to_id, as read and take them off the conversation's and the user's
+    unread counts in one transaction. Returns how many messages were newly
+    marked, so repeating a call changes nothing.
+    """
+    if user_id == other_user_id:
+        return 0
+    marked = db.execute(
+        update(Message).where(
+            Message.receiver_id == user_id,
+            Message.sender_id == other_user_id,
+            Message.read_at.is_(None),
+            Message.id <= up_to_id
+        ).values(read_at=func.now()).execution_options(synchronize_session=False)
+    ).rowcount
+    if not marked:
+        db.commit()
+        return 0
+
+    user_low_id, user_high_id = sorted((user_id, other_user_id))
+    unread_column = "low_unread_count" if user_id == user_low_id else "high_unread_count"
+    remaining = getattr(Conversation, unread_column) - marked
+    db.execute(
+        update(Conversation).where(
+            Conversation.user_low_id == user_low_id,
+            Conversation.user_high_id == user_high_id
+        ).values({unread_column: case((remaining > 0, remaining), else_=0)})
+    )
+    _add_unread(db, user_id, -marked)
+    db.commit()
+    event_bus.publish([other_user_id], "messages_read", {"reader_id": user_id, "up_to_id": up_to_id})
+    return marked
+
+def get_unread_count(db: Session, user_id: int) -> int:
+    """Messages the user has not read yet, across all conversations"""
+    count = db.query(UnreadCount.messages).filter(UnreadCount.user_id == user_id).scalar()
+    return count or 0
+
+def get_received_messages_after(
+    db: Session,
+    user_id: int,
+    after_id: int,
+    skip_ids: Iterable[int],
+    limit: int
+) -> List[Message]:
+    """
+    Messages to the user with an id above after_id, oldest first, leaving out
+    skip_ids (those already handed out). Walks the primary key from after_id,
+    so it reads only what was written since then.
+    """
+    query = db.query(Message).filter(Message.id > after_id, Message.receiver_id == user_id)
+    skip_ids = list(skip_ids)
+    if skip_ids:
+        query = query.filter(Message.id.notin_(skip_ids))
+    return query.order_by(Message.id).limit(limit).all()
+
+def get_last_message_id(db: Session, sent_before: Optional[datetime] = None) -> int:
+    """
+    Highest message id; with sent_before, the highest among messages sent
+    before then. Walks the primary key down from the newest message, so it
+    reads only what was written since sent_before.
+    """
+    if sent_before is None:
+        return db.query(func.max(Message.id)).scalar() or 0
+    return (db.query(Message.id)
+            .filter(Message.sent_at < sent_before)
+            .order_by(Message.id.desc())
+            .limit(1)
+            .scalar()) or 0
+
+def _check_cursor(db: Session, message_id: int, user1_id: int, user2_id: int) -> int:
+    """message_id if it is a message between the two users; raises ValueError for any other id"""
+    found = db.query(Message.id).filter(
+        Message.id == message_id,
         or_(
             and_(Message.sender_id == user1_id, Message.receiver_id == user2_id),
             and_(Message.sender_id == user2_id, Message.receiver_id == user1_id)
         )
-    ).order_by(Message.sent_at).all()
+    ).first()
+    if found is None:
+        raise ValueError("Invalid cursor")
+    return message_id
+
+def _one_way_page(
+    db: Session,
+    sender_id: int,
+    receiver_id: int,
+    limit: int,
+    before_id: Optional[int],
+    after_id: Optional[int]
+) -> List[Message]:
+    # A range scan of ix_messages_sender_id_receiver_id_id. Ids, not sent_at,
+    # order the history: they grow with every message, while sent_at has
+    # whole-second ties and, on SQLite, is stored as text that does not
+    # compare equal to the bound datetime
+    query = db.query(Message).filter(Message.sender_id == sender_id, Message.receiver_id == receiver_id)
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+    if after_id is not None:
+        return query.filter(Message.id > after_id).order_by(Message.id).limit(limit).all()
+    return query.order_by(Message.id.desc()).limit(limit).all()
+
+def get_conversation(
+    db: Session,
+    user1_id: int,
+    user2_id: int,
+    limit: int = 50,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None
+) -> Dict:
+    """
+    One page of the messages between two users, oldest first, with both
+    users once. Without cursors the page holds the latest messages; with
+    before_id the ones just before that message, with after_id the ones
+    just after it. has_more tells whether messages remain beyond the page
+    in the direction being read. Raises ValueError for a cursor that is not
+    a message of this conversation.
+    """
+    if before_id is not None:
+        _check_cursor(db, before_id, user1_id, user2_id)
+    if after_id is not None:
+        _check_cursor(db, after_id, user1_id, user2_id)
+
+    directions = [(user1_id, user2_id)] if user1_id == user2_id else [(user1_id, user2_id), (user2_id, user1_id)]
+    messages = [
+        message
+        for sender_id, receiver_id in directions
+        for message in _one_way_page(db, sender_id, receiver_id, limit + 1, before_id, after_id)
+    ]
+    messages.sort(key=lambda message: message.id, reverse=after_id is None)
+    page = messages[:limit]
+    if after_id is None:
+        page.reverse()
+
+    return {
+        'participants': db.query(User).filter(User.id.in_({user1_id, user2_id})).order_by(User.id).all(),
+        'messages': page,
+        'has_more': len(messages) > limit
+    }
+
+def iter_user_conversations(db: Session, user_id: int, batch_size: int = 500) -> Iterator[Dict]:
+    """
+    Conversations with last message and user details, most recent first,
+    read from the conversations table: one indexed row per partner however
+    many messages were exchanged.
+    """
+    is_low = Conversation.user_low_id == user_id
+    partner_id = case((is_low, Conversation.user_high_id), else_=Conversation.user_low_id)
+    unread_count = case((is_low, Conversation.low_unread_count), else_=Conversation.high_unread_count)
+    rows = db.query(
+        Conversation.last_message_id,
+        Conversation.last_message_preview,
+        Conversation.last_message_at,
+        Conversation.last_ride_id,
+        unread_count,
+        User.id,
+        User.name,
+        User.photo_url
+    ).join(
+        User, User.id == partner_id
+    ).filter(
+        or_(is_low, Conversation.user_high_id == user_id)
+    ).order_by(
+        Conversation.last_message_at.desc(), Conversation.last_message_id.desc()
+    ).yield_per(batch_size)
+
+    for message_id, preview, sent_at, ride_id, unread, other_user_id, name, photo_url in rows:
+        yield {
+            'user_id': other_user_id,
+            'user_name': name,
+            'user_photo': photo_url,
+            'last_message': preview,
+            'last_message_time': sent_at,
+            'last_message_id': message_id,
+            'ride_id': ride_id,
+            'unread_count': unread
+        }
 
 def get_user_conversations(db: Session, user_id: int) -> List[Dict]:
     """Get list of conversations with last message and user details"""
-    # Use a simpler approach to get conversations
-    # Get all messages involving the user
-    messages = db.query(Message).options(
-        joinedload(Message.sender),
-        joinedload(Message.receiver)
-    ).filter(
-        or_(Message.sender_id == user_id, Message.receiver_id == user_id)
-    ).order_by(Message.sent_at.desc()).all()
-    
-    # Group by conversation partner and get the latest message for each
-    conversations_dict = {}
-    for msg in messages:
-        other_user = msg.receiver if msg.sender_id == user_id else msg.sender
-        other_user_id = other_user.id
-        
-        # Only keep the latest message for each conversation partner
-        if other_user_id not in conversations_dict:
-            conversations_dict[other_user_id] = {
-                'user_id': other_user.id,
-                'user_name': other_user.name,
-                'user_photo': other_user.photo_url,
-                'last_message': msg.content,
-                'last_message_time': msg.sent_at,
-                'last_message_id': msg.id,
-                'ride_id': msg.ride_id
-            }
-    
-    # Convert dictionary values to list
-    result = list(conversations_dict.values())
-    # Sort by last message time (most recent first)
-    result.sort(key=lambda x: x['last_message_time'], reverse=True)
-    
-    return result
\ No newline at end of file
+    return list(iter_user_conversations(db, user_id))
@@ -1,46 +1,173 @@
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
-from datetime import datetime, date
+from sqlalchemy import tuple_, update
+from typing import Dict, List, Optional, Tuple, Union
+from datetime import datetime, date, timedelta
 from app.db.models.ride import Ride
-from app.db.models.ride_history import RideHistory
-from app.schema.ride import RideCreate, RideUpdate
+from app.db.models.car import Car
+from app.db.models.user import User
+from app.db.models.user_stats import UserStats
+from app.db.models.archive import RideArchive
+from app.db.models.commute_suggestion import CommuteSuggestion
+from app.db.models.ride_request import RideRequest
+from app.core.cache import invalidate, read_cache
+from app.core.etag import make_etag
+from app.db.crud.archive import page_hot_then_archive
+from app.db.crud.user_stats import get_users_stats, increment_user_stats
+from app.schema.ride import RideCreate, RideUpdate, RideSearchFilters, RideResponse
+from app.services.event_bus import event_bus
+from app.services.geo_index import ride_geo_index
+from app.services.route_matcher import route_corridor_index, simplify_polyline, CorridorMatch
+import base64
 import pytz
-from sqlalchemy import func
 
-def get_available_rides(db: Session, user_id: int, limit: int = 50) -> List[Ride]:
-    # Get current Pakistan time
+# Number of index candidates re-checked against the database per query
+NEARBY_CANDIDATE_CHUNK = 200
+
+def attach_driver_stats(db: Session, rides: List[Ride]) -> None:
+    """Fill driver.driver_rating and driver.ride_offered for every ride in the list"""
+    stats = get_users_stats(db, [ride.driver_id for ride in rides])
+    for ride in rides:
+        driver_stats = stats.get(ride.driver_id)
+        ride.driver.driver_rating = driver_stats.driver_rating if driver_stats else 0
+        ride.driver.ride_offered = driver_stats.rides_offered if driver_stats else 0
+
+def _pakistan_now() -> datetime:
     pakistan_tz = pytz.timezone('Asia/Karachi')
-    now_pakistan = datetime.now(pakistan_tz).replace(tzinfo=None)
-    
-    print(f"Current Pakistan Time: {now_pakistan}")
-    
-    rides = db.query(Ride).options(
+    return datetime.now(pakistan_tz).replace(tzinfo=None)
+
+def _available_rides_query(db: Session, user_id: int, now: datetime, filters: Optional[RideSearchFilters] = None):
+    query = db.query(Ride).options(
         joinedload(Ride.driver),
         joinedload(Ride.car)
     ).filter(
         Ride.driver_id != user_id,
         Ride.status == "active",
         Ride.seats_available > 0,
-        Ride.start_time > now_pakistan
-    ).limit(limit).all()
+        Ride.start_time > now
+    )
+    if filters is None:
+        return query
+    if filters.departs_after is not None:
+        query = query.filter(Ride.start_time >= filters.departs_after)
+    if filters.departs_before is not None:
+        query = query.filter(Ride.start_time <= filters.departs_before)
+    if filters.min_seats is not None:
+        query = query.filter(Ride.seats_available >= filters.min_seats)
+    if filters.max_fare is not None:
+        query = query.filter(Ride.total_fare <= filters.max_fare)
+    if filters.ac_available is not None:
+        query = query.filter(Ride.car.has(Car.ac_available == filters.ac_available))
+    return query
 
-    for ride in rides:
-        driver = ride.driver
-        rides_offered = db.query(Ride).filter(Ride.driver_id == driver.id).count()
-        driver.driver_rating = round(db.query(
-            func.avg(func.coalesce(RideHistory.rating_given, 5))
-        ).join(
-            Ride, RideHistory.ride_id == Ride.id
-        ).filter(
-            Ride.driver_id == driver.id
-        ).scalar() or 0, 1) if rides_offered > 0 else 0
-
-        driver.ride_offered =  db.query(Ride).filter(
-            Ride.driver_id == driver.id
-        ).count()
+def encode_ride_cursor(ride: Ride) -> str:
+    """Opaque keyset cursor pointing just after the given ride in (start_time, id) order"""
+    raw = f"{ride.start_time.isoformat()}|{ride.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_ride_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_ride_cursor; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        start_time, ride_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(start_time), int(ride_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def get_available_rides(
+    db: Session,
+    user_id: int,
+    limit: int = 50,
+    filters: Optional[RideSearchFilters] = None,
+    after: Optional[Tuple[datetime, int]] = None
+) -> Tuple[List[Ride], Optional[str]]:
+    """
+    One page of available rides in (start_time, id) order and the cursor for
+    the next page (None on the last page). The order and the status filter
+    match ix_rides_status_start_time_id, so every page is an index range scan.
+    """
+    # Get current Pakistan time
+    now_pakistan = _pakistan_now()
     
+    query = _available_rides_query(db, user_id, now_pakistan, filters)
+    if after is not None:
+        query = query.filter(tuple_(Ride.start_time, Ride.id) > tuple_(*after))
+    rides = query.order_by(Ride.start_time, Ride.id).limit(limit + 1).all()
+
+    next_cursor = encode_ride_cursor(rides[limit - 1]) if len(rides) > limit else None
+    rides = rides[:limit]
+    attach_driver_stats(db, rides)
+    return rides, next_cursor
+
+def get_rides_near(
+    db: Session,
+    user_id: int,
+    lat: float,
+    lng: float,
+    radius_km: float,
+    dest_lat: Optional[float] = None,
+    dest_lng: Optional[float] = None,
+    dest_radius_km: Optional[float] = None,
+    limit: int = 50,
+    filters: Optional[RideSearchFilters] = None
+) -> List[Ride]:
+    """Available rides starting within radius_km of the origin (and ending near the destination), nearest first"""
+    now_pakistan = _pakistan_now()
+    ride_geo_index.sync(db, now_pakistan)
+    candidate_ids = ride_geo_index.search(lat, lng, radius_km, dest_lat, dest_lng, dest_radius_km)
+
+    # Re-check the candidates against the database in distance order, one
+    # chunk at a time, until the page is full.
+    rides = []
+    for offset in range(0, len(candidate_ids), NEARBY_CANDIDATE_CHUNK):
+        chunk = candidate_ids[offset:offset + NEARBY_CANDIDATE_CHUNK]
+        found = {
+            ride.id: ride
+            for ride in _available_rides_query(db, user_id, now_pakistan, filters).filter(Ride.id.in_(chunk))
+        }
+        rides.extend(found[ride_id] for ride_id in chunk if ride_id in found)
+        if len(rides) >= limit:
+            break
+
+    rides = rides[:limit]
+    attach_driver_stats(db, rides)
     return rides
 
+def get_rides_along_route(
+    db: Session,
+    user_id: int,
+    pickup: Tuple[float, float],
+    drop: Tuple[float, float],
+    max_distance_m: float,
+    departs_after: Optional[datetime] = None,
+    departs_before: Optional[datetime] = None,
+    limit: int = 50
+) -> List[Tuple[Ride, CorridorMatch]]:
+    """Available rides whose route passes near pickup and then drop, best match first"""
+    now_pakistan = _pakistan_now()
+    departs_after = max(departs_after or now_pakistan, now_pakistan)
+    departs_before = departs_before or departs_after + timedelta(days=1)
+    route_corridor_index.sync(db, now_pakistan)
+    matches = route_corridor_index.match(pickup, drop, max_distance_m, departs_after, departs_before)
+
+    results = []
+    for offset in range(0, len(matches), NEARBY_CANDIDATE_CHUNK):
+        chunk = matches[offset:offset + NEARBY_CANDIDATE_CHUNK]
+        found = {
+            ride.id: ride
+            for ride in _available_rides_query(db, user_id, now_pakistan).filter(
+                Ride.id.in_([match.ride_id for match in chunk]),
+                Ride.start_time >= departs_after,
+                Ride.start_time <= departs_before
+            )
+        }
+        results.extend((found[match.ride_id], match) for match in chunk if match.ride_id in found)
+        if len(results) >= limit:
+            break
+
+    results = results[:limit]
+    attach_driver_stats(db, [ride for ride, _ in results])
+    return results
+
 def get_user_rides(db: Session, user_id: int) -> List[Ride]:
     today = date.today()
     return (
@@ -54,17 +181,51 @@ def get_user_rides(db: Session, user_id: int) -> List[Ride]:
         .all()
     )
 
-def get_user_completed_rides(db: Session, user_id: int) -> List[Ride]:
-    today = date.today()
+def _user_completed_rides_query(db: Session, model, user_id: int):
     return (
-        db.query(Ride)
-        .filter(
-            Ride.driver_id == user_id,
-            Ride.status == 'end',  # adjust to your active flag
-        )
-        .all()
+        db.query(model)
+        .options(joinedload(model.driver), joinedload(model.car))
+        .filter(model.driver_id == user_id, model.status == 'end')
+        .order_by(model.start_time.desc(), model.id.desc())
     )
 
+def get_user_completed_rides(
+    db: Session,
+    user_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Tuple[List[Union[Ride, RideArchive]], Optional[str]]:
+    """
+    Completed rides of a driver, newest first, and the cursor of the next
+    page. Archived rides are only read when a caller follows the cursor
+    past the rides still in the hot table.
+    """
+    return page_hot_then_archive(
+        _user_completed_rides_query(db, Ride, user_id),
+        _user_completed_rides_query(db, RideArchive, user_id),
+        "start_time", limit, cursor
+    )
+
+def _route_polyline(ride: RideCreate) -> Optional[List[List[float]]]:
+    """Simplified route for the corridor index, falling back to the straight start-end line"""
+    if ride.route and len(ride.route) >= 2:
+        return simplify_polyline(ride.route)
+    if None not in (ride.start_latitude, ride.start_longitude, ride.end_latitude, ride.end_longitude):
+        return [[ride.start_latitude, ride.start_longitude], [ride.end_latitude, ride.end_longitude]]
+    return None
+
+def _ride_event(ride: Ride) -> Dict:
+    return {
+        "id": ride.id,
+        "driver_id": ride.driver_id,
+        "start_location": ride.start_location,
+        "end_location": ride.end_location,
+        "start_time": ride.start_time,
+        "seats_available": ride.seats_available,
+        "total_fare": ride.total_fare,
+        "status": ride.status,
+    }
+
 def create_ride(db: Session, ride: RideCreate, driver_id: int) -> Ride:
     db_ride = Ride(
         driver_id=driver_id,
@@ -74,30 +235,79 @@ def create_ride(db: Session, ride: RideCreate, driver_id: int) -> Ride:
         start_time=ride.start_time,
         seats_available=ride.seats_available,
         total_fare=ride.total_fare,
+        start_latitude=ride.start_latitude,
+        start_longitude=ride.start_longitude,
+        end_latitude=ride.end_latitude,
+        end_longitude=ride.end_longitude,
+        route_polyline=_route_polyline(ride),
     )
     db.add(db_ride)
+    increment_user_stats(db, driver_id, rides_offered=1)
     db.commit()
     db.refresh(db_ride)
+    # Riders whose commute matches the driver's hear about it right away
+    rider_ids = [rider_id for (rider_id,) in db.query(CommuteSuggestion.rider_id).filter(
+        CommuteSuggestion.driver_id == driver_id
+    )]
+    event_bus.publish(rider_ids, "new_ride_available", _ride_event(db_ride))
     return db_ride
 
-def get_ride(db: Session, ride_id: int) -> Optional[Ride]:
-    ride =  db.query(Ride).filter(Ride.id == ride_id).first()
+def _ride_owner(db: Session, ride_id: int) -> Optional[Tuple[int, int]]:
+    row = db.query(Ride.driver_id, Ride.car_id).filter(Ride.id == ride_id).first()
+    return tuple(row) if row else None
 
-    driver = ride.driver
-    rides_offered = db.query(Ride).filter(Ride.driver_id == driver.id).count()
-    driver.driver_rating = round(db.query(
-        func.avg(func.coalesce(RideHistory.rating_given, 5))
-    ).join(
-        Ride, RideHistory.ride_id == Ride.id
-    ).filter(
-        Ride.driver_id == driver.id
-    ).scalar() or 0, 1) if rides_offered > 0 else 0
+def _ride_etag(ride_id: int, ride_version: int, driver_version: int, car_version: int,
+               stats_version: Optional[int]) -> str:
+    return make_etag("ride", ride_id, ride_version, driver_version, car_version, stats_version or 0)
+
+def _load_ride_snapshot(db: Session, ride_id: int) -> Optional[Tuple[str, RideResponse]]:
+    ride = db.query(Ride).options(
+        joinedload(Ride.driver),
+        joinedload(Ride.car)
+    ).filter(Ride.id == ride_id).first()
+    if not ride:
+        return None
+    attach_driver_stats(db, [ride])
+    # Already in the identity map when the driver has stats
+    stats = db.get(UserStats, ride.driver_id)
+    etag = _ride_etag(
+        ride.id, ride.version, ride.driver.version, ride.car.version, stats.version if stats else None
+    )
+    return etag, RideResponse.model_validate(ride)
 
-    driver.ride_offered =  db.query(Ride).filter(
-        Ride.driver_id == driver.id
-    ).count()
+def get_ride_snapshot(db: Session, ride_id: int) -> Optional[Tuple[str, RideResponse]]:
+    """
+    Cached snapshot of a ride with its driver, car and driver stats, and the
+    ETag of the row versions it was built from. The ride's driver and car
+    are looked up first to know which entity versions the snapshot depends
+    on; that lookup is tagged with the ride so archiving it drops both.
+    """
+    owner = read_cache.get_or_load(f"ride-owner:{ride_id}", [("ride", ride_id)], lambda: _ride_owner(db, ride_id))
+    if owner is None:
+        return None
+    driver_id, car_id = owner
+    return read_cache.get_or_load(
+        f"ride-snapshot:{ride_id}",
+        [("ride", ride_id), ("user", driver_id), ("car", car_id), ("user_stats", driver_id)],
+        lambda: _load_ride_snapshot(db, ride_id)
+    )
 
-    return ride
+def get_ride(db: Session, ride_id: int) -> Optional[RideResponse]:
+    snapshot = get_ride_snapshot(db, ride_id)
+    return snapshot[1] if snapshot else None
+
+def get_ride_etag(db: Session, ride_id: int) -> Optional[str]:
+    """Current ETag of get_ride_snapshot from a single version lookup, None if the ride does not exist"""
+    row = db.query(
+        Ride.version, User.version, Car.version, UserStats.version
+    ).join(
+        User, Ride.driver_id == User.id
+    ).join(
+        Car, Ride.car_id == Car.id
+    ).outerjoin(
+        UserStats, UserStats.user_id == Ride.driver_id
+    ).filter(Ride.id == ride_id).first()
+    return _ride_etag(ride_id, *row) if row else None
 
 def update_ride(db: Session, ride_id: int, ride_update: RideUpdate, driver_id: int) -> Optional[Ride]:
     db_ride = db.query(Ride).filter(Ride.id == ride_id, Ride.driver_id == driver_id).first()
@@ -105,8 +315,36 @@ def update_ride(db: Session, ride_id: int, ride_update: RideUpdate, driver_id: i
         return None
     for field, value in ride_update.dict(exclude_unset=True).items():
         setattr(db_ride, field, value)
+    db_ride.version = Ride.version + 1
+    invalidate(db, ("ride", ride_id))
     db.commit()
+    ride_geo_index.discard(ride_id)
+    route_corridor_index.discard(ride_id)
     db.refresh(db_ride)
+    rider_ids = [rider_id for (rider_id,) in db.query(RideRequest.rider_id).filter(
+        RideRequest.ride_id == ride_id,
+        RideRequest.status.in_(("pending", "accepted"))
+    )]
+    event_bus.publish(rider_ids, "ride_status_changed", _ride_event(db_ride), coalesce_key=("ride", ride_id))
     return db_ride
 
-    
\ No newline at end of file
+def expire_departed_rides(db: Session, departed_before: datetime, batch_size: int) -> int:
+    """
+    Move up to batch_size active rides that departed before the cutoff to
+    'expired' and commit. Returns the number of rides expired.
+    """
+    ride_ids = [ride_id for (ride_id,) in db.query(Ride.id).filter(
+        Ride.status == "active",
+        Ride.start_time < departed_before
+    ).order_by(Ride.start_time).limit(batch_size)]
+    if not ride_ids:
+        return 0
+    result = db.execute(
+        update(Ride)
+        .where(Ride.id.in_(ride_ids), Ride.status == "active")
+        .values(status="expired", version=Ride.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    invalidate(db, *[("ride", ride_id) for ride_id in ride_ids])
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,167 @@
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import exists
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from collections import OrderedDict
+import threading
+import time
+from app.db.models.ride import Ride
+from app.db.models.ride_request import RideRequest
+from app.db.crud.commute_suggestion import load_commute_profiles
+from app.db.crud.user_stats import get_users_stats
+from app.schema.ride import RideAssignmentProposal
+from app.services.ride_assignment import AssignmentRequest, request_cost, solve_assignment
+import pytz
+
+# Default and largest departure window one assignment covers
+ASSIGNMENT_WINDOW_HOURS = 2
+MAX_ASSIGNMENT_WINDOW_HOURS = 24
+
+# A window's solution is reused for this long, so every driver asking about
+# the same window within it is answered from one solve
+ASSIGNMENT_CACHE_SECONDS = 60
+# Windows whose solutions are kept at once
+ASSIGNMENT_CACHE_WINDOWS = 32
+
+Window = Tuple[datetime, datetime]
+# Proposals of a solve with the driver of each proposal's ride
+Solution = List[Tuple[int, RideAssignmentProposal]]
+
+_solutions: "OrderedDict[Window, Tuple[float, Solution]]" = OrderedDict()
+_solutions_lock = threading.Lock()
+_window_locks: Dict[Window, threading.Lock] = {}
+
+
+def propose_ride_assignments(
+    db: Session,
+    departs_after: Optional[datetime] = None,
+    departs_before: Optional[datetime] = None,
+    driver_id: Optional[int] = None
+) -> List[RideAssignmentProposal]:
+    """
+    Solve the assignment of every pending request on open rides departing in
+    the window: each rider gets at most one ride, no ride is overbooked, as
+    many riders as possible are seated and the rest is decided on detour,
+    time difference and driver rating. Riders who already hold an accepted
+    seat in the window are left out. Nothing is written; the proposals are
+    meant to be accepted through the regular request endpoints, which
+    check the seats again.
+
+    The window defaults to the next ASSIGNMENT_WINDOW_HOURS from the start
+    of the current minute; a window that ends before it starts or is longer
+    than MAX_ASSIGNMENT_WINDOW_HOURS raises ValueError. With driver_id the
+    solution is still computed over the whole window, but only the
+    proposals for that driver's rides are returned.
+
+    The solve is CPU-bound and covers the whole window, so its result is
+    kept for ASSIGNMENT_CACHE_SECONDS and shared by every caller asking
+    about the same window; callers arriving during a solve wait for it
+    rather than starting another.
+    """
+    if departs_after is None:
+        departs_after = datetime.now(pytz.timezone('Asia/Karachi')).replace(tzinfo=None, second=0, microsecond=0)
+    if departs_before is None:
+        departs_before = departs_after + timedelta(hours=ASSIGNMENT_WINDOW_HOURS)
+    if not timedelta(0) <= departs_before - departs_after <= timedelta(hours=MAX_ASSIGNMENT_WINDOW_HOURS):
+        raise ValueError(f"The window must end after it starts and span at most {MAX_ASSIGNMENT_WINDOW_HOURS} hours")
+
+    solution = _cached_solution(db, (departs_after, departs_before))
+    return [
+        proposal for proposal_driver_id, proposal in solution
+        if driver_id is None or proposal_driver_id == driver_id
+    ]
+
+def _fresh(window: Window) -> Optional[Solution]:
+    with _solutions_lock:
+        cached = _solutions.get(window)
+        if cached is None or cached[0] <= time.monotonic():
+            return None
+        _solutions.move_to_end(window)
+        return cached[1]
+
+def _cached_solution(db: Session, window: Window) -> Solution:
+    solution = _fresh(window)
+    if solution is not None:
+        return solution
+    with _solutions_lock:
+        window_lock = _window_locks.setdefault(window, threading.Lock())
+    with window_lock:
+        # Solved by another caller while this one waited for the lock
+        solution = _fresh(window)
+        if solution is not None:
+            return solution
+        solution = _solve_window(db, *window)
+        with _solutions_lock:
+            _solutions[window] = (time.monotonic() + ASSIGNMENT_CACHE_SECONDS, solution)
+            _solutions.move_to_end(window)
+            while len(_solutions) > ASSIGNMENT_CACHE_WINDOWS:
+                evicted, _ = _solutions.popitem(last=False)
+                _window_locks.pop(evicted, None)
+        return solution
+
+def _solve_window(db: Session, departs_after: datetime, departs_before: datetime) -> Solution:
+    in_window = (
+        Ride.status == "active",
+        Ride.start_time >= departs_after,
+        Ride.start_time <= departs_before,
+    )
+    accepted = aliased(RideRequest)
+    accepted_ride = aliased(Ride)
+    already_seated = exists().where(
+        accepted.rider_id == RideRequest.rider_id,
+        accepted.status == "accepted",
+        accepted.ride_id == accepted_ride.id,
+        accepted_ride.start_time >= departs_after,
+        accepted_ride.start_time <= departs_before
+    )
+    rows = db.query(
+        RideRequest.id,
+        RideRequest.rider_id,
+        Ride.id,
+        Ride.driver_id,
+        Ride.start_time,
+        Ride.start_latitude,
+        Ride.start_longitude,
+        Ride.end_latitude,
+        Ride.end_longitude,
+        Ride.seats_available
+    ).join(
+        Ride, RideRequest.ride_id == Ride.id
+    ).filter(
+        RideRequest.status == "pending",
+        Ride.seats_available > 0,
+        *in_window,
+        ~already_seated
+    ).all()
+    if not rows:
+        return []
+
+    profiles = load_commute_profiles(db, {row.rider_id for row in rows})
+    driver_stats = get_users_stats(db, [row.driver_id for row in rows])
+    seats = {}
+    drivers = {}
+    requests = []
+    for (request_id, rider_id, ride_id, ride_driver_id, start_time,
+         start_lat, start_lng, end_lat, end_lng, seats_available) in rows:
+        seats[ride_id] = seats_available
+        drivers[ride_id] = ride_driver_id
+        stats = driver_stats.get(ride_driver_id)
+        requests.append(AssignmentRequest(
+            request_id=request_id,
+            rider_id=rider_id,
+            ride_id=ride_id,
+            cost=request_cost(
+                profiles.get(rider_id), start_time, (start_lat, start_lng), (end_lat, end_lng),
+                stats.driver_rating if stats else None
+            ),
+        ))
+
+    return [
+        (
+            drivers[chosen.ride_id],
+            RideAssignmentProposal(
+                request_id=chosen.request_id, ride_id=chosen.ride_id, rider_id=chosen.rider_id, cost=chosen.cost
+            )
+        )
+        for chosen in solve_assignment(requests, seats)
+    ]
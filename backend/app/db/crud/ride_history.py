@@ -1,24 +1,58 @@
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 from app.db.models.ride_history import RideHistory
 from app.db.models.ride import Ride
 from app.db.models.user import User
 from app.db.models.car import Car
+from app.db.models.archive import RideArchive, RideHistoryArchive
+from app.db.crud.archive import page_hot_then_archive
+from app.db.crud.user_stats import increment_user_stats, rating_delta, DEFAULT_RATING
 import pytz
 
 
-def get_user_ride_history_by_id(db: Session, user_id: int) -> List[RideHistory]:
-    """Get all ride history for a user (both as driver and rider) with related data"""
-    return (db.query(RideHistory)
+def _ride_driver_id(db: Session, ride_id: int) -> Optional[int]:
+    return db.query(Ride.driver_id).filter(Ride.id == ride_id).scalar()
+
+def _apply_rating_given(db: Session, db_history: RideHistory, rating: Optional[int]) -> None:
+    """Set rating_given and move the ride driver's rating sum by the difference"""
+    driver_id = _ride_driver_id(db, db_history.ride_id)
+    if driver_id is not None:
+        increment_user_stats(db, driver_id, driver_rating_sum=rating_delta(db_history.rating_given, rating))
+    db_history.rating_given = rating
+
+
+def _user_ride_history_query(db: Session, user_id: int, history_model=RideHistory, ride_model=Ride):
+    return (db.query(history_model)
             .options(
-                joinedload(RideHistory.user),
-                joinedload(RideHistory.ride).joinedload(Ride.driver),
-                joinedload(RideHistory.ride).joinedload(Ride.car)
+                joinedload(history_model.user),
+                joinedload(history_model.ride).joinedload(ride_model.driver),
+                joinedload(history_model.ride).joinedload(ride_model.car)
             )
-            .filter(RideHistory.user_id == user_id)
-            .order_by(RideHistory.completed_at.desc())
-            .all())
+            .filter(history_model.user_id == user_id)
+            .order_by(history_model.completed_at.desc().nullsfirst(), history_model.id.desc()))
+
+def get_user_ride_history_by_id(
+    db: Session,
+    user_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Tuple[List[Union[RideHistory, RideHistoryArchive]], Optional[str]]:
+    """
+    Ride history for a user (both as driver and rider) with related data,
+    rides still in progress first, and the cursor of the next page. The
+    archived history is only read when a caller follows the cursor past
+    the hot rows.
+    """
+    return page_hot_then_archive(
+        _user_ride_history_query(db, user_id),
+        _user_ride_history_query(db, user_id, RideHistoryArchive, RideArchive),
+        "completed_at", limit, cursor
+    )
+
+def iter_user_ride_history(db: Session, user_id: int, batch_size: int = 500) -> Iterator[RideHistory]:
+    """The hot rows of get_user_ride_history_by_id, fetched batch_size at a time"""
+    return iter(_user_ride_history_query(db, user_id).yield_per(batch_size))
 
 def get_ride_history_by_id(db: Session, history_id: int) -> List[RideHistory]:
     """Get all ride history for a user (both as driver and rider)"""
@@ -43,6 +77,11 @@ def create_ride_history_entry(db: Session, user_id: int, ride_id: int, role: str
         joined_at=now_pakistan
     )
     db.add(db_history)
+    # A new entry counts as an unrated (default 5) ride for both sides
+    increment_user_stats(db, user_id, rides_taken=1, rider_rating_sum=DEFAULT_RATING)
+    driver_id = _ride_driver_id(db, ride_id)
+    if driver_id is not None:
+        increment_user_stats(db, driver_id, driver_rating_count=1, driver_rating_sum=DEFAULT_RATING)
     db.commit()
     db.refresh(db_history)
     return db_history
@@ -56,7 +95,7 @@ def complete_ride_history(db: Session, history_id: int, rating_given: int = None
     now_pakistan = datetime.now(pakistan_tz).replace(tzinfo=None)
     db_history.completed_at = now_pakistan
     if rating_given:
-        db_history.rating_given = rating_given
+        _apply_rating_given(db, db_history, rating_given)
     
     db.commit()
     db.refresh(db_history)
@@ -69,6 +108,7 @@ def update_received_rating(db: Session, history_id: int, rating: int) -> Optiona
     if not db_history:
         return None
     
+    increment_user_stats(db, db_history.user_id, rider_rating_sum=rating_delta(db_history.rating_received, rating))
     db_history.rating_received = rating
     db.commit()
     db.refresh(db_history)
@@ -81,7 +121,7 @@ def update_rating_given(db: Session, history_id: int, rating: int) -> Optional[R
     if not db_history:
         return None
     
-    db_history.rating_given = rating
+    _apply_rating_given(db, db_history, rating)
     db.commit()
     db.refresh(db_history)
     return db_history
\ No newline at end of file
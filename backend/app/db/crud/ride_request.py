@@ -1,15 +1,58 @@
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from sqlalchemy import case, func, or_, update
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 from app.db.models.ride_request import RideRequest
 from app.db.models.ride import Ride
+from app.core.cache import invalidate
+from app.services.event_bus import event_bus
 
 
+# Bulk updates are retried this many times when another writer changes
+# the same requests or rides between the read and the write
+BULK_UPDATE_ATTEMPTS = 3
+
+# Upper bound on the pairs accepted by one bulk update
+MAX_BULK_UPDATES = 200
+
+
+class NoSeatsAvailable(Exception):
+    """Raised when accepting a request on a ride that has no seats left"""
+
+
+class ConcurrentUpdate(Exception):
+    """Raised when a bulk update keeps losing races with other writers"""
+
+
+# Request statuses the rider is told about, as ride_request_<status> events
+NOTIFIED_REQUEST_STATUSES = ("accepted", "rejected")
+
+
+def _request_event(request: RideRequest) -> Dict:
+    return {
+        "id": request.id,
+        "ride_id": request.ride_id,
+        "rider_id": request.rider_id,
+        "status": request.status,
+        "message": request.message,
+        "requested_at": request.requested_at,
+    }
+
+def _publish_request_status(request: RideRequest) -> None:
+    if request.status in NOTIFIED_REQUEST_STATUSES:
+        event_bus.publish(
+            [request.rider_id], f"ride_request_{request.status}", _request_event(request),
+            coalesce_key=("request", request.id)
+        )
+
 def create_ride_request(db: Session, ride_id: int, rider_id: int, message: str = None) -> RideRequest:
     db_request = RideRequest(ride_id=ride_id, rider_id=rider_id, message=message)
     db.add(db_request)
     db.commit()
     db.refresh(db_request)
+    driver_id = db.query(Ride.driver_id).filter(Ride.id == ride_id).scalar()
+    if driver_id is not None:
+        event_bus.publish([driver_id], "new_ride_request", _request_event(db_request))
     return db_request
 
 def get_ride_requests(db: Session, ride_id: int) -> List[RideRequest]:
@@ -34,8 +77,7 @@ def get_user_ride_requests(db: Session, user_id: int) -> List[RideRequest]:
         )\
         .all()
 
-def get_driver_ride_requests(db: Session, driver_id: int) -> List[RideRequest]:
-    """Get all ride requests for rides owned by the driver"""
+def _driver_ride_requests_query(db: Session, driver_id: int):
     return (db.query(RideRequest)
             .join(Ride, RideRequest.ride_id == Ride.id)
             .options(
@@ -44,17 +86,215 @@ def get_driver_ride_requests(db: Session, driver_id: int) -> List[RideRequest]:
                 joinedload(RideRequest.ride).joinedload(Ride.car)
             )
             .filter(Ride.driver_id == driver_id,Ride.status == 'active')
-            .order_by(RideRequest.requested_at.desc())
-            .all())
+            .order_by(RideRequest.requested_at.desc()))
+
+def get_driver_ride_requests(db: Session, driver_id: int) -> List[RideRequest]:
+    """Get all ride requests for rides owned by the driver"""
+    return _driver_ride_requests_query(db, driver_id).all()
+
+def iter_driver_ride_requests(db: Session, driver_id: int, batch_size: int = 500) -> Iterator[RideRequest]:
+    """Same rows as get_driver_ride_requests, fetched batch_size at a time"""
+    return iter(_driver_ride_requests_query(db, driver_id).yield_per(batch_size))
+
+def get_driver_ride_requests_after(
+    db: Session,
+    driver_id: int,
+    after_id: int,
+    skip_ids: Iterable[int],
+    limit: int
+) -> List[RideRequest]:
+    """
+    Requests for the driver's active rides with an id above after_id, oldest
+    first, leaving out skip_ids (those already handed out)
+    """
+    query = _driver_ride_requests_query(db, driver_id).filter(RideRequest.id > after_id)
+    skip_ids = list(skip_ids)
+    if skip_ids:
+        query = query.filter(RideRequest.id.notin_(skip_ids))
+    return query.order_by(None).order_by(RideRequest.id).limit(limit).all()
+
+def get_last_ride_request_id(db: Session, requested_before: Optional[datetime] = None) -> int:
+    """
+    Highest request id; with requested_before, the highest among requests
+    made before then, found by walking the primary key down from the newest
+    """
+    if requested_before is None:
+        return db.query(func.max(RideRequest.id)).scalar() or 0
+    return (db.query(RideRequest.id)
+            .filter(RideRequest.requested_at < requested_before)
+            .order_by(RideRequest.id.desc())
+            .limit(1)
+            .scalar()) or 0
+
+def _set_request_status(db: Session, request_id: int, status: str, *conditions) -> bool:
+    result = db.execute(
+        update(RideRequest)
+        .where(RideRequest.id == request_id, *conditions)
+        .values(status=status)
+    )
+    return result.rowcount == 1
+
+def _move_seat(db: Session, ride_id: int, delta: int) -> bool:
+    """Take (-1) or give back (+1) a seat; taking only succeeds while one is left"""
+    conditions = [Ride.id == ride_id]
+    if delta < 0:
+        conditions.append(Ride.seats_available >= -delta)
+    result = db.execute(
+        update(Ride)
+        .where(*conditions)
+        .values(seats_available=Ride.seats_available + delta, version=Ride.version + 1)
+    )
+    invalidate(db, ("ride", ride_id))
+    return result.rowcount == 1
 
-def update_ride_request_status(db: Session, request_id: int, status: str) -> Optional[RideRequest]:
-    db_request = db.query(RideRequest).filter(RideRequest.id == request_id).first()
-    if not db_request:
+def update_ride_request_status(
+    db: Session,
+    request_id: int,
+    status: str,
+    driver_id: Optional[int] = None
+) -> Optional[RideRequest]:
+    """
+    Change a request's status and keep the ride's seat count in step: moving
+    into 'accepted' takes a seat, moving out of it gives the seat back. With
+    driver_id only requests on that driver's rides are found.
+
+    Both the status flip and the seat change are conditional UPDATEs, so
+    concurrent accepts on one ride serialise on the row locks and can never
+    take more seats than are available. Raises NoSeatsAvailable (after
+    rolling back) when the ride is full. Returns None when the request does
+    not exist, including when it is archived while being updated.
+    """
+    query = db.query(RideRequest.ride_id).filter(RideRequest.id == request_id)
+    if driver_id is not None:
+        query = query.join(Ride, RideRequest.ride_id == Ride.id).filter(Ride.driver_id == driver_id)
+    ride_id = query.scalar()
+    if ride_id is None:
         return None
-    db_request.status = status
+
+    if status == "accepted":
+        if _set_request_status(db, request_id, status, RideRequest.status != "accepted"):
+            if not _move_seat(db, ride_id, -1):
+                db.rollback()
+                raise NoSeatsAvailable(ride_id)
+    else:
+        # Retry if the request is accepted concurrently between the two flips
+        while True:
+            if _set_request_status(db, request_id, status, RideRequest.status == "accepted"):
+                _move_seat(db, ride_id, 1)
+                break
+            if _set_request_status(db, request_id, status, RideRequest.status != "accepted"):
+                break
+            # Neither flip matched: the row may be gone rather than flipped
+            if db.query(RideRequest.id).filter(RideRequest.id == request_id).scalar() is None:
+                db.rollback()
+                return None
+
     db.commit()
-    db.refresh(db_request)
-    return db_request
+    updated = db.query(RideRequest).filter(RideRequest.id == request_id).populate_existing().first()
+    _publish_request_status(updated)
+    return updated
+
+def _bulk_result(request_id: int, ok: bool, status: Optional[str] = None, code: Optional[str] = None) -> Dict:
+    return {"request_id": request_id, "ok": ok, "status": status, "code": code}
+
+def _try_bulk_update(db: Session, driver_id: int, updates: List[Tuple[int, str]]) -> Optional[List[Dict]]:
+    """One attempt of bulk_update_ride_request_status; None if a guard lost a race"""
+    rows = (db.query(RideRequest.id, RideRequest.ride_id, RideRequest.status)
+            .join(Ride, RideRequest.ride_id == Ride.id)
+            .filter(RideRequest.id.in_({request_id for request_id, _ in updates}), Ride.driver_id == driver_id)
+            .order_by(RideRequest.id)
+            .with_for_update(of=RideRequest)
+            .all())
+    ride_of = {request_id: ride_id for request_id, ride_id, _ in rows}
+    old_status = {request_id: status for request_id, _, status in rows}
+    old_seats = dict(db.query(Ride.id, Ride.seats_available)
+                     .filter(Ride.id.in_(set(ride_of.values())))
+                     .order_by(Ride.id)
+                     .with_for_update()
+                     .all())
+    new_status = dict(old_status)
+    new_seats = dict(old_seats)
+
+    results: Dict[int, Dict] = {}
+    pending = []
+    seen = set()
+    for index, (request_id, status) in enumerate(updates):
+        if request_id not in ride_of:
+            results[index] = _bulk_result(request_id, False, code="not_found")
+        elif request_id in seen:
+            results[index] = _bulk_result(request_id, False, code="duplicate")
+        else:
+            seen.add(request_id)
+            pending.append((index, request_id, status))
+
+    # Releases go first so one batch can swap an accepted rider for another
+    pending.sort(key=lambda item: item[2] == "accepted")
+    for index, request_id, status in pending:
+        ride_id = ride_of[request_id]
+        current = new_status[request_id]
+        if status != current and status == "accepted":
+            if new_seats[ride_id] < 1:
+                results[index] = _bulk_result(request_id, False, current, "ride_full")
+                continue
+            new_seats[ride_id] -= 1
+        elif status != current and current == "accepted":
+            new_seats[ride_id] += 1
+        new_status[request_id] = status
+        results[index] = _bulk_result(request_id, True, status)
+
+    # Compare-and-set against the values read above. With row locks (Postgres)
+    # the guards always hold; without them (SQLite) they catch interleaved writers.
+    changed = {request_id: status for request_id, status in new_status.items() if status != old_status[request_id]}
+    if changed:
+        result = db.execute(
+            update(RideRequest)
+            .where(
+                RideRequest.id.in_(list(changed)),
+                RideRequest.status == case({request_id: old_status[request_id] for request_id in changed}, value=RideRequest.id)
+            )
+            .values(status=case(changed, value=RideRequest.id))
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(changed):
+            return None
+
+    moved = {ride_id: seats for ride_id, seats in new_seats.items() if seats != old_seats[ride_id]}
+    if moved:
+        result = db.execute(
+            update(Ride)
+            .where(
+                Ride.id.in_(list(moved)),
+                Ride.seats_available == case({ride_id: old_seats[ride_id] for ride_id in moved}, value=Ride.id)
+            )
+            .values(seats_available=case(moved, value=Ride.id), version=Ride.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(moved):
+            return None
+        invalidate(db, *[("ride", ride_id) for ride_id in moved])
+
+    return [results[index] for index in range(len(updates))]
+
+def bulk_update_ride_request_status(db: Session, driver_id: int, updates: List[Tuple[int, str]]) -> List[Dict]:
+    """
+    Apply (request_id, status) pairs to requests on the driver's rides in a
+    single transaction, with the same seat rules as update_ride_request_status.
+    Returns one result per pair, in order: requests that are missing or not
+    on the driver's rides are not_found, repeats of a request are duplicate
+    and accepts beyond the free seats are ride_full. Everything else is
+    written with one UPDATE for the requests and one for the rides.
+    """
+    for _ in range(BULK_UPDATE_ATTEMPTS):
+        results = _try_bulk_update(db, driver_id, updates)
+        if results is not None:
+            db.commit()
+            updated_ids = {result["request_id"] for result in results if result["ok"]}
+            if updated_ids:
+                for request in db.query(RideRequest).filter(RideRequest.id.in_(updated_ids)).populate_existing():
+                    _publish_request_status(request)
+            return results
+        db.rollback()
+    raise ConcurrentUpdate(driver_id)
 
 def user_already_requested(db: Session, ride_id: int, user_id: int) -> bool:
     return db.query(RideRequest).filter(
@@ -73,4 +313,31 @@ def get_existing_request_time(db: Session, ride_id: int, user_id: int) -> str:
 
     if existing_request:
         return existing_request.requested_at.isoformat()
-    return None
\ No newline at end of file
+    return None
+
+def expire_stale_requests(db: Session, departed_before: datetime, requested_before: datetime, batch_size: int) -> int:
+    """
+    Move up to batch_size pending requests to 'expired' and commit: those on
+    rides that are no longer active or have departed, and those older than
+    requested_before. Returns the number of requests expired.
+    """
+    request_ids = [request_id for (request_id,) in db.query(RideRequest.id).join(
+        Ride, RideRequest.ride_id == Ride.id
+    ).filter(
+        RideRequest.status == "pending",
+        or_(
+            Ride.status != "active",
+            Ride.start_time < departed_before,
+            RideRequest.requested_at < requested_before
+        )
+    ).limit(batch_size)]
+    if not request_ids:
+        return 0
+    result = db.execute(
+        update(RideRequest)
+        .where(RideRequest.id.in_(request_ids), RideRequest.status == "pending")
+        .values(status="expired")
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
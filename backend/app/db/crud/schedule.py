@@ -1,13 +1,26 @@
 from sqlalchemy.orm import Session
 from typing import List
+from app.core.cache import invalidate, read_cache
+from app.db.crud.commute_suggestion import refresh_commute_suggestions
 from app.db.models.schedule import Schedule
+from app.schema.schedule import ScheduleResponse
 
-def get_user_schedule(db: Session, user_id: int) -> List[Schedule]:
-    return db.query(Schedule).filter(Schedule.user_id == user_id).all()
+def get_user_schedule(db: Session, user_id: int) -> List[ScheduleResponse]:
+    return read_cache.get_or_load(
+        f"user-schedule:{user_id}",
+        [("schedule", user_id)],
+        lambda: [
+            ScheduleResponse.model_validate(schedule)
+            for schedule in db.query(Schedule).filter(Schedule.user_id == user_id).all()
+        ]
+    )
 
 def create_schedule(db: Session, schedule_data: dict, user_id: int) -> Schedule:
     db_schedule = Schedule(**schedule_data, user_id=user_id)
     db.add(db_schedule)
+    db.flush()
+    refresh_commute_suggestions(db, user_id)
+    invalidate(db, ("schedule", user_id))
     db.commit()
     db.refresh(db_schedule)
-    return db_schedule
\ No newline at end of file
+    return db_schedule
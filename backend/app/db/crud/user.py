@@ -1,8 +1,12 @@
 import json
 from sqlalchemy.orm import Session
 from typing import Optional
+from app.core.cache import invalidate, read_cache
+from app.core.etag import make_etag
+from app.db.crud.commute_suggestion import refresh_commute_suggestions
 from app.db.models.user import User
-from app.schema.user import UserCreate, UserUpdate
+from app.db.models.user_stats import UserStats
+from app.schema.user import CurrentUser, UserCreate, UserUpdate
 
 def get_user(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
@@ -13,6 +17,16 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
 def get_user_by_phone(db: Session, phone: str) -> Optional[User]:
     return db.query(User).filter(User.phone == phone).first()
 
+def get_user_snapshot(db: Session, user_id: int) -> Optional[CurrentUser]:
+    """Cached CurrentUser for the user, rebuilt after update_user changes them"""
+    def load() -> Optional[CurrentUser]:
+        # Usually just resolved from the token in this session, so the
+        # identity map answers without a query
+        user = db.get(User, user_id)
+        return CurrentUser.model_validate(user) if user else None
+
+    return read_cache.get_or_load(f"user-snapshot:{user_id}", [("user", user_id)], load)
+
 def create_user(db: Session, user: UserCreate) -> User:
     db_user = User(
         name=user.name,
@@ -40,9 +54,29 @@ def update_user(db: Session, user_id: int, update_data: dict) -> Optional[User]:
                 update_data['preferences'] = None
         elif isinstance(update_data['preferences'], dict):
             update_data['preferences'] = json.dumps(update_data['preferences'])
+    driver_flag_changed = 'is_driver' in update_data and update_data['is_driver'] != db_user.is_driver
     for field, value in update_data.items():
         setattr(db_user, field, value)
+    db_user.version = User.version + 1
+    if driver_flag_changed:
+        db.flush()
+        refresh_commute_suggestions(db, user_id)
     
+    invalidate(db, ("user", user_id))
     db.commit()
     db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    return db_user
+
+def user_profile_etag(user: User, stats: Optional[UserStats]) -> str:
+    """ETag of the public profile built from the user and their stats row"""
+    return make_etag("profile", user.id, user.version, stats.version if stats else 0)
+
+def get_user_profile_etag(db: Session, user_id: int) -> Optional[str]:
+    """Current ETag of the user's public profile from a single version lookup, None if the user does not exist"""
+    row = db.query(User.version, UserStats.version).outerjoin(
+        UserStats, UserStats.user_id == User.id
+    ).filter(User.id == user_id).first()
+    if not row:
+        return None
+    user_version, stats_version = row
+    return make_etag("profile", user_id, user_version, stats_version or 0)
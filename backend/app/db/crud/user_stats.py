@@ -0,0 +1,114 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, List, Optional
+from app.core.cache import invalidate
+from app.db.models.user_stats import UserStats
+from app.db.models.ride import Ride
+from app.db.models.ride_history import RideHistory
+from app.db.models.archive import RideArchive, RideHistoryArchive
+from app.db.models.user import User
+
+# Rating used in place of a missing rating, matching the old coalesce(..., 5)
+DEFAULT_RATING = 5
+
+STAT_COLUMNS = (
+    "rides_taken",
+    "rides_offered",
+    "rider_rating_sum",
+    "driver_rating_sum",
+    "driver_rating_count",
+)
+
+
+def get_user_stats(db: Session, user_id: int) -> Optional[UserStats]:
+    return db.query(UserStats).filter(UserStats.user_id == user_id).first()
+
+def get_users_stats(db: Session, user_ids: List[int]) -> Dict[int, UserStats]:
+    if not user_ids:
+        return {}
+    rows = db.query(UserStats).filter(UserStats.user_id.in_(set(user_ids))).all()
+    return {row.user_id: row for row in rows}
+
+def increment_user_stats(db: Session, user_id: int, **deltas: int) -> None:
+    """
+    Add deltas to a user's rollup row without committing, so the change lands
+    in the caller's transaction. The row is created on first use.
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    invalidate(db, ("user_stats", user_id))
+    values = {column: getattr(UserStats, column) + delta for column, delta in deltas.items()}
+    values["version"] = UserStats.version + 1
+    result = db.execute(
+        update(UserStats).where(UserStats.user_id == user_id).values(**values)
+    )
+    if result.rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.add(UserStats(user_id=user_id, **{column: deltas.get(column, 0) for column in STAT_COLUMNS}))
+    except IntegrityError:
+        # Another transaction created the row first
+        db.execute(update(UserStats).where(UserStats.user_id == user_id).values(**values))
+
+def rating_delta(old: Optional[int], new: Optional[int]) -> int:
+    """Change in rating total when a rating goes from old to new; None counts as DEFAULT_RATING like the rebuild"""
+    return (DEFAULT_RATING if new is None else new) - (DEFAULT_RATING if old is None else old)
+
+def rebuild_user_stats(db: Session, user_ids: Optional[List[int]] = None) -> int:
+    """
+    Recompute rollup rows from rides and ride_history, archived ones
+    included. Returns the number of users written.
+    """
+    user_query = db.query(User.id)
+    stale_query = db.query(UserStats)
+    if user_ids is not None:
+        user_query = user_query.filter(User.id.in_(user_ids))
+        stale_query = stale_query.filter(UserStats.user_id.in_(user_ids))
+
+    target_ids = [user_id for (user_id,) in user_query.all()]
+    stats = {user_id: dict.fromkeys(STAT_COLUMNS, 0) for user_id in target_ids}
+
+    for ride_model, history_model in ((Ride, RideHistory), (RideArchive, RideHistoryArchive)):
+        rider_query = db.query(
+            history_model.user_id,
+            func.count(history_model.id),
+            func.sum(func.coalesce(history_model.rating_received, DEFAULT_RATING))
+        )
+        offered_query = db.query(
+            ride_model.driver_id,
+            func.count(ride_model.id)
+        )
+        driver_query = db.query(
+            ride_model.driver_id,
+            func.count(history_model.id),
+            func.sum(func.coalesce(history_model.rating_given, DEFAULT_RATING))
+        ).join(
+            ride_model, history_model.ride_id == ride_model.id
+        )
+        if user_ids is not None:
+            rider_query = rider_query.filter(history_model.user_id.in_(user_ids))
+            offered_query = offered_query.filter(ride_model.driver_id.in_(user_ids))
+            driver_query = driver_query.filter(ride_model.driver_id.in_(user_ids))
+
+        for user_id, taken, rating_sum in rider_query.group_by(history_model.user_id).all():
+            stats[user_id]["rides_taken"] += taken
+            stats[user_id]["rider_rating_sum"] += rating_sum or 0
+        for driver_id, offered in offered_query.group_by(ride_model.driver_id).all():
+            stats[driver_id]["rides_offered"] += offered
+        for driver_id, count, rating_sum in driver_query.group_by(ride_model.driver_id).all():
+            stats[driver_id]["driver_rating_count"] += count
+            stats[driver_id]["driver_rating_sum"] += rating_sum or 0
+
+    # Rebuilt rows continue their old version so no ETag is ever reused
+    versions = dict(stale_query.with_entities(UserStats.user_id, UserStats.version).all())
+    stale_query.delete(synchronize_session=False)
+    db.add_all([
+        UserStats(user_id=user_id, version=versions.get(user_id, 0) + 1, **values)
+        for user_id, values in stats.items()
+    ])
+    invalidate(db, *[("user_stats", user_id) for user_id in stats])
+    db.commit()
+    return len(stats)
@@ -7,6 +7,11 @@ from .message import Message
 from .location import PreferredLocation
 from .schedule import Schedule
 from .ride_history import RideHistory
+from .user_stats import UserStats
+from .archive import RideArchive, RideRequestArchive, RideHistoryArchive
+from .commute_suggestion import CommuteSuggestion
+from .conversation import Conversation
+from .unread_count import UnreadCount
 
 __all__ = [
     "Base",
@@ -17,5 +22,12 @@ __all__ = [
     "Message",
     "PreferredLocation",
     "Schedule",
-    "RideHistory"
+    "RideHistory",
+    "UserStats",
+    "RideArchive",
+    "RideRequestArchive",
+    "RideHistoryArchive",
+    "CommuteSuggestion",
+    "Conversation",
+    "UnreadCount"
 ]
\ No newline at end of file
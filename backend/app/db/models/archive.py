@@ -0,0 +1,75 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+# Cold copies of finished rides and their requests and history, moved out of
+# the hot tables by app.db.crud.archive. Rows keep their original ids.
+
+class RideArchive(Base):
+    __tablename__ = "rides_archive"
+
+    id = Column(Integer, primary_key=True)
+    driver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    car_id = Column(Integer, ForeignKey("cars.id"), nullable=False)
+    start_location = Column(String, nullable=False)
+    end_location = Column(String, nullable=False)
+    start_latitude = Column(Float, nullable=True)
+    start_longitude = Column(Float, nullable=True)
+    end_latitude = Column(Float, nullable=True)
+    end_longitude = Column(Float, nullable=True)
+    route_polyline = Column(JSON, nullable=True)
+    start_time = Column(DateTime, nullable=False)
+    seats_available = Column(Integer, nullable=False)
+    total_fare = Column(Float, nullable=True)
+    status = Column(String, nullable=False)  # end, expired
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    driver = relationship("User", foreign_keys=[driver_id])
+    car = relationship("Car")
+
+    __table_args__ = (
+        Index("ix_rides_archive_driver_id_status_start_time", "driver_id", "status", "start_time"),
+    )
+
+
+class RideRequestArchive(Base):
+    __tablename__ = "ride_requests_archive"
+
+    id = Column(Integer, primary_key=True)
+    rider_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    ride_id = Column(Integer, ForeignKey("rides_archive.id"), nullable=False)
+    status = Column(String, nullable=False)
+    requested_at = Column(DateTime(timezone=True), nullable=True)
+    message = Column(Text, nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_ride_requests_archive_ride_id", "ride_id"),
+    )
+
+
+class RideHistoryArchive(Base):
+    __tablename__ = "ride_history_archive"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    ride_id = Column(Integer, ForeignKey("rides_archive.id"), nullable=False)
+    role = Column(String, nullable=False)  # driver, rider
+    joined_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    rating_given = Column(Integer, nullable=True)
+    rating_received = Column(Integer, nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    user = relationship("User")
+    ride = relationship("RideArchive")
+
+    __table_args__ = (
+        Index("ix_ride_history_archive_user_id_completed_at", "user_id", "completed_at"),
+        Index("ix_ride_history_archive_ride_id", "ride_id"),
+    )
@@ -15,6 +15,7 @@ class Car(Base):
     seats = Column(Integer, nullable=False)
     ac_available = Column(Boolean, nullable=False, default=False)  # New field
     photo_url = Column(Text, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # bumped on every write, backs the ETag
 
     user = relationship("User", back_populates="cars")
     rides = relationship("Ride", back_populates="car")
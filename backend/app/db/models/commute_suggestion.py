@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CommuteSuggestion(Base):
+    """A driver whose weekly commute matches a rider's, kept up to date by app.db.crud.commute_suggestion"""
+    __tablename__ = "commute_suggestions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    rider_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    driver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    shared_days = Column(JSON, nullable=False)  # [day_of_week, ...], 0=Monday
+    home_distance_km = Column(Float, nullable=False)
+    work_distance_km = Column(Float, nullable=False)
+    time_difference_minutes = Column(Float, nullable=False)  # average over shared days
+    score = Column(Float, nullable=False)  # higher is better
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    rider = relationship("User", foreign_keys=[rider_id])
+    driver = relationship("User", foreign_keys=[driver_id])
+
+    __table_args__ = (
+        # GET /api/rides/suggestions: rider_id = ? ORDER BY score DESC
+        Index("ix_commute_suggestions_rider_id_score", "rider_id", "score"),
+        Index("ix_commute_suggestions_driver_id", "driver_id"),
+    )
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+# Characters of the last message kept for the inbox
+PREVIEW_LENGTH = 200
+
+class Conversation(Base):
+    """Inbox row of a pair of users, maintained by app.db.crud.messages.create_message"""
+    __tablename__ = "conversations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_low_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # smaller user id of the pair
+    user_high_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # larger user id of the pair
+    last_message_id = Column(Integer, ForeignKey("messages.id"), nullable=False)
+    last_message_preview = Column(String(PREVIEW_LENGTH), nullable=False)
+    last_message_at = Column(DateTime(timezone=True), nullable=False)
+    last_ride_id = Column(Integer, ForeignKey("rides.id"), nullable=True)  # ride_id of the last message
+    low_unread_count = Column(Integer, nullable=False, default=0)  # messages to user_low_id not yet read
+    high_unread_count = Column(Integer, nullable=False, default=0)  # messages to user_high_id not yet read
+
+    # Relationships
+    user_low = relationship("User", foreign_keys=[user_low_id])
+    user_high = relationship("User", foreign_keys=[user_high_id])
+
+    __table_args__ = (
+        Index("ux_conversations_user_low_id_user_high_id", "user_low_id", "user_high_id", unique=True),
+        # Inbox: user_low_id = ? OR user_high_id = ? ORDER BY last_message_at DESC
+        Index("ix_conversations_user_low_id_last_message_at", "user_low_id", "last_message_at"),
+        Index("ix_conversations_user_high_id_last_message_at", "user_high_id", "last_message_at"),
+    )
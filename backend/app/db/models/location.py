@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -14,4 +14,10 @@ class PreferredLocation(Base):
     longitude = Column(Float, nullable=True)
 
     # Relationships
-    user = relationship("User", back_populates="preferred_locations")
\ No newline at end of file
+    user = relationship("User", back_populates="preferred_locations")
+
+    __table_args__ = (
+        # Commute matcher: saved locations inside a bounding box
+        Index("ix_preferred_locations_latitude_longitude", "latitude", "longitude"),
+        Index("ix_preferred_locations_user_id", "user_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -12,8 +12,23 @@ class Message(Base):
     ride_id = Column(Integer, ForeignKey("rides.id"), nullable=True)
     content = Column(Text, nullable=False)
     sent_at = Column(DateTime(timezone=True), server_default=func.now())
+    read_at = Column(DateTime(timezone=True), nullable=True)  # set when the receiver marks the conversation read
 
     # Relationships
     sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_messages")
     receiver = relationship("User", foreign_keys=[receiver_id], back_populates="received_messages")
-    ride = relationship("Ride", back_populates="messages")
\ No newline at end of file
+    ride = relationship("Ride", back_populates="messages")
+
+    # sent_at comes back with the INSERT, so the conversation row can be
+    # written right after the flush
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # History pages of one direction of a conversation, in id order
+        Index("ix_messages_sender_id_receiver_id_id", "sender_id", "receiver_id", "id"),
+        # Mark-read only visits the messages still unread
+        Index(
+            "ix_messages_receiver_id_sender_id_unread", "receiver_id", "sender_id",
+            sqlite_where=read_at.is_(None), postgresql_where=read_at.is_(None)
+        ),
+    )
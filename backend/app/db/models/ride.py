@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -11,13 +11,27 @@ class Ride(Base):
     car_id = Column(Integer, ForeignKey("cars.id"), nullable=False)
     start_location = Column(String, nullable=False)  # String field as expected by PostgreSQL
     end_location = Column(String, nullable=False)    # String field as expected by PostgreSQL
+    start_latitude = Column(Float, nullable=True)
+    start_longitude = Column(Float, nullable=True)
+    end_latitude = Column(Float, nullable=True)
+    end_longitude = Column(Float, nullable=True)
+    route_polyline = Column(JSON, nullable=True)     # Simplified [[lat, lng], ...] from start to end
     start_time = Column(DateTime, nullable=False)
     seats_available = Column(Integer, nullable=False)
     total_fare = Column(Float, nullable=True)        # Added as used in CRUD
-    status = Column(String, nullable=False, default="active")  # pending, confirmed, in_progress, completed, cancelled
+    status = Column(String, nullable=False, default="active")  # active, end (completed), expired (departed and never completed)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # bumped on every write, backs the ETag
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())  # set on every write, drives the in-process indexes
 
     # Relationships
     driver = relationship("User", foreign_keys=[driver_id], back_populates="driver_rides")
     car = relationship("Car", back_populates="rides")
     ride_requests = relationship("RideRequest", back_populates="ride")
-    messages = relationship("Message", back_populates="ride")
\ No newline at end of file
+    messages = relationship("Message", back_populates="ride")
+
+    __table_args__ = (
+        # Feed keyset pagination: status = 'active' ORDER BY start_time, id
+        Index("ix_rides_status_start_time_id", "status", "start_time", "id"),
+        Index("ix_rides_driver_id_status", "driver_id", "status"),
+        Index("ix_rides_updated_at", "updated_at"),
+    )
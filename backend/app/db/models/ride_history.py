@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -17,4 +17,9 @@ class RideHistory(Base):
 
     # Relationships
     user = relationship("User", back_populates="ride_history")
-    ride = relationship("Ride")
\ No newline at end of file
+    ride = relationship("Ride")
+
+    __table_args__ = (
+        Index("ix_ride_history_user_id_completed_at", "user_id", "completed_at"),
+        Index("ix_ride_history_ride_id", "ride_id"),
+    )
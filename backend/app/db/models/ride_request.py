@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -9,10 +9,16 @@ class RideRequest(Base):
     id = Column(Integer, primary_key=True, index=True)
     rider_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     ride_id = Column(Integer, ForeignKey("rides.id"), nullable=False)
-    status = Column(String, nullable=False, default="pending")  # pending, accepted, rejected
+    status = Column(String, nullable=False, default="pending")  # pending, accepted, rejected, expired
     requested_at = Column(DateTime(timezone=True), server_default=func.now())
     message = Column(Text, nullable=True)
 
     # Relationships
     rider = relationship("User", back_populates="ride_requests")
-    ride = relationship("Ride", back_populates="ride_requests")
\ No newline at end of file
+    ride = relationship("Ride", back_populates="ride_requests")
+
+    __table_args__ = (
+        Index("ux_ride_requests_ride_id_rider_id", "ride_id", "rider_id", unique=True),
+        Index("ix_ride_requests_ride_id_status", "ride_id", "status"),
+        Index("ix_ride_requests_status_requested_at", "status", "requested_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -14,4 +14,8 @@ class Schedule(Base):
     end_time = Column(Time, nullable=True)
 
     # Relationships
-    user = relationship("User", back_populates="schedules")
\ No newline at end of file
+    user = relationship("User", back_populates="schedules")
+
+    __table_args__ = (
+        Index("ix_schedules_user_id", "user_id"),
+    )
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from app.core.database import Base
+
+class UnreadCount(Base):
+    """Messages a user has received and not read yet, maintained by app.db.crud.messages"""
+    __tablename__ = "unread_counts"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    messages = Column(Integer, nullable=False, default=0)
@@ -18,6 +18,7 @@ class User(Base):
     trust_score = Column(Float, default=0.0)
     preferences = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # bumped on every write, backs the ETag
 
     cars = relationship("Car", back_populates="user")
     driver_rides = relationship("Ride", foreign_keys="Ride.driver_id", back_populates="driver")
@@ -27,3 +28,4 @@ class User(Base):
     preferred_locations = relationship("PreferredLocation", back_populates="user")
     schedules = relationship("Schedule", back_populates="user")
     ride_history = relationship("RideHistory", back_populates="user")
+    stats = relationship("UserStats", back_populates="user", uselist=False)
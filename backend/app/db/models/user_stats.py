@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+class UserStats(Base):
+    """Rollup of per-user ride counts and rating sums, maintained by the CRUD write paths"""
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    rides_taken = Column(Integer, nullable=False, default=0)  # ride_history rows of the user
+    rides_offered = Column(Integer, nullable=False, default=0)  # rides driven by the user
+    rider_rating_sum = Column(Integer, nullable=False, default=0)  # sum of coalesce(rating_received, 5)
+    driver_rating_sum = Column(Integer, nullable=False, default=0)  # sum of coalesce(rating_given, 5) on the user's rides
+    driver_rating_count = Column(Integer, nullable=False, default=0)  # ride_history rows on the user's rides
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # bumped on every write, backs the ETag
+
+    # Relationships
+    user = relationship("User", back_populates="stats")
+
+    @property
+    def rider_rating(self) -> float:
+        return round(self.rider_rating_sum / self.rides_taken, 1) if self.rides_taken > 0 else 0
+
+    @property
+    def driver_rating(self) -> float:
+        if self.rides_offered > 0 and self.driver_rating_count > 0:
+            return round(self.driver_rating_sum / self.driver_rating_count, 1)
+        return 0
@@ -6,6 +6,10 @@ from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.database import engine, Base
+from app.core.cache import read_cache
+from app.services.event_bus import event_bus
+from app.services.lifecycle_sweeper import lifecycle_sweeper
+from app.services.message_writer import message_writer
 
 # Import all models to ensure they are registered with SQLAlchemy
 from app.db.models import *
@@ -13,9 +17,17 @@ from app.db.models import *
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
+    # Schema is managed by Alembic (`alembic upgrade head`)
+    if settings.DB_CREATE_ALL:
+        Base.metadata.create_all(bind=engine)
+    await event_bus.start()
+    await message_writer.start()
+    if settings.LIFECYCLE_SWEEP_ENABLED:
+        lifecycle_sweeper.start()
     yield
+    await lifecycle_sweeper.stop()
+    await message_writer.stop()
+    await event_bus.stop()
 
 
 app = FastAPI(
@@ -32,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -42,6 +55,8 @@ from app.api.messages import router as messages_router
 from app.api.cars import router as cars_router
 from app.api.locations import router as locations_router
 from app.api.genai import router as genai_router
+from app.api.ws import router as ws_router
+from app.api.changes import router as changes_router
 
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users_router, prefix="/api/users", tags=["Users"])
@@ -50,6 +65,8 @@ app.include_router(messages_router, prefix="/api/messages", tags=["Messages"])
 app.include_router(cars_router, prefix="/api/cars", tags=["Cars"])
 app.include_router(locations_router, prefix="/api/locations", tags=["Locations"])
 app.include_router(genai_router, prefix="/api/genai-chat", tags=["GenAI"])
+app.include_router(ws_router, tags=["WebSocket"])
+app.include_router(changes_router, prefix="/api/changes", tags=["Changes"])
 
 
 @app.get("/")
@@ -75,10 +92,21 @@ async def health_check():
     - Monitoring systems can ping this to ensure API is running
     - DevOps teams use this for automated health checks
     - Returns 200 status if the API is operational
+    - Reports the CRUD read cache hit/miss counters of this worker
+    - Reports what the lifecycle sweeper of this worker has expired
+    - Reports the /ws connections and events of this worker
+    - Reports the batches of the message group commit of this worker
     """
-    return {"status": "healthy", "message": "API is running"}
+    return {
+        "status": "healthy",
+        "message": "API is running",
+        "cache": read_cache.stats(),
+        "lifecycle_sweeper": lifecycle_sweeper.stats(),
+        "websocket": event_bus.stats(),
+        "message_writer": message_writer.stats(),
+    }
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True, ws_per_message_deflate=False)
\ No newline at end of file
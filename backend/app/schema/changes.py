@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List
+
+from app.schema.message import ConversationMessageResponse
+from app.schema.ride import RideRequestResponse
+
+
+class ChangesResponse(BaseModel):
+    messages: List[ConversationMessageResponse]  # received, oldest first
+    ride_requests: List[RideRequestResponse]  # for the user's rides as driver, oldest first
+    cursor: str  # opaque, pass back as cursor
+    has_more: bool  # more changes are waiting, poll again right away
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
 
@@ -29,6 +29,7 @@ class MessageResponse(MessageBase):
     id: int
     sender_id: int
     sent_at: datetime
+    read_at: Optional[datetime] = None
     sender: Optional[UserInMessage] = None
     receiver: Optional[UserInMessage] = None
 
@@ -36,6 +37,22 @@ class MessageResponse(MessageBase):
         from_attributes = True
 
 
+class ConversationMessageResponse(MessageBase):
+    id: int
+    sender_id: int
+    sent_at: datetime
+    read_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ConversationHistoryResponse(BaseModel):
+    participants: List[UserInMessage]
+    messages: List[ConversationMessageResponse]  # oldest first
+    has_more: bool  # messages remain beyond this page in the direction read
+
+
 class ConversationResponse(BaseModel):
     user_id: int
     user_name: str
@@ -43,4 +60,29 @@ class ConversationResponse(BaseModel):
     last_message: str
     last_message_time: datetime
     last_message_id: int
-    ride_id: Optional[int] = None
\ No newline at end of file
+    ride_id: Optional[int] = None
+    unread_count: int = 0
+
+
+class MarkReadRequest(BaseModel):
+    up_to_id: int  # id of the newest message the user has seen
+
+
+class MarkReadResponse(BaseModel):
+    marked: int  # messages newly marked read
+    unread_count: int  # unread messages left across all conversations
+
+
+class UnreadCountResponse(BaseModel):
+    unread_count: int
+
+
+class MessageSearchResult(BaseModel):
+    id: int
+    user_id: int  # the other participant of the conversation
+    sender_id: int
+    receiver_id: int
+    ride_id: Optional[int] = None
+    sent_at: datetime
+    snippet: str  # plain text around the matched words
+    highlights: List[Tuple[int, int]]  # [start, end) of each match in snippet, in UTF-16 code units
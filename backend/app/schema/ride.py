@@ -1,10 +1,14 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Literal, Optional, Tuple
 from datetime import datetime
 
 from app.schema.car import CarResponse
 from app.schema.user import UserRideResponse, UserResponse
 
+# One (lat, lng) point of a driver's route
+RoutePoint = Tuple[Annotated[float, Field(ge=-90, le=90)], Annotated[float, Field(ge=-180, le=180)]]
+
+
 class RideBase(BaseModel):
     car_id: int
     start_location: str
@@ -12,10 +16,22 @@ class RideBase(BaseModel):
     start_time: datetime
     seats_available: int
     total_fare: Optional[float] = None
+    start_latitude: Optional[float] = None
+    start_longitude: Optional[float] = None
+    end_latitude: Optional[float] = None
+    end_longitude: Optional[float] = None
 
 
 class RideCreate(RideBase):
-    pass
+    route: Optional[List[RoutePoint]] = None  # [[lat, lng], ...] along the driver's path
+
+
+class RideSearchFilters(BaseModel):
+    departs_after: Optional[datetime] = None
+    departs_before: Optional[datetime] = None
+    min_seats: Optional[int] = None
+    max_fare: Optional[float] = None
+    ac_available: Optional[bool] = None
 
 
 class RideUpdate(BaseModel):
@@ -45,6 +61,12 @@ class DriverRideResponse(RideBase):
         from_attributes = True
 
 
+class CorridorRideResponse(BaseModel):
+    pickup_distance_m: float
+    drop_distance_m: float
+    ride: RideResponse
+
+
 class RideRequestCreate(BaseModel):
     ride_id: int
     message: Optional[str] = None
@@ -86,7 +108,26 @@ class RideRequestResponse(BaseModel):
 
 
 class RideRequestUpdate(BaseModel):
-    status: str  # accepted, rejected
+    status: Literal["pending", "accepted", "rejected"]
+
+
+class RideRequestBulkItem(BaseModel):
+    request_id: int
+    status: Literal["accepted", "rejected"]
+
+
+class RideRequestBulkResult(BaseModel):
+    request_id: int
+    ok: bool
+    status: Optional[str] = None  # request status after the call
+    code: Optional[str] = None  # not_found, duplicate, ride_full when ok is false
+
+
+class RideAssignmentProposal(BaseModel):
+    request_id: int
+    ride_id: int
+    rider_id: int
+    cost: int  # lower is better; detour, time difference and driver rating
 
 
 class RideHistoryResponse(BaseModel):
@@ -118,4 +159,15 @@ class RideHistoryCreate(BaseModel):
 class CheckRequestResponse(BaseModel):
     exists: bool
     requested_at: Optional[str] = None  # ISO 8601 format
-    status: Optional[str] = None  # 'pending', 'accepted', 'rejected'
\ No newline at end of file
+    status: Optional[str] = None  # 'pending', 'accepted', 'rejected'
+
+class CommuteSuggestionResponse(BaseModel):
+    driver: UserPublic
+    shared_days: List[int]  # 0=Monday, 6=Sunday
+    home_distance_km: float
+    work_distance_km: float
+    time_difference_minutes: float
+    score: float
+
+    class Config:
+        from_attributes = True
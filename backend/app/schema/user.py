@@ -88,6 +88,19 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class CurrentUser(BaseModel):
+    """The caller as get_current_user hands it to endpoints; cached, so kept small"""
+    id: int
+    name: str
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    is_driver: bool
+    is_rider: bool
+
+    class Config:
+        from_attributes = True
+
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
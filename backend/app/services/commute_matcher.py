@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+from datetime import time
+from typing import Dict, List, Optional, Tuple
+
+from app.services.geo_index import haversine_km
+
+# Saved location names (case-insensitive) read as the two ends of a commute
+HOME_NAMES = ("home",)
+WORK_NAMES = ("office", "work")
+
+# Both homes and both workplaces must be this close
+MATCH_RADIUS_KM = 2.0
+
+# Departure (start_time) or return (end_time) times must be this close
+MAX_TIME_DIFFERENCE_MINUTES = 30
+
+
+@dataclass
+class CommuteProfile:
+    user_id: int
+    is_driver: bool
+    home: Tuple[float, float]
+    work: Tuple[float, float]
+    # day_of_week -> [(start_time, end_time), ...]
+    schedule: Dict[int, List[Tuple[Optional[time], Optional[time]]]] = field(default_factory=dict)
+
+
+@dataclass
+class CommuteMatch:
+    shared_days: List[int]
+    home_distance_km: float
+    work_distance_km: float
+    time_difference_minutes: float
+    score: float
+
+
+def _minutes_apart(a: Optional[time], b: Optional[time]) -> Optional[float]:
+    if a is None or b is None:
+        return None
+    return abs((a.hour * 60 + a.minute) - (b.hour * 60 + b.minute))
+
+def _day_difference(rider_slots, driver_slots) -> Optional[float]:
+    """Smallest departure or return time difference within the limit on one day"""
+    best = None
+    for rider_start, rider_end in rider_slots:
+        for driver_start, driver_end in driver_slots:
+            for difference in (_minutes_apart(rider_start, driver_start), _minutes_apart(rider_end, driver_end)):
+                if difference is not None and difference <= MAX_TIME_DIFFERENCE_MINUTES:
+                    best = difference if best is None else min(best, difference)
+    return best
+
+def match_commutes(rider: CommuteProfile, driver: CommuteProfile) -> Optional[CommuteMatch]:
+    """
+    How well driver's weekly commute covers rider's, or None when their homes
+    or workplaces are too far apart or no scheduled day lines up.
+
+    The score is the number of shared days, lowered by up to one day for
+    distance and timing, so more shared days always rank first.
+    """
+    home_km = haversine_km(*rider.home, *driver.home)
+    work_km = haversine_km(*rider.work, *driver.work)
+    if home_km > MATCH_RADIUS_KM or work_km > MATCH_RADIUS_KM:
+        return None
+
+    differences = {}
+    for day, rider_slots in rider.schedule.items():
+        difference = _day_difference(rider_slots, driver.schedule.get(day, ()))
+        if difference is not None:
+            differences[day] = difference
+    if not differences:
+        return None
+
+    average_difference = sum(differences.values()) / len(differences)
+    penalty = (
+        0.5 * (home_km + work_km) / (2 * MATCH_RADIUS_KM)
+        + 0.5 * average_difference / MAX_TIME_DIFFERENCE_MINUTES
+    )
+    return CommuteMatch(
+        shared_days=sorted(differences),
+        home_distance_km=round(home_km, 3),
+        work_distance_km=round(work_km, 3),
+        time_difference_minutes=round(average_difference, 1),
+        score=round(len(differences) - penalty, 4),
+    )
@@ -0,0 +1,311 @@
+"""
+Push events for the /ws connections.
+
+CRUD writes publish an event once; the broker carries it to every worker,
+and the EventBus of each worker hands it to that worker's connections of
+the receiving users. The memory broker only reaches the publishing worker,
+so deployments running more than one worker must use the Redis broker.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+import redis
+import redis.asyncio
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Called with every raw message a broker receives
+Receiver = Callable[[str], None]
+
+# Pause before a lost Redis subscription is re-established
+RESUBSCRIBE_SECONDS = 1.0
+
+# Broker messages waiting for the Redis publisher thread; more are dropped
+PUBLISH_QUEUE_SIZE = 10_000
+
+# Upper bound on one Redis connect or PUBLISH, so an unreachable server
+# stalls the publisher thread for this long at most per message
+PUBLISH_TIMEOUT_SECONDS = 2.0
+
+# How long stop() waits for queued messages to be published
+PUBLISH_DRAIN_SECONDS = 5.0
+
+
+class MemoryEventBroker:
+    """
+    In-process stand-in for RedisEventBroker. Brokers created on the same
+    network list see each other's messages like workers subscribed to one
+    Redis channel, which lets tests and benchmarks run several buses in one
+    process; by default a broker only reaches its own bus.
+    """
+
+    def __init__(self, network: Optional[List[Receiver]] = None):
+        self._network = network if network is not None else []
+        self._receiver: Optional[Receiver] = None
+
+    def publish(self, raw: str) -> None:
+        for receiver in list(self._network):
+            receiver(raw)
+
+    async def start(self, receiver: Receiver) -> None:
+        self._receiver = receiver
+        self._network.append(receiver)
+
+    async def stop(self) -> None:
+        if self._receiver in self._network:
+            self._network.remove(self._receiver)
+        self._receiver = None
+
+
+class RedisEventBroker:
+    """
+    Pub/sub on one channel of REDIS_URL. publish() only puts the message on
+    a bounded queue, so the synchronous CRUD code calling it never waits on
+    Redis, not even on the event loop; a background thread sends the queue
+    with PUBLISH in order. Every worker listens on the channel from a task
+    on its event loop. Events are best effort: a message dropped from a
+    full queue or published while Redis is unreachable is logged and lost,
+    and clients refetch when they reconnect.
+    """
+
+    def __init__(self, url: str, channel: str, queue_size: int = PUBLISH_QUEUE_SIZE):
+        self._url = url
+        self._channel = channel
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=PUBLISH_TIMEOUT_SECONDS, socket_connect_timeout=PUBLISH_TIMEOUT_SECONDS
+        )
+        self._outbox: queue.Queue = queue.Queue(queue_size)
+        self._publisher: Optional[threading.Thread] = None
+        self._publisher_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def publish(self, raw: str) -> None:
+        if self._publisher is None:
+            self._start_publisher()
+        try:
+            self._outbox.put_nowait(raw)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Event publish queue full, dropping a message")
+
+    def _start_publisher(self) -> None:
+        with self._publisher_lock:
+            if self._publisher is None:
+                self._publisher = threading.Thread(target=self._publish_queued, name="event-publisher", daemon=True)
+                self._publisher.start()
+
+    def _publish_queued(self) -> None:
+        while True:
+            raw = self._outbox.get()
+            if raw is None:
+                return
+            try:
+                self._client.publish(self._channel, raw)
+            except redis.RedisError:
+                logger.exception("Event publish failed")
+
+    async def start(self, receiver: Receiver) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(receiver))
+
+    async def _listen(self, receiver: Receiver) -> None:
+        client = redis.asyncio.Redis.from_url(self._url)
+        try:
+            while True:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                try:
+                    await pubsub.subscribe(self._channel)
+                    async for message in pubsub.listen():
+                        receiver(message["data"].decode())
+                except (redis.RedisError, OSError):
+                    logger.exception("Event subscription lost, resubscribing")
+                    await asyncio.sleep(RESUBSCRIBE_SECONDS)
+                finally:
+                    await pubsub.aclose()
+        finally:
+            await client.aclose()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        with self._publisher_lock:
+            publisher, self._publisher = self._publisher, None
+        if publisher is not None:
+            # Send what is already queued, then let the thread end
+            await asyncio.to_thread(self._outbox.put, None)
+            await asyncio.to_thread(publisher.join, PUBLISH_DRAIN_SECONDS)
+
+
+class EventBus:
+    """
+    Fan-out of events to the WebSocket connections of this worker.
+
+    Every connection owns a bounded queue of serialized messages. publish()
+    encodes an event once and sends it through the broker; every worker's
+    bus then puts it on the queue of each local connection of the receiving
+    users. A connection that stops reading and lets its queue fill up gets
+    a None in place of the message, telling it to close, so a slow client
+    can neither block publishers nor grow memory without bound.
+
+    With batch_ms > 0 events are collected for that long and published as
+    one broker message, and of the events given the same coalesce_key in
+    one window only the latest is sent, in the place of the first. This
+    trades a few milliseconds of latency for far fewer broker round trips
+    when a burst of writes (a bulk accept, a sweep) fires many events.
+
+    publish() is safe to call from any thread: CRUD runs on the event loop
+    for the async endpoints and in worker threads for the lifecycle sweeper,
+    and delivery is always handed to the loop that owns the connections.
+    """
+
+    def __init__(self, broker, queue_size: int, batch_ms: int = 0):
+        self.broker = broker
+        self.queue_size = queue_size
+        self.batch_ms = batch_ms
+        self.published = 0
+        self.coalesced = 0
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, Dict] = {}
+        self._sequence = itertools.count()
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        await self.broker.start(self.receive)
+        if self.batch_ms > 0 and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        self.flush()
+        await self.broker.stop()
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def publish(
+        self,
+        user_ids: Iterable[int],
+        event_type: str,
+        payload: Any,
+        coalesce_key: Optional[Hashable] = None
+    ) -> None:
+        """Send {"type": event_type, "payload": payload} to every connection of the users"""
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return
+        event = {
+            "users": user_ids,
+            "message": json.dumps({"type": event_type, "payload": jsonable_encoder(payload)}),
+        }
+        if self.batch_ms <= 0:
+            self.published += 1
+            self.broker.publish(json.dumps([event]))
+            return
+        with self._lock:
+            key = ("key", coalesce_key) if coalesce_key is not None else next(self._sequence)
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = event
+
+    def flush(self) -> None:
+        """Publish the events collected so far as one broker message"""
+        with self._lock:
+            events = list(self._pending.values())
+            self._pending = {}
+        if events:
+            self.published += len(events)
+            self.broker.publish(json.dumps(events))
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.batch_ms / 1000)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:
+                logger.exception("Event flush failed")
+
+    def receive(self, raw: str) -> None:
+        """Deliver a broker message to this worker's connections; safe from any thread"""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(raw)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._deliver, raw)
+
+    def _deliver(self, raw: str) -> None:
+        for event in json.loads(raw):
+            self.received += 1
+            message = event["message"]
+            for user_id in event["users"]:
+                for queue in self._subscribers.get(user_id, ()):
+                    try:
+                        queue.put_nowait(message)
+                        self.delivered += 1
+                    except asyncio.QueueFull:
+                        self.dropped += 1
+                        while not queue.empty():
+                            queue.get_nowait()
+                        queue.put_nowait(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "broker": settings.EVENT_BROKER,
+            "users": len(self._subscribers),
+            "connections": sum(len(queues) for queues in self._subscribers.values()),
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+def _make_broker():
+    if settings.EVENT_BROKER == "redis":
+        return RedisEventBroker(settings.REDIS_URL, settings.EVENT_CHANNEL)
+    return MemoryEventBroker()
+
+
+event_bus = EventBus(_make_broker(), queue_size=settings.WEBSOCKET_QUEUE_SIZE, batch_ms=settings.EVENT_BATCH_MS)
@@ -0,0 +1,161 @@
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.models.ride import Ride
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Grid cell edge in degrees of latitude (~1.1 km). Longitude cells use the
+# same angle, so they are narrower away from the equator, which only means a
+# few more cells are visited per query.
+CELL_DEGREES = 0.01
+
+# Bounding boxes wider than this many cells fall back to a linear scan of
+# the in-memory entries rather than enumerating empty cells.
+MAX_CELLS_PER_QUERY = 40_000
+
+# How often entries for rides that have already departed are dropped
+PRUNE_INTERVAL_SECONDS = 60
+
+# A ride's updated_at is taken before its write commits, so each sync also
+# reads again the rides changed this long before the previous one
+SYNC_OVERLAP_SECONDS = 30
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _cell(lat: float, lng: float) -> Tuple[int, int]:
+    return math.floor(lat / CELL_DEGREES), math.floor(lng / CELL_DEGREES)
+
+
+@dataclass
+class _Entry:
+    start_lat: float
+    start_lng: float
+    end_lat: float
+    end_lng: float
+    start_time: datetime
+
+
+class RideGeoIndex:
+    """
+    In-process uniform grid over ride origins.
+
+    The index keeps itself in step with the database by reading the rides
+    whose updated_at moved since the last sync, adding those still active and
+    in the future and dropping the rest. Status, seats and departure time are
+    also re-checked against the database by the caller, so an entry that has
+    not caught up yet can only cost a wasted candidate, never a wrong result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[int, _Entry] = {}
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._synced_at: Optional[datetime] = None
+        self._last_prune = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def sync(self, db: Session, now: datetime) -> None:
+        """Pull rides created or changed since the last sync and drop departed ones"""
+        synced_at = datetime.now(timezone.utc)
+        query = db.query(
+            Ride.id, Ride.status, Ride.start_latitude, Ride.start_longitude,
+            Ride.end_latitude, Ride.end_longitude, Ride.start_time
+        )
+        if self._synced_at is None:
+            rows = query.filter(Ride.status == "active", Ride.start_time > now).all()
+        else:
+            rows = query.filter(
+                Ride.updated_at >= self._synced_at - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+            ).all()
+
+        with self._lock:
+            for ride_id, status, start_lat, start_lng, end_lat, end_lng, start_time in rows:
+                if (status == "active" and start_time > now
+                        and None not in (start_lat, start_lng, end_lat, end_lng)):
+                    self._add(ride_id, _Entry(start_lat, start_lng, end_lat, end_lng, start_time))
+                else:
+                    self._remove(ride_id)
+            if self._synced_at is None or synced_at > self._synced_at:
+                self._synced_at = synced_at
+
+            if time.monotonic() - self._last_prune > PRUNE_INTERVAL_SECONDS:
+                for ride_id in [i for i, e in self._entries.items() if e.start_time <= now]:
+                    self._remove(ride_id)
+                self._last_prune = time.monotonic()
+
+    def discard(self, ride_id: int) -> None:
+        """Drop a ride's entry after a write; the next sync reads it back if it still qualifies"""
+        with self._lock:
+            self._remove(ride_id)
+
+    def search(self, lat: float, lng: float, radius_km: float,
+               dest_lat: Optional[float] = None, dest_lng: Optional[float] = None,
+               dest_radius_km: Optional[float] = None) -> List[int]:
+        """
+        Return ids of rides starting within radius_km of (lat, lng) and, when a
+        destination is given, ending within dest_radius_km of it. Results are
+        ordered by distance from the origin.
+        """
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        lng_span = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        min_cell = _cell(lat - lat_span, lng - lng_span)
+        max_cell = _cell(lat + lat_span, lng + lng_span)
+        cell_count = (max_cell[0] - min_cell[0] + 1) * (max_cell[1] - min_cell[1] + 1)
+
+        with self._lock:
+            if cell_count > MAX_CELLS_PER_QUERY:
+                candidates = list(self._entries)
+            else:
+                candidates = []
+                for cell_lat in range(min_cell[0], max_cell[0] + 1):
+                    for cell_lng in range(min_cell[1], max_cell[1] + 1):
+                        candidates.extend(self._cells.get((cell_lat, cell_lng), ()))
+
+            matches = []
+            for ride_id in candidates:
+                entry = self._entries[ride_id]
+                distance = haversine_km(lat, lng, entry.start_lat, entry.start_lng)
+                if distance > radius_km:
+                    continue
+                if dest_lat is not None and dest_lng is not None and dest_radius_km is not None:
+                    if haversine_km(dest_lat, dest_lng, entry.end_lat, entry.end_lng) > dest_radius_km:
+                        continue
+                matches.append((distance, ride_id))
+
+        matches.sort()
+        return [ride_id for _, ride_id in matches]
+
+    def _add(self, ride_id: int, entry: _Entry) -> None:
+        self._remove(ride_id)
+        self._entries[ride_id] = entry
+        self._cells.setdefault(_cell(entry.start_lat, entry.start_lng), set()).add(ride_id)
+
+    def _remove(self, ride_id: int) -> None:
+        entry = self._entries.pop(ride_id, None)
+        if entry is None:
+            return
+        cell = _cell(entry.start_lat, entry.start_lng)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(ride_id)
+            if not bucket:
+                del self._cells[cell]
+
+
+ride_geo_index = RideGeoIndex()
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+import pytz
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.db.crud.archive import archive_finished_rides
+from app.db.crud.ride import expire_departed_rides
+from app.db.crud.ride_request import expire_stale_requests
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on batches per table in one sweep, so a large backlog is
+# worked off over several runs instead of one long one
+MAX_BATCHES_PER_SWEEP = 20
+
+
+class LifecycleSweeper:
+    """
+    Periodically expires rides that departed without being completed and
+    pending requests nobody answered, keeping the 'active' and 'pending'
+    sets that the feed and request queries scan small, and moves old
+    finished rides to the archive tables.
+
+    Every batch is its own short transaction and the UPDATEs re-check the
+    status they expect, so running one sweeper per worker is safe.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: int,
+        batch_size: int,
+        ride_grace: timedelta,
+        request_ttl: timedelta,
+        archive_after: Optional[timedelta] = None,
+        archive_batch_size: int = 200,
+    ):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.ride_grace = ride_grace
+        self.request_ttl = request_ttl
+        self.archive_after = archive_after
+        self.archive_batch_size = archive_batch_size
+        self.runs = 0
+        self.totals = {"rides_expired": 0, "requests_expired": 0, "rides_archived": 0}
+        self.last_run: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def sweep_once(self) -> Dict[str, int]:
+        """Run one sweep and return how many rides and requests it expired or archived"""
+        # Ride times are naive Pakistan local times, request times are UTC
+        now_pakistan = datetime.now(pytz.timezone('Asia/Karachi')).replace(tzinfo=None)
+        departed_before = now_pakistan - self.ride_grace
+        requested_before = datetime.now(timezone.utc) - self.request_ttl
+
+        counts = {"rides_expired": 0, "requests_expired": 0, "rides_archived": 0}
+        db = SessionLocal()
+        try:
+            for _ in range(MAX_BATCHES_PER_SWEEP):
+                expired = expire_departed_rides(db, departed_before, self.batch_size)
+                counts["rides_expired"] += expired
+                if expired < self.batch_size:
+                    break
+            for _ in range(MAX_BATCHES_PER_SWEEP):
+                expired = expire_stale_requests(db, departed_before, requested_before, self.batch_size)
+                counts["requests_expired"] += expired
+                if expired < self.batch_size:
+                    break
+            if self.archive_after is not None:
+                archive_before = now_pakistan - self.archive_after
+                for _ in range(MAX_BATCHES_PER_SWEEP):
+                    archived = archive_finished_rides(db, archive_before, self.archive_batch_size)
+                    counts["rides_archived"] += archived
+                    if archived < self.archive_batch_size:
+                        break
+        finally:
+            db.close()
+
+        self._publish(counts)
+        return counts
+
+    def _publish(self, counts: Dict[str, int]) -> None:
+        self.runs += 1
+        for key, value in counts.items():
+            self.totals[key] += value
+        self.last_run = {"at": datetime.now(timezone.utc).isoformat(), **counts}
+        if any(counts.values()):
+            logger.info(
+                "Lifecycle sweep expired %(rides_expired)d rides and %(requests_expired)d requests, "
+                "archived %(rides_archived)d rides", counts
+            )
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep_once)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Lifecycle sweep failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {"runs": self.runs, "last_run": self.last_run, **self.totals}
+
+
+lifecycle_sweeper = LifecycleSweeper(
+    interval_seconds=settings.LIFECYCLE_SWEEP_INTERVAL_SECONDS,
+    batch_size=settings.LIFECYCLE_SWEEP_BATCH_SIZE,
+    ride_grace=timedelta(hours=settings.RIDE_EXPIRY_GRACE_HOURS),
+    request_ttl=timedelta(hours=settings.PENDING_REQUEST_TTL_HOURS),
+    archive_after=timedelta(days=settings.ARCHIVE_AFTER_DAYS) if settings.ARCHIVE_AFTER_DAYS > 0 else None,
+    archive_batch_size=settings.ARCHIVE_BATCH_SIZE,
+)
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.db.crud.messages import create_messages
+from app.schema.message import MessageCreate, MessageResponse
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriter:
+    """
+    Group commit for POST /api/messages/.
+
+    Senders hand their message to submit() and wait. The writer task takes
+    the first waiting message, lets others arrive for window_ms, and writes
+    everything waiting, up to max_batch, with create_messages: one
+    multi-row INSERT, one round of conversation and unread bookkeeping and
+    one commit, in a worker thread. Messages arriving while a batch commits
+    wait for the next one, so under load batches grow on their own and the
+    number of commits, not of messages, is what costs.
+
+    Durability is the same as writing each message on its own: submit()
+    only returns, with the message's id and sent_at, after the commit that
+    wrote it, and a sender whose request fails or is cut off never got an
+    id for a message that might be lost. What changes is latency (up to
+    window_ms plus the batch's commit) and failure scope: when a batch
+    fails its messages are retried one transaction each, so one bad message
+    fails only its own sender. stop() writes the messages still waiting
+    before returning.
+
+    With window_ms = 0 the writer is off and the endpoint writes each
+    message in its own transaction with create_message.
+    """
+
+    def __init__(self, window_ms: int, max_batch: int):
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.batches = 0
+        self.messages = 0
+        self.retried_batches = 0
+        self.largest_batch = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_ms > 0
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # Let the writer finish the messages already submitted
+            self._queue.put_nowait(None)
+            await self._task
+            self._task = None
+            self._queue = None
+
+    async def submit(self, message: MessageCreate, sender_id: int) -> MessageResponse:
+        """Write the message in the next batch and return it once committed"""
+        if self._queue is None:
+            raise RuntimeError("Message writer is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((message, sender_id, future))
+        return await future
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                return
+            if self._queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.window_ms / 1000)
+            batch = [first]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                results = await asyncio.to_thread(self.write_batch, [(message, sender_id) for message, sender_id, _ in batch])
+            except Exception as e:
+                logger.exception("Message batch failed")
+                results = [e] * len(batch)
+            for (_, _, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def write_batch(self, messages: List[Tuple[MessageCreate, int]]) -> List[Union[MessageResponse, Exception]]:
+        """Write the messages in one transaction, or one transaction each if that fails"""
+        try:
+            written: List[Union[MessageResponse, Exception]] = self._write(messages)
+        except Exception as e:
+            if len(messages) == 1:
+                written = [e]
+            else:
+                self.retried_batches += 1
+                written = []
+                for message in messages:
+                    try:
+                        written.extend(self._write([message]))
+                    except Exception as e:
+                        written.append(e)
+        self.batches += 1
+        self.messages += len(messages)
+        self.largest_batch = max(self.largest_batch, len(messages))
+        return written
+
+    def _write(self, messages: List[Tuple[MessageCreate, int]]) -> List[MessageResponse]:
+        # A session per attempt: a rollback would expire the messages that
+        # an earlier attempt in the same session already wrote
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            return create_messages(db, messages)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "batches": self.batches,
+            "messages": self.messages,
+            "retried_batches": self.retried_batches,
+            "largest_batch": self.largest_batch,
+            "waiting": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+message_writer = MessageWriter(
+    window_ms=settings.MESSAGE_GROUP_COMMIT_MS,
+    max_batch=settings.MESSAGE_GROUP_COMMIT_MAX_BATCH
+)
@@ -0,0 +1,191 @@
+import heapq
+from dataclasses import dataclass
+from datetime import datetime, time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.commute_matcher import CommuteProfile
+from app.services.geo_index import haversine_km
+
+# Cost weights in integer cost points: one point is about 500 m of detour,
+# 2.5 minutes off the rider's usual departure or a quarter star of driver
+# rating. The solver runs one phase per distinct path cost, so this coarse
+# unit keeps it fast; a 5x finer unit changed the total cost by under 0.01%
+# on bench_ride_assignment.py while taking 5x longer.
+DETOUR_COST_PER_KM = 2
+TIME_COST_PER_MINUTE = 0.4
+RATING_COST_PER_STAR = 4
+
+# Used when a rider has no saved Home/Office, no schedule for the day, or a
+# driver has no ratings yet, so those requests are neither favoured nor
+# penalised
+DEFAULT_DETOUR_KM = 2.0
+DEFAULT_TIME_DIFFERENCE_MINUTES = 15
+DEFAULT_DRIVER_RATING = 4.0
+
+
+@dataclass
+class AssignmentRequest:
+    request_id: int
+    rider_id: int
+    ride_id: int
+    cost: int
+
+
+def _minutes_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+def request_cost(
+    profile: Optional[CommuteProfile],
+    ride_start_time: datetime,
+    ride_start: Tuple[Optional[float], Optional[float]],
+    ride_end: Tuple[Optional[float], Optional[float]],
+    driver_rating: Optional[float],
+) -> int:
+    """Cost of seating the profile's rider on a ride: detour, time difference and driver rating"""
+    detour_km = DEFAULT_DETOUR_KM
+    if profile is not None and None not in ride_start and None not in ride_end:
+        detour_km = haversine_km(*profile.home, *ride_start) + haversine_km(*profile.work, *ride_end)
+
+    minutes = DEFAULT_TIME_DIFFERENCE_MINUTES
+    slots = profile.schedule.get(ride_start_time.weekday(), ()) if profile is not None else ()
+    starts = [_minutes_of_day(start) for start, _ in slots if start is not None]
+    if starts:
+        departure = ride_start_time.hour * 60 + ride_start_time.minute
+        minutes = min(abs(departure - start) for start in starts)
+
+    rating = driver_rating or DEFAULT_DRIVER_RATING
+    return round(
+        DETOUR_COST_PER_KM * detour_km
+        + TIME_COST_PER_MINUTE * minutes
+        + RATING_COST_PER_STAR * (5 - rating)
+    )
+
+
+def solve_assignment(requests: Sequence[AssignmentRequest], seats: Dict[int, int]) -> List[AssignmentRequest]:
+    """
+    Pick at most one request per rider and at most seats[ride_id] requests
+    per ride, seating as many riders as possible and, among those choices,
+    minimising the total cost.
+
+    Min-cost max-flow on source -> rider -> ride -> sink, solved primal-dual:
+    every phase runs Dijkstra on reduced costs, moves the node potentials,
+    and then saturates as many zero-reduced-cost paths as it can find, so
+    the number of phases follows the number of distinct path costs rather
+    than the number of riders. The source is implicit: its only residual
+    edges lead to riders who are not seated yet, and their potential stays 0.
+    """
+    riders = {}
+    rides = {}
+    for request in requests:
+        if seats.get(request.ride_id, 0) > 0:
+            riders.setdefault(request.rider_id, len(riders))
+            rides.setdefault(request.ride_id, len(rides))
+    if not riders:
+        return []
+
+    ride_base = len(riders)
+    sink = ride_base + len(rides)
+    node_count = sink + 1
+
+    # Edge e and its reverse e ^ 1 are stored side by side
+    head: List[int] = []
+    cap: List[int] = []
+    cost: List[int] = []
+    adjacency: List[List[int]] = [[] for _ in range(node_count)]
+
+    def add_edge(u: int, v: int, capacity: int, edge_cost: int) -> int:
+        edge = len(head)
+        head.extend((v, u))
+        cap.extend((capacity, 0))
+        cost.extend((edge_cost, -edge_cost))
+        adjacency[u].append(edge)
+        adjacency[v].append(edge + 1)
+        return edge
+
+    for ride_id, index in rides.items():
+        add_edge(ride_base + index, sink, seats[ride_id], 0)
+    request_edges = []
+    for request in requests:
+        if request.ride_id in rides:
+            edge = add_edge(riders[request.rider_id], ride_base + rides[request.ride_id], 1, request.cost)
+            request_edges.append((edge, request))
+
+    degree = [len(arcs) for arcs in adjacency]
+    infinity = float("inf")
+    potential = [0] * node_count
+    unseated = list(range(ride_base))
+    heappush, heappop = heapq.heappush, heapq.heappop
+    while unseated:
+        # Dijkstra on reduced costs from every unseated rider, stopping once
+        # the sink is settled
+        distance = [infinity] * node_count
+        done = [False] * node_count
+        for rider in unseated:
+            distance[rider] = 0
+        queue = [(0, rider) for rider in unseated]
+        while queue:
+            d, u = heappop(queue)
+            if done[u]:
+                continue
+            done[u] = True
+            if u == sink:
+                break
+            pu = potential[u]
+            for edge in adjacency[u]:
+                if cap[edge]:
+                    v = head[edge]
+                    if not done[v]:
+                        nd = d + cost[edge] + pu - potential[v]
+                        if nd < distance[v]:
+                            distance[v] = nd
+                            heappush(queue, (nd, v))
+        bound = distance[sink]
+        if bound == infinity:
+            break
+        # Capping at the sink's distance keeps every reduced cost non-negative
+        potential = [p + (d if d < bound else bound) for p, d in zip(potential, distance)]
+
+        # Saturate zero-reduced-cost paths; every path carries one rider
+        next_arc = [0] * node_count
+        dead = [False] * node_count
+        on_path = [False] * node_count
+        still_unseated = []
+        for rider in unseated:
+            path = []
+            node = rider
+            on_path[rider] = True
+            while node != sink:
+                arcs = adjacency[node]
+                arc = next_arc[node]
+                end = degree[node]
+                pu = potential[node]
+                while arc < end:
+                    edge = arcs[arc]
+                    v = head[edge]
+                    if cap[edge] and not dead[v] and not on_path[v] and cost[edge] + pu == potential[v]:
+                        break
+                    arc += 1
+                next_arc[node] = arc
+                if arc < end:
+                    path.append(edge)
+                    on_path[v] = True
+                    node = v
+                    continue
+                dead[node] = True
+                on_path[node] = False
+                if not path:
+                    break
+                edge = path.pop()
+                node = head[edge ^ 1]
+                next_arc[node] += 1
+            if node != sink:
+                still_unseated.append(rider)
+                continue
+            on_path[rider] = False
+            for edge in path:
+                cap[edge] -= 1
+                cap[edge ^ 1] += 1
+                on_path[head[edge]] = False
+        unseated = still_unseated
+
+    return [request for edge, request in request_edges if cap[edge] == 0]
@@ -0,0 +1,288 @@
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.db.models.ride import Ride
+from app.services.geo_index import SYNC_OVERLAP_SECONDS
+
+EARTH_RADIUS_M = 6_371_008.8
+
+# Douglas-Peucker tolerance used when a ride's route is stored
+SIMPLIFY_TOLERANCE_M = 30.0
+
+# New rides become visible to queries at most this long after the last rebuild
+MIN_REBUILD_INTERVAL_SECONDS = 2.0
+
+# How often entries for rides that have already departed are dropped
+PRUNE_INTERVAL_SECONDS = 60
+
+
+def to_epoch(value: datetime) -> float:
+    """Ride times are stored as naive local times; map them to a comparable float"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def simplify_polyline(points: Sequence[Sequence[float]], tolerance_m: float = SIMPLIFY_TOLERANCE_M) -> List[List[float]]:
+    """Douglas-Peucker simplification of a [[lat, lng], ...] polyline"""
+    if len(points) <= 2:
+        return [[float(lat), float(lng)] for lat, lng in points]
+
+    coords = np.asarray(points, dtype=float)
+    lat0 = math.radians(float(coords[:, 0].mean()))
+    # Local equirectangular projection to metres
+    xy = np.column_stack((
+        np.radians(coords[:, 1]) * math.cos(lat0) * EARTH_RADIUS_M,
+        np.radians(coords[:, 0]) * EARTH_RADIUS_M,
+    ))
+
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(coords) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = xy[first], xy[last]
+        inner = xy[first + 1:last]
+        distances, _ = _project(inner[:, 0], inner[:, 1], a[0], a[1], b[0], b[1])
+        worst = int(np.argmax(distances))
+        if distances[worst] > tolerance_m:
+            split = first + 1 + worst
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return coords[keep].tolist()
+
+
+def _project(px, py, ax, ay, bx, by):
+    """
+    Distance from points (px, py) to segments (a, b) and the clamped position
+    t in [0, 1] of the closest point along each segment. Arguments broadcast.
+    """
+    abx = bx - ax
+    aby = by - ay
+    length_sq = abx * abx + aby * aby
+    t = np.clip(((px - ax) * abx + (py - ay) * aby) / np.maximum(length_sq, 1e-12), 0.0, 1.0)
+    return np.hypot(ax + t * abx - px, ay + t * aby - py), t
+
+
+@dataclass
+class CorridorMatch:
+    ride_id: int
+    pickup_distance_m: float
+    drop_distance_m: float
+
+
+class RouteCorridorIndex:
+    """
+    In-memory corridor index over the simplified routes of active rides.
+
+    Routes are packed into flat NumPy segment arrays ordered by departure time,
+    so a query narrows to its time window with a binary search, drops rides
+    whose bounding box is too far from pickup or drop, and then runs one
+    vectorised point-to-segment kernel over the remaining segments.
+
+    Like the origin grid in geo_index, the index follows the database by ride
+    change time and callers re-check status, seats and departure time before
+    returning rides.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[int, Tuple[float, np.ndarray]] = {}
+        self._synced_at: Optional[datetime] = None
+        self._dirty = False
+        self._last_rebuild = 0.0
+        self._last_prune = 0.0
+        self._packed = None
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def add(self, ride_id: int, start_time: datetime, points: Sequence[Sequence[float]]) -> None:
+        """Index or refresh a ride's route; a route that is not at least two [lat, lng] points drops it"""
+        try:
+            route = np.radians(np.asarray(points, dtype=float))
+        except (TypeError, ValueError):
+            route = None
+        if route is None or route.ndim != 2 or route.shape[0] < 2 or route.shape[1] != 2:
+            self.discard(ride_id)
+            return
+        start = to_epoch(start_time)
+        with self._lock:
+            current = self._routes.get(ride_id)
+            if current is not None and current[0] == start and np.array_equal(current[1], route):
+                return
+            self._routes[ride_id] = (start, route)
+            self._dirty = True
+
+    def discard(self, ride_id: int) -> None:
+        """Drop a ride's route after a write; the next sync reads it back if it still qualifies"""
+        with self._lock:
+            if self._routes.pop(ride_id, None) is not None:
+                self._dirty = True
+
+    def sync(self, db: Session, now: datetime) -> None:
+        """Pull routes of rides created or changed since the last sync and drop departed ones"""
+        synced_at = datetime.now(timezone.utc)
+        query = db.query(Ride.id, Ride.status, Ride.start_time, Ride.route_polyline)
+        if self._synced_at is None:
+            rows = query.filter(
+                Ride.status == "active",
+                Ride.start_time > now,
+                Ride.route_polyline.isnot(None)
+            ).all()
+        else:
+            rows = query.filter(
+                Ride.updated_at >= self._synced_at - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+            ).all()
+        for ride_id, status, start_time, polyline in rows:
+            if status == "active" and start_time > now and polyline is not None:
+                self.add(ride_id, start_time, polyline)
+            else:
+                self.discard(ride_id)
+
+        with self._lock:
+            if self._synced_at is None or synced_at > self._synced_at:
+                self._synced_at = synced_at
+
+        if time.monotonic() - self._last_prune > PRUNE_INTERVAL_SECONDS:
+            cutoff = to_epoch(now)
+            with self._lock:
+                departed = [ride_id for ride_id, (start, _) in self._routes.items() if start <= cutoff]
+                for ride_id in departed:
+                    del self._routes[ride_id]
+                self._dirty = self._dirty or bool(departed)
+                self._last_prune = time.monotonic()
+
+    def match(
+        self,
+        pickup: Tuple[float, float],
+        drop: Tuple[float, float],
+        max_distance_m: float,
+        departs_after: datetime,
+        departs_before: datetime,
+    ) -> List[CorridorMatch]:
+        """
+        Rides whose route passes within max_distance_m of pickup and then of
+        drop (in that order), departing inside the window. Sorted by the sum
+        of pickup and drop distances.
+        """
+        packed = self._current_packing()
+        if packed is None:
+            return []
+
+        lo = int(np.searchsorted(packed["start"], to_epoch(departs_after), side="left"))
+        hi = int(np.searchsorted(packed["start"], to_epoch(departs_before), side="right"))
+        if lo >= hi:
+            return []
+
+        p_lat, p_lng = math.radians(pickup[0]), math.radians(pickup[1])
+        d_lat, d_lng = math.radians(drop[0]), math.radians(drop[1])
+        cos_lat = math.cos((p_lat + d_lat) / 2)
+        lat_pad = max_distance_m / EARTH_RADIUS_M
+        lng_pad = lat_pad / max(cos_lat, 1e-6)
+
+        min_lat = packed["min_lat"][lo:hi] - lat_pad
+        max_lat = packed["max_lat"][lo:hi] + lat_pad
+        min_lng = packed["min_lng"][lo:hi] - lng_pad
+        max_lng = packed["max_lng"][lo:hi] + lng_pad
+        in_box = (
+            (min_lat <= p_lat) & (p_lat <= max_lat) & (min_lng <= p_lng) & (p_lng <= max_lng)
+            & (min_lat <= d_lat) & (d_lat <= max_lat) & (min_lng <= d_lng) & (d_lng <= max_lng)
+        )
+        rides = lo + np.flatnonzero(in_box)
+        if rides.size == 0:
+            return []
+
+        # Gather the segments of the candidate rides into one flat index array
+        counts = packed["seg_count"][rides]
+        group_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        segments = np.repeat(packed["seg_offset"][rides] - group_starts, counts) + np.arange(counts.sum())
+
+        # Project to metres around the pickup/drop midpoint
+        scale_x = cos_lat * EARTH_RADIUS_M
+        ax = (packed["a_lng"][segments] - p_lng) * scale_x
+        ay = (packed["a_lat"][segments] - p_lat) * EARTH_RADIUS_M
+        bx = (packed["b_lng"][segments] - p_lng) * scale_x
+        by = (packed["b_lat"][segments] - p_lat) * EARTH_RADIUS_M
+        dx = (d_lng - p_lng) * scale_x
+        dy = (d_lat - p_lat) * EARTH_RADIUS_M
+
+        along = packed["along"][segments]
+        seg_len = packed["seg_len"][segments]
+
+        pickup_dist, pickup_t = _project(0.0, 0.0, ax, ay, bx, by)
+        drop_dist, drop_t = _project(dx, dy, ax, ay, bx, by)
+
+        # Earliest point on the route near the pickup, latest near the drop
+        pickup_pos = np.where(pickup_dist <= max_distance_m, along + pickup_t * seg_len, np.inf)
+        drop_pos = np.where(drop_dist <= max_distance_m, along + drop_t * seg_len, -np.inf)
+        first_pickup = np.minimum.reduceat(pickup_pos, group_starts)
+        last_drop = np.maximum.reduceat(drop_pos, group_starts)
+        ok = np.isfinite(first_pickup) & np.isfinite(last_drop) & (first_pickup < last_drop)
+        if not ok.any():
+            return []
+
+        best_pickup = np.minimum.reduceat(pickup_dist, group_starts)[ok]
+        best_drop = np.minimum.reduceat(drop_dist, group_starts)[ok]
+        ride_ids = packed["ride_id"][rides[ok]]
+        order = np.argsort(best_pickup + best_drop, kind="stable")
+        return [
+            CorridorMatch(int(ride_ids[i]), float(best_pickup[i]), float(best_drop[i]))
+            for i in order
+        ]
+
+    def _current_packing(self):
+        with self._lock:
+            due = time.monotonic() - self._last_rebuild >= MIN_REBUILD_INTERVAL_SECONDS
+            if self._dirty and (due or self._packed is None):
+                self._packed = self._pack()
+                self._dirty = False
+                self._last_rebuild = time.monotonic()
+            return self._packed
+
+    def _pack(self):
+        if not self._routes:
+            return None
+        items = sorted(self._routes.items(), key=lambda item: item[1][0])
+        routes = [route for _, (_, route) in items]
+        seg_count = np.fromiter((len(route) - 1 for route in routes), dtype=np.int64, count=len(routes))
+        seg_offset = np.concatenate(([0], np.cumsum(seg_count)[:-1]))
+
+        a = np.concatenate([route[:-1] for route in routes])
+        b = np.concatenate([route[1:] for route in routes])
+        mid_cos = np.cos((a[:, 0] + b[:, 0]) / 2)
+        seg_len = np.hypot((b[:, 1] - a[:, 1]) * mid_cos, b[:, 0] - a[:, 0]) * EARTH_RADIUS_M
+
+        # Distance along the route at the start of every segment
+        cumulative = np.cumsum(seg_len)
+        along = cumulative - seg_len
+        along -= np.repeat(along[seg_offset], seg_count)
+
+        return {
+            "ride_id": np.fromiter((ride_id for ride_id, _ in items), dtype=np.int64, count=len(items)),
+            "start": np.fromiter((start for _, (start, _) in items), dtype=float, count=len(items)),
+            "min_lat": np.array([route[:, 0].min() for route in routes]),
+            "max_lat": np.array([route[:, 0].max() for route in routes]),
+            "min_lng": np.array([route[:, 1].min() for route in routes]),
+            "max_lng": np.array([route[:, 1].max() for route in routes]),
+            "seg_offset": seg_offset,
+            "seg_count": seg_count,
+            "a_lat": a[:, 0], "a_lng": a[:, 1],
+            "b_lat": b[:, 0], "b_lng": b[:, 1],
+            "seg_len": seg_len,
+            "along": along,
+        }
+
+
+route_corridor_index = RouteCorridorIndex()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Move finished rides, their requests and their history to the archive tables
+
+The lifecycle sweeper archives a limited number of batches per run. Use this
+script to work through a large backlog in one go, e.g. right after upgrading
+to migration 0005. Every batch commits on its own, so the script can be
+stopped at any time and started again.
+
+Usage:
+    python archive_rides.py [--older-than-days 180] [--batch-size 500] [--max-batches N]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytz
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.db.crud.archive import archive_finished_rides
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.older_than_days <= 0:
+        print("❌ --older-than-days must be positive")
+        sys.exit(1)
+
+    now_pakistan = datetime.now(pytz.timezone('Asia/Karachi')).replace(tzinfo=None)
+    departed_before = now_pakistan - timedelta(days=args.older_than_days)
+    print(f"📦 Archiving finished rides that departed before {departed_before:%Y-%m-%d %H:%M}")
+
+    db = SessionLocal()
+    total = 0
+    batches = 0
+    started = time.perf_counter()
+    try:
+        while args.max_batches is None or batches < args.max_batches:
+            archived = archive_finished_rides(db, departed_before, args.batch_size)
+            batches += 1
+            total += archived
+            print(f"   batch {batches}: {archived} rides ({total} total)")
+            if archived < args.batch_size:
+                break
+    finally:
+        db.close()
+
+    print(f"✅ Archived {total} rides in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for /ws event fan-out across workers
+
+Runs --workers event buses in one process, each on its own broker as if it
+were a separate uvicorn worker, with --users connected users spread over
+them. A publisher thread, like CRUD code, sends --events events: a --ride-share
+of them are status updates of --rides rides to their three riders, which
+can be coalesced, the rest are messages to one random user, which cannot. Reports how long it
+takes until every worker has received every event, for each --batch-ms
+(0 publishes every event on its own).
+
+Usage:
+    python bench_event_broker.py [--broker memory|redis] [--events 50000] [--workers 4] [--batch-ms 0 5 20]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.services.event_bus import EventBus, MemoryEventBroker, RedisEventBroker
+
+
+class CountingBroker:
+    """Counts the messages a broker publishes"""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.messages = 0
+
+    def publish(self, raw: str) -> None:
+        self.messages += 1
+        self.broker.publish(raw)
+
+    async def start(self, receiver) -> None:
+        await self.broker.start(receiver)
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+
+
+def make_brokers(args, channel: str):
+    if args.broker == "redis":
+        return [RedisEventBroker(args.redis_url, channel, queue_size=args.events + 1) for _ in range(args.workers)]
+    network = []
+    return [MemoryEventBroker(network) for _ in range(args.workers)]
+
+
+def publish_all(bus: EventBus, events) -> None:
+    for user_ids, event_type, payload, coalesce_key in events:
+        bus.publish(user_ids, event_type, payload, coalesce_key=coalesce_key)
+    bus.flush()
+
+
+async def run_once(args, batch_ms: int, events) -> None:
+    brokers = [CountingBroker(broker) for broker in make_brokers(args, f"bench-events-{batch_ms}-{time.time()}")]
+    buses = [EventBus(broker, queue_size=len(events) + 1, batch_ms=batch_ms) for broker in brokers]
+    for bus in buses:
+        await bus.start()
+    for user_id in range(args.users):
+        buses[user_id % args.workers].subscribe(user_id)
+    publisher = buses[0]
+    if args.broker == "redis":
+        await asyncio.sleep(0.5)  # let the subscriptions settle
+
+    started = time.perf_counter()
+    await asyncio.to_thread(publish_all, publisher, events)
+    published_in = time.perf_counter() - started
+    expected = publisher.published * args.workers
+    while sum(bus.received for bus in buses) < expected:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+
+    for bus in buses:
+        await bus.stop()
+    delivered = sum(bus.delivered for bus in buses)
+    print(f"  batch {batch_ms:3d} ms  {len(events) / elapsed:9.0f} events/s  "
+          f"published in {published_in * 1000:6.0f} ms, all workers done in {elapsed * 1000:6.0f} ms  "
+          f"broker messages {brokers[0].messages:6d}  coalesced {publisher.coalesced:6d}  delivered {delivered:6d}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--broker", choices=["memory", "redis"], default="memory")
+    parser.add_argument("--redis-url", default=settings.REDIS_URL)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--rides", type=int, default=500)
+    parser.add_argument("--ride-share", type=float, default=0.5)
+    parser.add_argument("--batch-ms", type=int, nargs="+", default=[0, 5, 20])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    riders = [rng.sample(range(args.users), 3) for _ in range(args.rides)]
+    events = []
+    for i in range(args.events):
+        if rng.random() < args.ride_share:
+            ride_id = rng.randrange(args.rides)
+            payload = {"id": ride_id, "status": "active", "seats_available": rng.randint(0, 4)}
+            events.append((riders[ride_id], "ride_status_changed", payload, ("ride", ride_id)))
+        else:
+            payload = {"id": i, "sender_id": 0, "content": "hello"}
+            events.append(([rng.randrange(args.users)], "new_message", payload, None))
+
+    print(f"{args.events} events, {args.workers} workers over the {args.broker} broker, {args.users} users")
+    for batch_ms in args.batch_ms:
+        asyncio.run(run_once(args, batch_ms, events))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for message search, the full-text index vs a LIKE scan
+
+Seeds --messages messages between --users users, with words drawn from a
+Zipf distribution over a synthetic vocabulary and --heavy-share of all
+messages sent or received by one heavy user, then searches as the heavy
+user and as an ordinary one for a rare word, a common word, two words
+and a prefix being typed. Reports p50 / p99 of search_messages against the same
+search done as LIKE '%word%' over the user's messages.
+
+The schema is created with alembic upgrade head (the index is part of
+the migrations) in a throwaway SQLite file unless --database-url points
+at another empty scratch database.
+
+Usage:
+    python bench_message_search.py [--messages 1000000] [--users 10000] [--searches 50] [--database-url URL]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "do", "gu", "be", "ho", "ji", "fy"]
+
+
+def vocabulary(size: int):
+    words = ("".join(parts) for length in (2, 3, 4) for parts in itertools.product(SYLLABLES, repeat=length))
+    return list(itertools.islice(words, size))
+
+def percentiles(search, runs: int):
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        hits = len(search())
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.99) - 1] * 1000, hits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--heavy-share", type=float, default=0.02)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--searches", type=int, default=50)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    scratch = None
+    if args.database_url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+        args.database_url = f"sqlite:///{scratch}"
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import insert, text
+
+    from app.core.database import SessionLocal, engine
+    from app.db.crud.message_search import search_messages
+    from app.db.models import Message, User
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    config = Config(os.path.join(here, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(here, "alembic"))
+    command.upgrade(config, "head")
+
+    random.seed(7)
+    words = vocabulary(args.vocabulary)
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__), [
+            {"name": f"bench-{i}", "email": f"bench-{i}@example.com", "is_driver": False, "is_rider": True}
+            for i in range(args.users)
+        ])
+        user_ids = [row.id for row in connection.execute(text("SELECT id FROM users ORDER BY id"))]
+    heavy, ordinary = user_ids[0], user_ids[1]
+    sent_at = datetime(2025, 1, 1)
+    for offset in range(0, args.messages, 10000):
+        rows = []
+        for i in range(offset, min(offset + 10000, args.messages)):
+            sender, receiver = random.sample(user_ids[1:], 2)
+            if random.random() < args.heavy_share:
+                sender, receiver = random.choice([(heavy, receiver), (sender, heavy)])
+            rows.append({
+                "sender_id": sender,
+                "receiver_id": receiver,
+                "content": " ".join(random.choices(words, cum_weights=weights, k=random.randint(3, 20))),
+                "sent_at": sent_at + timedelta(seconds=i),
+                "read_at": sent_at + timedelta(seconds=i),
+            })
+        with engine.begin() as connection:
+            connection.execute(insert(Message.__table__), rows)
+    print(f"{args.messages} messages between {args.users} users seeded and indexed in "
+          f"{time.perf_counter() - started:.0f} s, {args.database_url.split(':')[0]}")
+
+    queries = {
+        "rare word": words[1000] + " ",
+        "common word": words[0] + " ",
+        "two words": f"{words[1]} {words[50]} ",
+        "prefix": words[300][:5],
+    }
+    db = SessionLocal()
+    try:
+        for user_id, label in ((heavy, "heavy user"), (ordinary, "ordinary user")):
+            involved = db.execute(
+                text("SELECT count(*) FROM messages WHERE sender_id = :u OR receiver_id = :u"), {"u": user_id}
+            ).scalar()
+            print(f"  {label} ({involved} messages)")
+            for name, query in queries.items():
+                terms = query.split()
+                like = text(
+                    "SELECT id FROM messages WHERE (sender_id = :u OR receiver_id = :u) AND "
+                    + " AND ".join(f"content LIKE :w{i}" for i in range(len(terms)))
+                    + " ORDER BY id DESC LIMIT 20"
+                )
+                params = {"u": user_id, **{f"w{i}": f"%{term}%" for i, term in enumerate(terms)}}
+                index_p50, index_p99, index_hits = percentiles(lambda: search_messages(db, user_id, query, 20), args.searches)
+                like_p50, like_p99, like_hits = percentiles(lambda: db.execute(like, params).all(), args.searches)
+                print(f"    {name:<12} index p50 {index_p50:7.2f} ms  p99 {index_p99:7.2f} ms ({index_hits:2d} results)   "
+                      f"LIKE scan p50 {like_p50:7.2f} ms  p99 {like_p99:7.2f} ms ({like_hits:2d} results)")
+    finally:
+        db.close()
+
+    engine.dispose()
+    if scratch:
+        os.remove(scratch)
+
+
+if __name__ == "__main__":
+    main()
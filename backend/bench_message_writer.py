@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for sending chat messages, one transaction per message
+vs the group-commit MessageWriter
+
+--senders clients each send their share of --messages messages one after
+the other, waiting for every message to be written before sending the
+next, as the app does. The per-row path runs every client in a thread of
+its own calling create_message; the group-commit path runs them as tasks
+submitting to a MessageWriter, once per --window-ms. Reports messages per
+second, commits and send latency for each.
+
+The schema is created with create_all in a throwaway SQLite file unless
+--database-url points at another empty scratch database.
+
+Usage:
+    python bench_message_writer.py [--messages 5000] [--senders 50] [--window-ms 1 5] [--database-url URL]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def report(label: str, elapsed: float, latencies, commits: int) -> None:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"  {label:<22} {len(latencies) / elapsed:8.0f} msg/s  {commits:6d} commits  "
+          f"p50 {p50:6.1f} ms  p99 {p99:6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--senders", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--window-ms", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    scratch = None
+    if args.database_url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+        args.database_url = f"sqlite:///{scratch}"
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.db.crud.messages import create_message
+    from app.db.models import User
+    from app.schema.message import MessageCreate
+    from app.services.message_writer import MessageWriter
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    users = [User(name=f"bench-{i}", email=f"bench-{i}@example.com") for i in range(args.users)]
+    db.add_all(users)
+    db.commit()
+    user_ids = [user.id for user in users]
+    db.close()
+
+    per_sender = args.messages // args.senders
+
+    def outbox(sender: int):
+        sender_id = user_ids[sender % len(user_ids)]
+        return [
+            (MessageCreate(receiver_id=user_ids[(sender + i + 1) % len(user_ids)], content=f"message {i} from {sender}"), sender_id)
+            for i in range(per_sender)
+        ]
+
+    print(f"{per_sender * args.senders} messages from {args.senders} concurrent senders, {args.database_url.split(':')[0]}")
+
+    def send_per_row(sender: int):
+        latencies = []
+        session = SessionLocal()
+        try:
+            for message, sender_id in outbox(sender):
+                started = time.perf_counter()
+                create_message(session, message, sender_id)
+                latencies.append(time.perf_counter() - started)
+        finally:
+            session.close()
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.senders) as executor:
+        latencies = [latency for result in executor.map(send_per_row, range(args.senders)) for latency in result]
+    report("per-row commit", time.perf_counter() - started, latencies, len(latencies))
+
+    for window_ms in args.window_ms:
+        writer = MessageWriter(window_ms=window_ms, max_batch=500)
+
+        async def send_grouped(sender: int):
+            latencies = []
+            for message, sender_id in outbox(sender):
+                started = time.perf_counter()
+                await writer.submit(message, sender_id)
+                latencies.append(time.perf_counter() - started)
+            return latencies
+
+        async def run():
+            await writer.start()
+            try:
+                return await asyncio.gather(*(send_grouped(sender) for sender in range(args.senders)))
+            finally:
+                await writer.stop()
+
+        started = time.perf_counter()
+        results = asyncio.run(run())
+        report(f"group commit {window_ms} ms", time.perf_counter() - started,
+               [latency for result in results for latency in result], writer.batches)
+
+    engine.dispose()
+    if scratch:
+        os.remove(scratch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the batch rider-to-ride assignment solver
+
+Builds a synthetic peak window: riders with a saved home, office and
+weekday schedule, rides departing over two hours with 1 to --max-seats free seats, and
+every rider asking to join a few rides that leave close to their usual
+time. Times solve_assignment on it and compares the result with two
+first-come baselines: drivers accepting requests in arrival order, with
+riders who are already seated elsewhere holding a second seat (what happens
+today), and the same order skipping riders who are already seated.
+
+Usage:
+    python bench_ride_assignment.py [--sizes 1000 10000] [--requests-per-rider 5] [--max-seats 4]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time as time_of_day, timedelta
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.commute_matcher import CommuteProfile
+from app.services.ride_assignment import AssignmentRequest, request_cost, solve_assignment
+
+CITY_CENTER = (31.52, 74.35)
+CITY_SPAN_DEG = 0.14  # ~15 km each way from the centre
+WINDOW_START = datetime(2030, 1, 7, 7, 0)  # a Monday
+WINDOW_MINUTES = 120
+# Riders only ask for rides leaving this close to their usual time
+REQUEST_WINDOW_MINUTES = 20
+
+
+def random_point(rng: random.Random):
+    return (CITY_CENTER[0] + rng.uniform(-CITY_SPAN_DEG, CITY_SPAN_DEG),
+            CITY_CENTER[1] + rng.uniform(-CITY_SPAN_DEG, CITY_SPAN_DEG))
+
+
+def build_problem(rng: random.Random, riders: int, rides: int, requests_per_rider: int, max_seats: int):
+    ride_rows = []
+    for ride_id in range(rides):
+        departure = WINDOW_START + timedelta(minutes=rng.uniform(0, WINDOW_MINUTES))
+        ride_rows.append((departure, ride_id, random_point(rng), random_point(rng), rng.uniform(3.5, 5.0)))
+    ride_rows.sort()
+    departures = [row[0] for row in ride_rows]
+    seats = {ride_id: rng.randint(1, max_seats) for _, ride_id, _, _, _ in ride_rows}
+
+    requests = []
+    for rider_id in range(riders):
+        usual = WINDOW_START + timedelta(minutes=rng.uniform(0, WINDOW_MINUTES))
+        profile = CommuteProfile(
+            user_id=rider_id, is_driver=False, home=random_point(rng), work=random_point(rng),
+            schedule={usual.weekday(): [(time_of_day(usual.hour, usual.minute), None)]},
+        )
+        low = bisect_left(departures, usual - timedelta(minutes=REQUEST_WINDOW_MINUTES))
+        high = bisect_right(departures, usual + timedelta(minutes=REQUEST_WINDOW_MINUTES))
+        nearby = ride_rows[low:high]
+        for departure, ride_id, start, end, rating in rng.sample(nearby, min(requests_per_rider, len(nearby))):
+            requests.append(AssignmentRequest(
+                request_id=len(requests), rider_id=rider_id, ride_id=ride_id,
+                cost=request_cost(profile, departure, start, end, rating),
+            ))
+    return requests, seats
+
+
+def first_come(requests, seats, skip_seated: bool):
+    """Accept requests in arrival order while the ride has seats"""
+    free = dict(seats)
+    seated = {}
+    held = 0
+    for request in requests:
+        if free[request.ride_id] == 0 or (skip_seated and request.rider_id in seated):
+            continue
+        free[request.ride_id] -= 1
+        held += 1
+        seated.setdefault(request.rider_id, request)
+    return list(seated.values()), held - len(seated)
+
+
+def report(label: str, chosen, wasted: int, seconds: float = None):
+    total_cost = sum(request.cost for request in chosen)
+    average = total_cost / len(chosen) if chosen else 0
+    timing = f"  {seconds * 1000:8.0f} ms" if seconds is not None else ""
+    print(f"  {label:<24} riders seated {len(chosen):6d}  seats wasted {wasted:5d}  "
+          f"avg cost {average:6.1f}{timing}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--requests-per-rider", type=int, default=5)
+    parser.add_argument("--max-seats", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        requests, seats = build_problem(rng, size, size, args.requests_per_rider, args.max_seats)
+        print(f"\n{size} riders x {size} rides, {sum(seats.values())} seats, {len(requests)} pending requests")
+
+        arrival = requests[:]
+        rng.shuffle(arrival)
+        report("first come, double seats", *first_come(arrival, seats, skip_seated=False))
+        report("first come", *first_come(arrival, seats, skip_seated=True))
+
+        started = time.perf_counter()
+        chosen = solve_assignment(requests, seats)
+        elapsed = time.perf_counter() - started
+        report("min-cost flow", chosen, 0, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the route-corridor matcher on a synthetic city
+
+Builds 50k active rides with simplified routes across a ~30 km city,
+departing over one day, then times corridor queries with a 2 hour window
+and a 500 m walking distance. Fails if p99 latency exceeds the target.
+
+Usage:
+    python bench_route_matching.py [--rides 50000] [--queries 2000] [--p99-ms 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.route_matcher import RouteCorridorIndex, simplify_polyline
+
+CITY_CENTER = (31.52, 74.35)
+CITY_SPAN_DEG = 0.14  # ~15 km each way from the centre
+
+
+def synthetic_route(rng: random.Random):
+    """Wobbly path between two random points, one vertex every few hundred metres"""
+    start = (CITY_CENTER[0] + rng.uniform(-CITY_SPAN_DEG, CITY_SPAN_DEG),
+             CITY_CENTER[1] + rng.uniform(-CITY_SPAN_DEG, CITY_SPAN_DEG))
+    end = (CITY_CENTER[0] + rng.uniform(-CITY_SPAN_DEG, CITY_SPAN_DEG),
+           CITY_CENTER[1] + rng.uniform(-CITY_SPAN_DEG, CITY_SPAN_DEG))
+    steps = rng.randint(20, 60)
+    points = []
+    for i in range(steps + 1):
+        f = i / steps
+        points.append([
+            start[0] + (end[0] - start[0]) * f + rng.gauss(0, 0.0002),
+            start[1] + (end[1] - start[1]) * f + rng.gauss(0, 0.0002),
+        ])
+    points[0], points[-1] = list(start), list(end)
+    return points
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--p99-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    day_start = datetime(2030, 1, 1, 0, 0)
+    index = RouteCorridorIndex()
+
+    print(f"Building {args.rides} synthetic rides...")
+    routes = []
+    started = time.perf_counter()
+    total_vertices = 0
+    for ride_id in range(1, args.rides + 1):
+        route = simplify_polyline(synthetic_route(rng))
+        departure = day_start + timedelta(minutes=rng.uniform(0, 24 * 60))
+        index.add(ride_id, departure, route)
+        routes.append((departure, route))
+        total_vertices += len(route)
+    print(f"  simplified to {total_vertices / args.rides:.1f} vertices per route "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    index.match((0, 0), (0, 0), 1, day_start, day_start)  # forces the packing
+    print(f"  packed index in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # Half the queries are taken from an existing route so they have matches,
+    # the other half are uniform random trips.
+    latencies = []
+    match_counts = []
+    for i in range(args.queries):
+        if i % 2 == 0:
+            departure, route = routes[rng.randrange(len(routes))]
+            a, b = sorted(rng.sample(range(len(route)), 2))
+            pickup, drop = tuple(route[a]), tuple(route[b])
+            window_start = departure - timedelta(hours=1)
+        else:
+            trip = synthetic_route(rng)
+            pickup, drop = tuple(trip[0]), tuple(trip[-1])
+            window_start = day_start + timedelta(minutes=rng.uniform(0, 22 * 60))
+
+        started = time.perf_counter()
+        matches = index.match(pickup, drop, 500, window_start, window_start + timedelta(hours=2))
+        latencies.append((time.perf_counter() - started) * 1000)
+        match_counts.append(len(matches))
+
+    latencies = np.array(latencies)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"Queries: {args.queries}, mean matches: {np.mean(match_counts):.1f}")
+    print(f"Latency ms  p50={p50:.2f}  p95={p95:.2f}  p99={p99:.2f}  max={latencies.max():.2f}")
+
+    if p99 > args.p99_ms:
+        print(f"❌ p99 {p99:.2f} ms is above the {args.p99_ms} ms target")
+        sys.exit(1)
+    print(f"✅ p99 within the {args.p99_ms} ms target")
+
+
+if __name__ == "__main__":
+    main()
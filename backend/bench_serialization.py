@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark for list response serialization
+
+Builds --rides ride objects with their driver and car, the shape
+search_rides returns, and times turning them into the JSON body two ways:
+the default response_model path (FastAPI's serialize_response followed by
+JSONResponse) and the precompiled ListSerializer the endpoint now uses.
+Reports the per-item cost of each and checks that both bodies decode to
+the same JSON.
+
+Usage:
+    python bench_serialization.py [--rides 1000] [--repeat 50]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.fast_json import ListSerializer
+from app.db.models import Car, Ride, User
+from app.schema.ride import RideResponse
+
+
+def build_rides(count: int) -> List[Ride]:
+    """Transient rides as get_available_rides returns them, driver stats attached"""
+    departure = datetime(2030, 1, 7, 7, 0)
+    rides = []
+    for i in range(count):
+        driver = User(
+            id=i, name=f"Driver {i}", email=f"driver{i}@example.com", phone=f"+92300{i:07d}",
+            bio="Daily commute to the office", gender="male", is_driver=True, is_rider=True,
+            trust_score=4.5, created_at=departure - timedelta(days=i), photo_url=None,
+        )
+        driver.driver_rating = 4.6
+        driver.ride_offered = 12
+        car = Car(
+            id=i, user_id=i, make="Toyota", model="Corolla", year=2018, color="white",
+            license_plate=f"LEA-{i:04d}", seats=4, ac_available=i % 2 == 0,
+        )
+        rides.append(Ride(
+            id=i, driver_id=i, car_id=i, start_location="Model Town, Lahore", end_location="Gulberg III, Lahore",
+            start_latitude=31.48, start_longitude=74.32, end_latitude=31.51, end_longitude=74.35,
+            start_time=departure + timedelta(minutes=i), seats_available=3, total_fare=250.0,
+            status="active", driver=driver, car=car,
+        ))
+    return rides
+
+
+def response_model_body(field, rides) -> bytes:
+    content = asyncio.run(serialize_response(field=field, response_content=rides))
+    return JSONResponse(content).body
+
+
+def timed(label: str, render, count: int, repeat: int) -> bytes:
+    body = render()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    per_item = (time.perf_counter() - started) / repeat / count
+    print(f"  {label:<16} {per_item * 1e6:7.2f} us/item  {len(body) / 1024:7.1f} KiB")
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rides = build_rides(args.rides)
+    field = create_response_field(name="Response_search_rides", type_=List[RideResponse], mode="serialization")
+    serializer = ListSerializer(RideResponse)
+
+    print(f"{args.rides} rides, {args.repeat} runs")
+    before = timed("response_model", lambda: response_model_body(field, rides), args.rides, args.repeat)
+    after = timed("ListSerializer", lambda: serializer.dump_json(rides), args.rides, args.repeat)
+    if json.loads(before) != json.loads(after):
+        sys.exit("The two paths produced different JSON")
+
+
+if __name__ == "__main__":
+    main()
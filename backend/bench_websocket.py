@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark for idle /ws connections on one worker
+
+Opens --connections WebSocket connections to a running server as the user
+of --token, reports how long that took and what /api/health counts, then
+sends one message to that user with --sender-token and times how long it
+takes to reach every connection. Run the server with a single worker and
+raise the open file limit (ulimit -n) on both sides first.
+
+Usage:
+    python bench_websocket.py --token <receiver token> --receiver-id <user id> --sender-token <token>
+        [--url http://localhost:8000] [--connections 10000]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import websockets
+
+# Connections opened at once, so the handshakes do not all time out together
+CONNECT_CONCURRENCY = 200
+
+
+async def open_connections(ws_url: str, count: int):
+    semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    async def connect():
+        async with semaphore:
+            return await websockets.connect(ws_url, open_timeout=30, ping_interval=None)
+
+    return await asyncio.gather(*[connect() for _ in range(count)])
+
+
+async def run(args):
+    ws_url = args.url.replace("http", "ws", 1) + f"/ws?token={args.token}"
+    started = time.perf_counter()
+    connections = await open_connections(ws_url, args.connections)
+    print(f"{len(connections)} connections opened in {time.perf_counter() - started:.1f} s")
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+        await asyncio.sleep(args.idle_seconds)
+        health = (await client.get("/api/health")).json()
+        print(f"server after {args.idle_seconds} s idle: {health['websocket']}")
+
+        async def first_event(connection):
+            await connection.recv()
+            return time.perf_counter()
+
+        waiters = [asyncio.create_task(first_event(connection)) for connection in connections]
+        sent = time.perf_counter()
+        response = await client.post(
+            "/api/messages/",
+            json={"receiver_id": args.receiver_id, "content": "bench"},
+            headers={"Authorization": f"Bearer {args.sender_token}"},
+        )
+        response.raise_for_status()
+        arrivals = sorted(await asyncio.gather(*waiters))
+    print(f"one message fanned out to {len(arrivals)} connections: "
+          f"first after {(arrivals[0] - sent) * 1000:.0f} ms, "
+          f"p50 {(arrivals[len(arrivals) // 2] - sent) * 1000:.0f} ms, "
+          f"last {(arrivals[-1] - sent) * 1000:.0f} ms")
+
+    await asyncio.gather(*[connection.close() for connection in connections])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--receiver-id", type=int, required=True)
+    parser.add_argument("--sender-token", required=True)
+    parser.add_argument("--connections", type=int, default=10_000)
+    parser.add_argument("--idle-seconds", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
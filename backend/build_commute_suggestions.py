@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Fill the commute_suggestions table from every user's schedule and saved locations
+
+Only needed once, after upgrading to migration 0006 (or to rebuild after
+changing the matching rules in app/services/commute_matcher.py). From then
+on schedule, location and driver-flag changes refresh the affected
+suggestions as they happen.
+
+Usage:
+    python build_commute_suggestions.py [--batch-size 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.db.crud.commute_suggestion import rebuild_commute_suggestions
+from app.db.models.commute_suggestion import CommuteSuggestion
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        users = rebuild_commute_suggestions(db, args.batch_size)
+        suggestions = db.query(CommuteSuggestion).count()
+    finally:
+        db.close()
+
+    print(f"✅ Refreshed {users} users, {suggestions} suggestions stored in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
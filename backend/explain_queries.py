@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Print the query plan of every CRUD read query
+
+Runs the read functions of app.db.crud against DATABASE_URL, captures the SQL
+they emit and prints EXPLAIN (Postgres) or EXPLAIN QUERY PLAN (SQLite) for
+each statement, so index usage can be checked after a migration.
+Nothing is written; the session is rolled back at the end.
+
+Usage:
+    python explain_queries.py [user_id] [other_user_id] [ride_id]
+"""
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+
+from app.core.database import SessionLocal, engine
+import app.db.models  # noqa: F401 - register all models
+from app.db.crud import car, location, messages, ride, ride_history, ride_request, schedule, user, user_stats
+
+
+def crud_calls(user_id: int, other_user_id: int, ride_id: int):
+    return [
+        ("ride.get_available_rides", lambda db: ride.get_available_rides(db, user_id, 50)),
+        ("ride.get_user_rides", lambda db: ride.get_user_rides(db, user_id)),
+        ("ride.get_user_completed_rides", lambda db: ride.get_user_completed_rides(db, user_id)),
+        ("ride.get_ride", lambda db: ride.get_ride(db, ride_id)),
+        ("ride_request.get_ride_requests", lambda db: ride_request.get_ride_requests(db, ride_id)),
+        ("ride_request.get_ride_accepted_requests", lambda db: ride_request.get_ride_accepted_requests(db, ride_id)),
+        ("ride_request.get_user_ride_requests", lambda db: ride_request.get_user_ride_requests(db, user_id)),
+        ("ride_request.get_driver_ride_requests", lambda db: ride_request.get_driver_ride_requests(db, user_id)),
+        ("ride_request.user_already_requested", lambda db: ride_request.user_already_requested(db, ride_id, user_id)),
+        ("ride_history.get_user_ride_history_by_id", lambda db: ride_history.get_user_ride_history_by_id(db, user_id)),
+        ("ride_history.get_rider_ride_history", lambda db: ride_history.get_rider_ride_history(db, user_id, ride_id)),
+        ("ride_history.get_ride_history_by_ride_id", lambda db: ride_history.get_ride_history_by_ride_id(db, ride_id)),
+        ("messages.get_conversation", lambda db: messages.get_conversation(db, user_id, other_user_id)),
+        ("messages.get_user_conversations", lambda db: messages.get_user_conversations(db, user_id)),
+        ("car.get_user_cars", lambda db: car.get_user_cars(db, user_id)),
+        ("location.get_user_locations", lambda db: location.get_user_locations(db, user_id)),
+        ("schedule.get_user_schedule", lambda db: schedule.get_user_schedule(db, user_id)),
+        ("user.get_user", lambda db: user.get_user(db, user_id)),
+        ("user.get_user_by_email", lambda db: user.get_user_by_email(db, "someone@example.com")),
+        ("user.get_user_by_phone", lambda db: user.get_user_by_phone(db, "+920000000000")),
+        ("user_stats.get_user_stats", lambda db: user_stats.get_user_stats(db, user_id)),
+    ]
+
+
+def explain(connection, statement, parameters):
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql("EXPLAIN " + statement, parameters).fetchall()
+    return [row[0] for row in rows]
+
+
+def main():
+    args = [int(arg) for arg in sys.argv[1:4]]
+    user_id, other_user_id, ride_id = args + [1, 2, 1][len(args):]
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    db = SessionLocal()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        for name, call in crud_calls(user_id, other_user_id, ride_id):
+            captured.clear()
+            try:
+                call(db)
+            except Exception as e:
+                print(f"\n=== {name}: failed to run ({e})")
+                db.rollback()
+                continue
+
+            for statement, parameters in list(captured):
+                print(f"\n=== {name}")
+                print(" ".join(statement.split()))
+                with engine.connect() as connection:
+                    for line in explain(connection, statement, parameters):
+                        print(f"    {line}")
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
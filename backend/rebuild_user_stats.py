@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Backfill or rebuild the user_stats rollup table from rides and ride_history
+
+Usage:
+    python rebuild_user_stats.py              # rebuild every user
+    python rebuild_user_stats.py 12 15 42     # rebuild only the given user ids
+"""
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.db.crud.user_stats import rebuild_user_stats
+import app.db.models  # noqa: F401 - register all models
+
+def main():
+    user_ids = [int(arg) for arg in sys.argv[1:]] or None
+    db = SessionLocal()
+
+    try:
+        count = rebuild_user_stats(db, user_ids)
+        print(f"Rebuilt stats for {count} users")
+    except Exception as e:
+        print(f"Error rebuilding user stats: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
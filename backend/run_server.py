@@ -5,4 +5,4 @@ Development server runner for Commute.io Backend
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True, ws_per_message_deflate=False)
\ No newline at end of file
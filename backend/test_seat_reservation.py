@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Concurrency test for seat reservation on ride request accept/reject
+
+Creates a throwaway driver, ride and riders in DATABASE_URL, then fires
+parallel accepts (one thread and session each) through
+update_ride_request_status and checks that the ride never gives away more
+seats than it has, that rejecting accepted requests returns their seats and
+that repeated accepts of one request take a single seat. A last round races
+bulk updates against single accepts. The fixtures are deleted afterwards.
+
+Usage:
+    python test_seat_reservation.py [--riders 300] [--seats 5] [--threads 100]
+"""
+import argparse
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.db.models import Car, Ride, RideRequest, User
+from app.db.crud.ride_request import (
+    ConcurrentUpdate,
+    NoSeatsAvailable,
+    bulk_update_ride_request_status,
+    update_ride_request_status,
+)
+
+
+def create_fixtures(riders: int, seats: int):
+    tag = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        driver = User(name=f"seat-test-driver-{tag}", email=f"seat-driver-{tag}@example.com", is_driver=True)
+        users = [User(name=f"seat-test-rider-{tag}-{i}", email=f"seat-rider-{tag}-{i}@example.com", is_rider=True)
+                 for i in range(riders)]
+        db.add(driver)
+        db.add_all(users)
+        db.flush()
+        car = Car(user_id=driver.id, make="Test", model="Car", license_plate=f"SEAT-{tag}", seats=seats)
+        db.add(car)
+        db.flush()
+        ride = Ride(driver_id=driver.id, car_id=car.id, start_location="A", end_location="B",
+                    start_time=datetime.now() + timedelta(days=1), seats_available=seats, total_fare=100)
+        db.add(ride)
+        db.flush()
+        requests = [RideRequest(ride_id=ride.id, rider_id=user.id) for user in users]
+        db.add_all(requests)
+        db.commit()
+        return ride.id, [request.id for request in requests], driver.id, [driver.id] + [user.id for user in users]
+    finally:
+        db.close()
+
+
+def delete_fixtures(ride_id: int, user_ids):
+    db = SessionLocal()
+    try:
+        db.query(RideRequest).filter(RideRequest.ride_id == ride_id).delete(synchronize_session=False)
+        db.query(Ride).filter(Ride.id == ride_id).delete(synchronize_session=False)
+        db.query(Car).filter(Car.user_id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def fire(request_ids, status: str, threads: int) -> Counter:
+    """Call update_ride_request_status for every id at once; count the outcomes"""
+    barrier = threading.Barrier(min(threads, len(request_ids)))
+
+    def call(request_id):
+        db = SessionLocal()
+        try:
+            try:
+                barrier.wait(timeout=30)
+            except threading.BrokenBarrierError:
+                pass
+            update_ride_request_status(db, request_id, status)
+            return "ok"
+        except NoSeatsAvailable:
+            return "full"
+        except Exception as e:
+            db.rollback()
+            return f"error: {type(e).__name__}: {e}"
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return Counter(pool.map(call, request_ids))
+
+
+def fire_bulk(batches, driver_id: int, threads: int) -> Counter:
+    """Send every batch of (request_id, status) pairs at once; count the per-item outcomes"""
+    barrier = threading.Barrier(min(threads, len(batches)))
+
+    def call(batch):
+        db = SessionLocal()
+        try:
+            try:
+                barrier.wait(timeout=30)
+            except threading.BrokenBarrierError:
+                pass
+            return [result["code"] or "ok" for result in bulk_update_ride_request_status(db, driver_id, batch)]
+        except ConcurrentUpdate:
+            return ["conflict"] * len(batch)
+        except Exception as e:
+            db.rollback()
+            return [f"error: {type(e).__name__}: {e}"] * len(batch)
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return Counter(outcome for outcomes in pool.map(call, batches) for outcome in outcomes)
+
+
+def ride_state(ride_id: int):
+    db = SessionLocal()
+    try:
+        seats = db.query(Ride.seats_available).filter(Ride.id == ride_id).scalar()
+        statuses = Counter(status for (status,) in db.query(RideRequest.status).filter(RideRequest.ride_id == ride_id))
+        return seats, statuses
+    finally:
+        db.close()
+
+
+def check(label: str, condition: bool, detail: str) -> bool:
+    print(f"{'✅' if condition else '❌'} {label}: {detail}")
+    return condition
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--riders", type=int, default=300)
+    parser.add_argument("--seats", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=100)
+    args = parser.parse_args()
+
+    ride_id, request_ids, driver_id, user_ids = create_fixtures(args.riders, args.seats)
+    print(f"🧪 Ride {ride_id} with {args.seats} seats, {args.riders} pending requests")
+    ok = True
+    try:
+        # 1. Every rider is accepted at once; only `seats` of them may win
+        outcomes = fire(request_ids, "accepted", args.threads)
+        seats, statuses = ride_state(ride_id)
+        ok &= check("parallel accepts", outcomes["ok"] == args.seats and statuses["accepted"] == args.seats and seats == 0,
+                    f"outcomes={dict(outcomes)} seats_available={seats} statuses={dict(statuses)}")
+
+        # 2. Rejecting the accepted requests (twice each, concurrently) returns each seat once
+        accepted_ids = []
+        db = SessionLocal()
+        try:
+            accepted_ids = [request_id for (request_id,) in db.query(RideRequest.id).filter(
+                RideRequest.ride_id == ride_id, RideRequest.status == "accepted")]
+        finally:
+            db.close()
+        outcomes = fire(accepted_ids * 2, "rejected", args.threads)
+        seats, statuses = ride_state(ride_id)
+        ok &= check("parallel rejects", seats == args.seats and statuses["accepted"] == 0,
+                    f"outcomes={dict(outcomes)} seats_available={seats} statuses={dict(statuses)}")
+
+        # 3. Hundreds of accepts of the same request take exactly one seat
+        outcomes = fire([request_ids[0]] * args.riders, "accepted", args.threads)
+        seats, statuses = ride_state(ride_id)
+        ok &= check("repeated accepts of one request", seats == args.seats - 1 and statuses["accepted"] == 1,
+                    f"outcomes={dict(outcomes)} seats_available={seats}")
+
+        # 4. Bulk accepts of every request in batches of 10, racing single accepts
+        batches = [[(request_id, "accepted") for request_id in request_ids[i:i + 10]]
+                   for i in range(0, len(request_ids), 10)]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            bulk = pool.submit(fire_bulk, batches, driver_id, args.threads // 2)
+            single = pool.submit(fire, request_ids[::-1][:50], "accepted", args.threads // 2)
+            outcomes = bulk.result() + single.result()
+        seats, statuses = ride_state(ride_id)
+        ok &= check("bulk accepts", seats == 0 and statuses["accepted"] == args.seats,
+                    f"outcomes={dict(outcomes)} seats_available={seats} statuses={dict(statuses)}")
+    finally:
+        delete_fixtures(ride_id, user_ids)
+
+    if not ok:
+        sys.exit(1)
+    print("🎉 Seat reservation is consistent under contention")
+
+
+if __name__ == "__main__":
+    main()
@@ -449,8 +449,41 @@ export const messagesAPI = {
     return apiRequest('/messages/conversations');
   },
 
-  async getConversationWithUser(userId: number) {
-    return apiRequest(`/messages/${userId}`);
+  async getConversationWithUser(userId: number, params?: { beforeId?: number; afterId?: number; limit?: number }) {
+    const query = new URLSearchParams();
+    if (params?.beforeId) query.append('before_id', String(params.beforeId));
+    if (params?.afterId) query.append('after_id', String(params.afterId));
+    if (params?.limit) query.append('limit', String(params.limit));
+    const suffix = query.toString() ? `?${query.toString()}` : '';
+    return apiRequest(`/messages/${userId}${suffix}`);
+  },
+
+  async getUnreadCount() {
+    return apiRequest('/messages/unread');
+  },
+
+  // Each result has a plain text snippet and the [start, end) highlights of
+  // the matched words in it, as string indexes: snippet.slice(start, end)
+  async searchMessages(query: string, limit?: number) {
+    const params = new URLSearchParams({ q: query });
+    if (limit) params.append('limit', limit.toString());
+    return apiRequest(`/messages/search?${params.toString()}`);
+  },
+
+  async markConversationRead(userId: number, upToId: number) {
+    return apiRequest(`/messages/${userId}/read`, {
+      method: 'POST',
+      body: JSON.stringify({ up_to_id: upToId }),
+    });
+  },
+
+  // Long-poll fallback for /ws: call without a cursor first, then pass back
+  // the cursor from every answer
+  async getChanges(cursor?: string, wait?: number) {
+    const params = new URLSearchParams();
+    if (cursor) params.append('cursor', cursor);
+    if (wait !== undefined) params.append('wait', wait.toString());
+    return apiRequest(`/changes/?${params.toString()}`);
   }
 };
 